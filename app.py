@@ -1,10 +1,28 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 import uvicorn
 import sys, os
+import asyncio
+import gc
+import json
+import subprocess
+import threading
+import time
+import weakref
+from typing import List
 from fastapi.templating import Jinja2Templates
 from starlette.responses import RedirectResponse
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from src.text_summarization.pipeline.prediction_pipeline import PredictionPipeline
+from src.text_summarization.pipeline.model_registry import ModelRegistry
+from src.text_summarization.pipeline.batch_scheduler import MicroBatchScheduler
+from src.text_summarization.pipeline.bounded_executor import BoundedExecutor
+from src.text_summarization.pipeline.summary_cache import SummaryCache
+from src.text_summarization.pipeline.model_refresher import ModelRefresher
+from src.text_summarization.pipeline import metrics
+from src.text_summarization.config.config_manager import ConfigurationManager
+from src.text_summarization.config.aws_storage_operations import S3Operations
+from src.text_summarization.exception import ServiceOverloadedError
+from src.text_summarization.utils.common_utils import get_generation_kwargs
 from src.text_summarization.logger import logging
 
 
@@ -12,6 +30,198 @@ text:str = "What is Text Summarization?"
 
 TextSummarizationApp = FastAPI()
 
+templates = Jinja2Templates(directory="templates")
+
+
+def create_prediction_pipeline(config) -> None:
+    """This method creates the model registry, summary cache and prediction pipeline shared by all requests"""
+    TextSummarizationApp.state.model_registry = ModelRegistry(mmap_weights=config.mmap_model_weights)
+    TextSummarizationApp.state.summary_cache = SummaryCache(
+        max_memory_bytes = config.summary_cache_max_bytes,
+        disk_dir = config.summary_cache_dir,
+        max_disk_bytes = config.summary_cache_disk_max_bytes
+    )
+    TextSummarizationApp.state.prediction_pipeline = PredictionPipeline(
+        model_registry = TextSummarizationApp.state.model_registry,
+        summary_cache = TextSummarizationApp.state.summary_cache
+    )
+
+
+def preload_model() -> None:
+    """
+    Method Name :   preload_model
+    Description :   This method loads the serving model in the gunicorn master before the workers are forked.
+                    The surviving objects are moved out of the garbage collector's generations so that
+                    collections in the workers do not write to, and so un-share, the inherited pages.
+                    Only the memory-mapped PyTorch backend is preloaded. ONNX Runtime sessions and dynamically
+                    quantized modules hold native thread pools and state that do not survive fork, so the
+                    other backends are loaded by each worker after it is forked.
+                    Only a version already on local disk is preloaded. Nothing answers /healthz until the
+                    workers are forked, so a download is left to the workers, which retry it. Any failure
+                    falls back to loading in every worker instead of taking the master down.
+    Output      :   None
+    """
+    config = ConfigurationManager().get_prediction_pipeline_config()
+    if config.inference_backend != "pytorch" or not config.mmap_model_weights:
+        logging.info(f"Not preloading the {config.inference_backend} backend, which is not fork-safe, "
+                     f"the workers load it after they are forked")
+        return
+
+    try:
+        create_prediction_pipeline(config)
+        prediction_pipeline = TextSummarizationApp.state.prediction_pipeline
+        local_version = prediction_pipeline.get_local_version()
+        if local_version is None:
+            logging.info("No model version on local disk to preload, the workers load it after they are forked")
+            discard_prediction_pipeline()
+            return
+
+        logging.info(f"Preloading model version {local_version} before forking workers")
+        prediction_pipeline.warmup_on_activate = False
+        prediction_pipeline.activate_model_version(local_version)
+        prediction_pipeline.warmup_on_activate = True
+    except Exception as error:
+        logging.exception(f"Could not preload the summarization model, the workers load it after they are "
+                          f"forked: {error}")
+        discard_prediction_pipeline()
+        return
+
+    # The workers report the model they serve, the master would keep reporting it after they refresh
+    metrics.clear_model_info()
+    gc.collect()
+    gc.freeze()
+    logging.info("Preloaded the summarization model")
+
+
+def discard_prediction_pipeline() -> None:
+    """This method drops a pipeline the master did not preload, so that every worker creates its own"""
+    for name in ("prediction_pipeline", "model_registry", "summary_cache"):
+        if hasattr(TextSummarizationApp.state, name):
+            delattr(TextSummarizationApp.state, name)
+    metrics.clear_model_info()
+
+
+def prepare_forked_worker(torch_threads: int) -> None:
+    """
+    This method runs in a worker right after it is forked from a preloading master. It limits the torch
+    intra-op threads to the worker's share of the CPUs and replaces the S3 clients, whose pooled
+    connections were inherited from the master.
+    """
+    import torch
+    torch.set_num_threads(torch_threads)
+    if hasattr(TextSummarizationApp.state, "prediction_pipeline"):
+        TextSummarizationApp.state.prediction_pipeline.s3 = S3Operations()
+
+
+async def load_and_warm_model(config) -> None:
+    """
+    This method downloads the serving model if it was not preloaded, warms it up at representative input
+    lengths and then starts the background model refresher. Failures are retried every
+    MODEL_LOAD_RETRY_SECONDS, while the pod stays unready.
+    """
+    prediction_pipeline = TextSummarizationApp.state.prediction_pipeline
+    while True:
+        try:
+            await TextSummarizationApp.state.io_executor.run(prediction_pipeline.ensure_warm)
+            break
+        except Exception as error:
+            logging.exception(f"Could not load the summarization model, retrying in "
+                              f"{config.model_load_retry_seconds} seconds: {error}")
+            await asyncio.sleep(config.model_load_retry_seconds)
+
+    TextSummarizationApp.state.model_refresher.start()
+    logging.info(f"Summarization model {prediction_pipeline.model_registry.current.version} is ready")
+
+
+@TextSummarizationApp.on_event("startup")
+async def load_prediction_pipeline():
+    """This method loads the model once per process, unless it was preloaded, and shares it across all requests"""
+    logging.info("Inside load_prediction_pipeline() startup hook")
+    config = ConfigurationManager().get_prediction_pipeline_config()
+    if not hasattr(TextSummarizationApp.state, "prediction_pipeline"):
+        create_prediction_pipeline(config)
+
+    TextSummarizationApp.state.inference_executor = BoundedExecutor(
+        name = "inference",
+        max_workers = config.inference_workers,
+        max_queue_depth = 0
+    )
+    TextSummarizationApp.state.io_executor = BoundedExecutor(
+        name = "io",
+        max_workers = config.io_workers,
+        max_queue_depth = config.io_queue_depth
+    )
+
+    TextSummarizationApp.state.streaming_executor = BoundedExecutor(
+        name = "streaming",
+        max_workers = config.streaming_workers,
+        max_queue_depth = config.streaming_queue_depth
+    )
+
+    # Training runs for hours, so it gets its own slot instead of holding one of the io workers
+    TextSummarizationApp.state.training_executor = BoundedExecutor(
+        name = "training",
+        max_workers = 1,
+        max_queue_depth = 0
+    )
+
+    TextSummarizationApp.state.batch_scheduler = MicroBatchScheduler(
+        predict_batch = TextSummarizationApp.state.prediction_pipeline.predict_batch,
+        executor = TextSummarizationApp.state.inference_executor,
+        max_batch_size = config.max_batch_size,
+        max_batch_wait_ms = config.max_batch_wait_ms,
+        max_queue_depth = config.max_queue_depth
+    )
+    TextSummarizationApp.state.model_refresher = ModelRefresher(
+        prediction_pipeline = TextSummarizationApp.state.prediction_pipeline,
+        interval_seconds = config.model_refresh_interval_seconds
+    )
+
+    # The model is downloaded and warmed up in the background so that /healthz answers while /readyz holds
+    # traffic back until the first request can be served at full speed
+    TextSummarizationApp.state.model_loader = asyncio.ensure_future(load_and_warm_model(config))
+    logging.info("Completed execution of load_prediction_pipeline() startup hook")
+
+
+@TextSummarizationApp.on_event("shutdown")
+async def stop_batch_scheduler():
+    """This method stops the model loader and refresher, the micro-batching workers and the executors"""
+    TextSummarizationApp.state.model_loader.cancel()
+    # A refresh can be in the middle of a download, so the join runs off the event loop with a bound
+    await asyncio.get_running_loop().run_in_executor(None, TextSummarizationApp.state.model_refresher.stop)
+    await TextSummarizationApp.state.batch_scheduler.stop()
+    TextSummarizationApp.state.inference_executor.shutdown()
+    TextSummarizationApp.state.io_executor.shutdown()
+    TextSummarizationApp.state.streaming_executor.shutdown()
+    TextSummarizationApp.state.training_executor.shutdown()
+
+
+
+@TextSummarizationApp.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """This method counts every request and times it until its response starts, labelled by route"""
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Paths that matched no route share one label so that scans cannot blow up the series count
+        endpoint = request.url.path if "endpoint" in request.scope else "unmatched"
+        metrics.REQUESTS.labels(endpoint, str(status)).inc()
+        metrics.REQUEST_LATENCY.labels(endpoint).observe(time.perf_counter() - start_time)
+
+
+
+@TextSummarizationApp.get("/metrics")
+async def metrics_route():
+    """This method exposes the service metrics in the Prometheus text format"""
+    content, content_type = metrics.render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+
 @TextSummarizationApp.get("/", tags=["authentication"])
 async def index():
     logging.info(f"Inside index() method routing get('/', tags=['authentication'])")
@@ -23,28 +233,260 @@ async def index():
 async def training():
     try:
         logging.info(f"Inside training() method routing get('/train')")
-        os.system("python main.py")
+        await TextSummarizationApp.state.training_executor.run(
+            subprocess.run, [sys.executable, "train.py"], check=True
+        )
         return Response("Training successful !!")
 
+    except ServiceOverloadedError:
+        raise HTTPException(status_code=409, detail="Training is already running")
+
     except Exception as error:
         logging.exception(f"Error Occurred! {error}")
         return Response(f"Error Occurred! {error}")
-    
+
+
+
+@TextSummarizationApp.get("/healthz")
+async def healthz():
+    """This method reports that the process is alive and its event loop responsive, whether or not a model is loaded"""
+    return {"status": "ok"}
+
+
+
+@TextSummarizationApp.get("/readyz")
+async def readyz():
+    """This method reports ready once a model is loaded and warmed up, and 503 until then"""
+    prediction_pipeline = TextSummarizationApp.state.prediction_pipeline
+    if not prediction_pipeline.is_ready():
+        return JSONResponse(status_code=503, content={"status": "loading"})
+
+    return {
+        "status": "ready",
+        "model_version": prediction_pipeline.model_registry.current.version,
+        "load_timeline": prediction_pipeline.load_timeline
+    }
+
+
+
+def require_ready() -> None:
+    """This method rejects requests with 503 until the model is loaded and warmed up"""
+    if not TextSummarizationApp.state.prediction_pipeline.is_ready():
+        raise HTTPException(status_code=503, detail="The summarization model is still loading")
+
+
+
+def resolve_generation_profile(profile: str = None) -> str:
+    """This method returns the requested generation profile, or the server default, rejecting unknown names"""
+    profile = profile or TextSummarizationApp.state.prediction_pipeline.config.generation_profile
+    try:
+        get_generation_kwargs(profile)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    return profile
+
 
 
 @TextSummarizationApp.post("/predict")
-async def predict_route(text):
+async def predict_route(text, profile: str = None):
     try:
         logging.info(f"Inside predict_route() method routing post('/predict')")
-        obj = PredictionPipeline()
-        text = obj.predict(text)
+        require_ready()
+        profile = resolve_generation_profile(profile)
+        text = await TextSummarizationApp.state.batch_scheduler.submit(text, profile)
         return text
+    except HTTPException:
+        raise
+    except ServiceOverloadedError as error:
+        raise HTTPException(status_code=503, detail=str(error))
+    except Exception as error:
+        logging.exception(f"Error Occurred! {error}")
+        raise HTTPException(status_code=500, detail=f"Error Occurred! {error}")
+
+
+
+async def stream_summary_events(generation: asyncio.Future, chunks: asyncio.Queue, cancel_event: threading.Event):
+    """
+    This method relays summary chunks as Server-Sent Events while generation runs, then a done event with
+    the full summary. When the client disconnects the generator is cancelled and generation is stopped.
+    A generator closed before its first iteration never enters its finally, so the route also stops the
+    generation when the generator is released.
+    """
+    generation.add_done_callback(lambda _: chunks.put_nowait(None))
+    try:
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            yield f"data: {json.dumps({'token': chunk})}\n\n"
+
+        summary = await generation
+        yield f"event: done\ndata: {json.dumps({'summary': summary})}\n\n"
+    except Exception as error:
+        logging.exception(f"Error Occurred! {error}")
+        yield f"event: error\ndata: {json.dumps({'error': str(error)})}\n\n"
+    finally:
+        cancel_event.set()
+
+
+
+@TextSummarizationApp.post("/predict/stream")
+async def predict_stream_route(text, profile: str = None):
+    try:
+        logging.info(f"Inside predict_stream_route() method routing post('/predict/stream')")
+        require_ready()
+        prediction_pipeline = TextSummarizationApp.state.prediction_pipeline
+        profile = resolve_generation_profile(profile or prediction_pipeline.config.streaming_generation_profile)
+        if get_generation_kwargs(profile).get("num_beams", 1) > 1:
+            raise HTTPException(status_code=422, detail=f"Generation profile {profile} uses beam search, "
+                                                        f"which cannot be streamed")
+
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        cancel_event = threading.Event()
+        generation = TextSummarizationApp.state.streaming_executor.submit(
+            prediction_pipeline.stream_summary,
+            text,
+            profile,
+            lambda chunk: loop.call_soon_threadsafe(chunks.put_nowait, chunk),
+            cancel_event
+        )
+
+        events = stream_summary_events(generation, chunks, cancel_event)
+        weakref.finalize(events, cancel_event.set)
+        return StreamingResponse(events,
+                                 media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    except HTTPException:
+        raise
+    except ServiceOverloadedError as error:
+        raise HTTPException(status_code=503, detail=str(error))
     except Exception as error:
         logging.exception(f"Error Occurred! {error}")
-        raise Response(f"Error Occurred! {error}")
-    
+        raise HTTPException(status_code=500, detail=f"Error Occurred! {error}")
+
+
+
+@TextSummarizationApp.get("/summarize")
+async def summarize_page(request: Request, text: str, title: str = ""):
+    """This method renders the summarization page, which streams the summary of text from /predict/stream"""
+    logging.info(f"Inside summarize_page() method routing get('/summarize')")
+    return templates.TemplateResponse("summarize.html", {
+        "request": request,
+        "title": title,
+        "text": text,
+        "summary": "",
+        "show_summary": True,
+        "stream_summary": True
+    })
+
+
+
+@TextSummarizationApp.get("/cache/stats")
+async def cache_stats():
+    logging.info(f"Inside cache_stats() method routing get('/cache/stats')")
+    return TextSummarizationApp.state.summary_cache.get_stats()
+
+
+
+async def read_bulk_texts(request: Request) -> List[str]:
+    """
+    This method reads the documents of a bulk request. The body is either a JSON array (or an object with a
+    "texts" array) or, with an application/x-ndjson content type, one JSON document per line. Each document
+    is a string or an object with a "text" or "dialogue" field.
+    """
+    body = await request.body()
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            records = [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+        else:
+            records = json.loads(body)
+            if isinstance(records, dict):
+                records = records.get("texts", [])
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=f"Invalid request body: {error}")
+
+    if not isinstance(records, list):
+        raise HTTPException(status_code=422, detail="Expected a list of documents")
+
+    texts = [record if isinstance(record, str) else record.get("text", record.get("dialogue"))
+             for record in records if isinstance(record, (str, dict))]
+    if len(texts) != len(records) or not all(isinstance(text, str) for text in texts):
+        raise HTTPException(status_code=422, detail="Every document must be a string or have a 'text' field")
+
+    return texts
+
+
+async def stream_bulk_summaries(texts: List[str], batches: List[List[int]], profile: str):
+    """
+    This method pushes the length-sorted batches through the micro-batch scheduler, keeping only a few in
+    flight, and yields one NDJSON line per document in input order as soon as its prefix is complete
+    """
+    scheduler = TextSummarizationApp.state.batch_scheduler
+    max_in_flight = TextSummarizationApp.state.inference_executor.max_workers + 1
+    remaining_batches = iter(batches)
+    pending = {}
+    results = {}
+    next_index = 0
+
+    def schedule_batches():
+        for indices in remaining_batches:
+            task = asyncio.ensure_future(scheduler.submit_batch([texts[index] for index in indices], profile))
+            pending[task] = indices
+            if len(pending) >= max_in_flight:
+                break
+
+    try:
+        schedule_batches()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                indices = pending.pop(task)
+                try:
+                    for index, summary in zip(indices, task.result()):
+                        results[index] = {"index": index, "summary": summary}
+                except Exception as error:
+                    logging.exception(f"Error Occurred! {error}")
+                    for index in indices:
+                        results[index] = {"index": index, "error": str(error)}
+            schedule_batches()
+
+            while next_index in results:
+                yield json.dumps(results.pop(next_index)) + "\n"
+                next_index += 1
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+
+@TextSummarizationApp.post("/predict/batch")
+async def predict_batch_route(request: Request, profile: str = None):
+    try:
+        logging.info(f"Inside predict_batch_route() method routing post('/predict/batch')")
+        require_ready()
+        profile = resolve_generation_profile(profile)
+        texts = await read_bulk_texts(request)
+        prediction_pipeline = TextSummarizationApp.state.prediction_pipeline
+        if len(texts) > prediction_pipeline.config.max_bulk_documents:
+            raise HTTPException(status_code=413,
+                                detail=f"At most {prediction_pipeline.config.max_bulk_documents} documents per request")
+
+        batches = await TextSummarizationApp.state.io_executor.run(
+            prediction_pipeline.get_length_sorted_batches, texts, prediction_pipeline.config.max_batch_size
+        )
+        logging.info(f"Summarizing {len(texts)} documents in {len(batches)} length-sorted batches")
+
+        return StreamingResponse(stream_bulk_summaries(texts, batches, profile), media_type="application/x-ndjson")
+    except HTTPException:
+        raise
+    except ServiceOverloadedError as error:
+        raise HTTPException(status_code=503, detail=str(error))
+    except Exception as error:
+        logging.exception(f"Error Occurred! {error}")
+        raise HTTPException(status_code=500, detail=f"Error Occurred! {error}")
+
 
 
 if __name__=="__main__":
     uvicorn.run(TextSummarizationApp, host="0.0.0.0", port=8080)
-
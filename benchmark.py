@@ -0,0 +1,232 @@
+"""
+Latency and parity benchmarks for the serving paths, e.g.
+python benchmark.py backends artifacts/PredictionPipeline/versions/<version> --data samsum-test.csv
+python benchmark.py quantization artifacts/PredictionPipeline/versions/<version>
+python benchmark.py rouge --repeat 10 --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from datasets import load_from_disk, load_metric
+from src.text_summarization.components.rouge_scorer import RougeScorer
+from src.text_summarization.config.config_manager import ConfigurationManager
+from src.text_summarization.constants import GenerationProfileConstants
+from src.text_summarization.pipeline.model_registry import ModelRegistry
+from src.text_summarization.pipeline.prediction_pipeline import PredictionPipeline
+from src.text_summarization.logger import logging
+
+
+SAMPLE_DIALOGUES = [
+    "Amanda: I baked cookies. Do you want some?\nJerry: Sure!\nAmanda: I'll bring you tomorrow :-)",
+    "Olivia: Who are you voting for in this election?\nOliver: Liberals as always.\nOlivia: Me too!!\n"
+    "Oliver: Great",
+    "Tim: Hi, what's up?\nKim: Bad mood tbh, I was going to do lots of stuff but ended up procrastinating\n"
+    "Tim: What did you plan on doing?\nKim: Oh you know, uni stuff and cleaning my room\n"
+    "Kim: Maybe tomorrow I'll get going and do everything\nKim: We were going to defrost the fridge so "
+    "instead of shopping I'll eat some defrosted veggies\nTim: For getting things done I recommend the "
+    "Pomodoro technique where you use the breaks for chores\nTim: It really helps\nKim: thanks, maybe I'll "
+    "do that\nTim: I also like using post-its kanban style",
+    "Hannah: Hey, do you have Betty's number?\nAmanda: Lemme check\nAmanda: Sorry, can't find it.\n"
+    "Amanda: Ask Larry\nAmanda: He called her last time we were at the park together\nHannah: I don't "
+    "know him well\nAmanda: Don't be shy, he's very nice\nHannah: If you say so..\nHannah: I'd rather "
+    "you texted him\nAmanda: Just text him\nHannah: Urgh.. Alright\nHannah: Bye\nAmanda: Bye bye",
+]
+
+
+def load_dialogues(data_path, samples):
+    """This method returns the dialogues to benchmark with, from a samsum-style CSV or the built-in samples"""
+    if data_path:
+        return pd.read_csv(data_path)["dialogue"].dropna().tolist()[:samples]
+    return (SAMPLE_DIALOGUES * (samples // len(SAMPLE_DIALOGUES) + 1))[:samples]
+
+
+def time_summaries(prediction_pipeline, loaded_model, dialogues, batch_size, gen_kwargs):
+    """This method summarizes dialogues in batches through the serving code path and records per-batch latency"""
+    summaries, latencies = [], []
+    prediction_pipeline.generate_summaries(loaded_model, dialogues[:1], gen_kwargs)
+    for i in range(0, len(dialogues), batch_size):
+        start_time = time.perf_counter()
+        summaries.extend(prediction_pipeline.generate_summaries(loaded_model, dialogues[i : i + batch_size], gen_kwargs))
+        latencies.append(time.perf_counter() - start_time)
+
+    return summaries, {
+        "batches": len(latencies),
+        "total_seconds": round(sum(latencies), 3),
+        "p50_batch_seconds": round(statistics.median(latencies), 3),
+        "max_batch_seconds": round(max(latencies), 3),
+        "documents_per_second": round(len(dialogues) / sum(latencies), 2)
+    }
+
+
+def benchmark_backends(args):
+    """This method compares the PyTorch and ONNX Runtime backends on the same model version"""
+    prediction_pipeline = PredictionPipeline()
+    config = prediction_pipeline.config
+    dialogues = load_dialogues(args.data, args.samples)
+    tokenizer_path = os.path.join(args.version_dir, config.tokenizer_prefix)
+
+    report, outputs = {}, {}
+    for backend in ("pytorch", "onnx"):
+        loaded_model = prediction_pipeline.model_registry.get(
+            os.path.join(args.version_dir, prediction_pipeline.get_model_prefix(backend)),
+            tokenizer_path, f"benchmark-{backend}", backend
+        )
+        gen_kwargs = prediction_pipeline.resolve_generation_kwargs(loaded_model, args.profile)
+        outputs[backend], report[backend] = time_summaries(
+            prediction_pipeline, loaded_model, dialogues, args.batch_size, gen_kwargs
+        )
+
+    report["exact_matches"] = sum(a == b for a, b in zip(outputs["pytorch"], outputs["onnx"]))
+    report["samples"] = len(dialogues)
+    report["profile"] = args.profile
+    report["speedup"] = round(report["pytorch"]["total_seconds"] / report["onnx"]["total_seconds"], 2)
+    return report
+
+
+def get_memory_mb():
+    """
+    This method returns the current resident (RSS), proportional (PSS) and unique (USS) set sizes of this process
+    in MB. They come from /proc/self/smaps_rollup and are None where it is not available, since ru_maxrss is a
+    peak and cannot be subtracted to measure a model. The peak is reported separately as peak_rss_mb.
+    """
+    memory = {"rss": None, "pss": None, "uss": None}
+    if os.path.exists("/proc/self/smaps_rollup"):
+        fields = {}
+        with open("/proc/self/smaps_rollup") as file:
+            for line in file:
+                name, _, value = line.partition(":")
+                if value.strip().endswith("kB"):
+                    fields[name] = int(value.split()[0])
+        memory = {
+            "rss": round(fields["Rss"] / 1024, 1),
+            "pss": round(fields["Pss"] / 1024, 1),
+            "uss": round((fields["Private_Clean"] + fields["Private_Dirty"]) / 1024, 1)
+        }
+    return memory
+
+
+def measure_backend(version_dir, backend, dialogues, references, batch_size, profile):
+    """
+    This method loads one backend in a fresh process and reports its memory, latency and ROUGE. Memory is
+    sampled after generation, since memory-mapped weights only become resident as generate first reads them.
+    """
+    prediction_pipeline = PredictionPipeline()
+    tokenizer_path = os.path.join(version_dir, prediction_pipeline.config.tokenizer_prefix)
+
+    memory_before_load = get_memory_mb()
+    loaded_model = prediction_pipeline.model_registry.get(
+        os.path.join(version_dir, prediction_pipeline.get_model_prefix(backend)),
+        tokenizer_path, f"benchmark-{backend}", backend
+    )
+
+    summaries, report = time_summaries(
+        prediction_pipeline, loaded_model, dialogues, batch_size,
+        prediction_pipeline.resolve_generation_kwargs(loaded_model, profile)
+    )
+    memory_after_generation = get_memory_mb()
+    generated_tokens = sum(len(ids) for ids in loaded_model.tokenizer(summaries)["input_ids"])
+    report["tokens_per_second"] = round(generated_tokens / report["total_seconds"], 1)
+    for name, after in memory_after_generation.items():
+        if after is not None:
+            report[f"model_{name}_mb"] = round(after - memory_before_load[name], 1)
+    report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    scores = RougeScorer().compute(summaries, references)
+    report["rouge"] = dict((rn, round(score.fmeasure, 4)) for rn, score in scores.items())
+    report["rouge_average"] = round(sum(report["rouge"].values()) / len(scores), 4)
+    return report
+
+
+def benchmark_quantization(args):
+    """
+    This method compares full precision and int8 backends on the ModelEvaluation test slice. Each backend
+    runs in its own process so that resident memory reflects that backend alone.
+    """
+    data_path = ConfigurationManager().get_model_evaluation_config().data_path
+    test_data = load_from_disk(data_path)["test"][0:args.samples]
+
+    report = {"samples": len(test_data["dialogue"]), "profile": args.profile}
+    for backend in args.backends:
+        prefix = PredictionPipeline().get_model_prefix(backend)
+        if not os.path.exists(os.path.join(args.version_dir, prefix)):
+            logging.warning(f"{args.version_dir} has no {prefix} directory, skipping {backend}")
+            continue
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            report[backend] = executor.submit(
+                measure_backend, args.version_dir, backend, test_data["dialogue"], test_data["summary"],
+                args.batch_size, args.profile
+            ).result()
+    return report
+
+
+def benchmark_rouge(args):
+    """
+    This method times the native ROUGE scorer against datasets.load_metric('rouge') on the test references,
+    scored against a lead baseline that takes the first words of each dialogue
+    """
+    data_path = ConfigurationManager().get_model_evaluation_config().data_path
+    test_data = load_from_disk(data_path)["test"]
+    references = test_data["summary"] * args.repeat
+    predictions = [" ".join(dialogue.split()[:args.lead_words]) for dialogue in test_data["dialogue"]] * args.repeat
+
+    start_time = time.perf_counter()
+    metric = load_metric("rouge")
+    metric.add_batch(predictions=predictions, references=references)
+    load_metric_scores = metric.compute()
+    load_metric_seconds = time.perf_counter() - start_time
+
+    report = {"samples": len(predictions), "load_metric_seconds": round(load_metric_seconds, 3)}
+    for workers in sorted({1, args.workers}):
+        start_time = time.perf_counter()
+        native_scores = RougeScorer().compute(predictions, references, workers=workers)
+        seconds = time.perf_counter() - start_time
+        report[f"native_seconds_{workers}_workers"] = round(seconds, 3)
+        report[f"speedup_{workers}_workers"] = round(load_metric_seconds / seconds, 2)
+
+    # load_metric reports the bootstrap median of the mean, the native scorer the exact mean
+    report["max_fmeasure_difference"] = max(
+        abs(load_metric_scores[rn].mid.fmeasure - score.fmeasure) for rn, score in native_scores.items()
+    )
+    return report
+
+
+parser = argparse.ArgumentParser(description="Benchmark the summarization serving paths")
+parser.add_argument("--profile", choices=sorted(GenerationProfileConstants().PROFILES),
+                    default=GenerationProfileConstants.DEFAULT_PROFILE, help="generation profile to benchmark")
+subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+backends_parser = subparsers.add_parser("backends", help="PyTorch vs ONNX Runtime latency and parity")
+backends_parser.add_argument("version_dir", help="local model version directory with models/, tokenizer/ and onnx/")
+backends_parser.add_argument("--data", help="samsum-style CSV with a dialogue column")
+backends_parser.add_argument("--samples", type=int, default=16)
+backends_parser.add_argument("--batch-size", type=int, default=4)
+backends_parser.set_defaults(run=benchmark_backends)
+
+quantization_parser = subparsers.add_parser("quantization", help="ROUGE, latency and RSS of int8 vs full precision")
+quantization_parser.add_argument("version_dir", help="local model version directory with models/ and tokenizer/")
+quantization_parser.add_argument("--backends", nargs="+", choices=ModelRegistry.BACKENDS,
+                                 default=list(ModelRegistry.BACKENDS))
+quantization_parser.add_argument("--samples", type=int, default=10, help="test dialogues to score")
+quantization_parser.add_argument("--batch-size", type=int, default=4)
+quantization_parser.set_defaults(run=benchmark_quantization)
+
+rouge_parser = subparsers.add_parser("rouge", help="native ROUGE scorer vs datasets.load_metric('rouge')")
+rouge_parser.add_argument("--repeat", type=int, default=1, help="copies of the test set to score")
+rouge_parser.add_argument("--lead-words", type=int, default=30, help="words of each dialogue used as its summary")
+rouge_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+rouge_parser.set_defaults(run=benchmark_rouge)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    logging.info(f"Running {args.benchmark} benchmark")
+    report = args.run(args)
+    logging.info(f"{args.benchmark} benchmark report - {report}")
+    print(json.dumps(report, indent=4))
@@ -0,0 +1,73 @@
+"""
+Gunicorn settings for serving TextSummarizationApp, e.g. gunicorn app:TextSummarizationApp -c gunicorn.conf.py
+
+The app is imported and the model loaded once in the master before the workers are forked, so every worker
+starts with the same weights mapped copy-on-write instead of loading its own copy. Model weights are never
+written after loading, so their pages stay shared and adding a worker costs its Python heap, not a model.
+This applies to the memory-mapped PyTorch backend only; the ONNX and int8 backends are not fork-safe and are
+loaded by every worker after fork.
+"""
+
+import os
+import shutil
+
+
+def get_cpu_count() -> int:
+    """This method returns the CPUs this process may run on, which inside a container can be fewer than the host's"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ.get("GUNICORN_PRELOAD_MODEL", "true").lower() == "true"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 60))
+
+# Each worker runs its own intra-op pool, so the CPUs are split between workers instead of oversubscribed
+torch_threads_per_worker = int(os.environ.get("TORCH_THREADS_PER_WORKER", 0)) or max(1, get_cpu_count() // workers)
+
+prometheus_multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+if prometheus_multiproc_dir:
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def on_starting(server):
+    """
+    This hook drops the metric files of the previous run. It runs once when the master starts, whereas this module
+    is read again on every configuration reload, which must not delete the files of the live workers.
+    """
+    if prometheus_multiproc_dir:
+        for name in os.listdir(prometheus_multiproc_dir):
+            path = os.path.join(prometheus_multiproc_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+
+def when_ready(server):
+    """This hook loads the model in the master once the sockets are bound and before any worker is forked"""
+    if preload_app:
+        from app import preload_model
+        preload_model()
+
+
+def post_fork(server, worker):
+    """This hook gives a new worker its share of the CPUs and its own connections"""
+    if preload_app:
+        from app import prepare_forked_worker
+        prepare_forked_worker(torch_threads_per_worker)
+    else:
+        import torch
+        torch.set_num_threads(torch_threads_per_worker)
+    server.log.info(f"Worker {worker.pid} uses {torch_threads_per_worker} torch threads")
+
+
+def child_exit(server, worker):
+    """This hook drops the live gauges of a worker that exited from the aggregated metrics"""
+    if prometheus_multiproc_dir:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
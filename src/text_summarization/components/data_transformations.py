@@ -1,4 +1,7 @@
+import hashlib
+import json
 import os
+import shutil
 from src.text_summarization.logger import logging
 from transformers import AutoTokenizer
 from datasets import load_dataset, load_from_disk
@@ -8,7 +11,7 @@ from src.text_summarization.entity import DataTransformationConfig
 class DataTransformation:
     def __init__(self, config: DataTransformationConfig):
         self.config = config
-        self.tokenizer = AutoTokenizer.from_pretrained(config.tokenizer_name)
+        self.tokenizer = None
 
 
     def convert_examples_to_features(self, example_batch):
@@ -30,12 +33,41 @@ class DataTransformation:
         }
     
 
-    def load_samsum_dataset(self):
-        data_files = {
+    def get_data_files(self):
+        return {
             "train": os.path.join(self.config.transformed_data_path,"samsum-train.csv"), 
             "validation": os.path.join(self.config.transformed_data_path ,"samsum-validation.csv"), 
             "test": os.path.join(self.config.transformed_data_path ,"samsum-test.csv")
             }
+
+
+    @staticmethod
+    def get_file_hash(file_path):
+        """This method returns the sha256 content hash of a local file"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(8 * 1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+    def get_fingerprint(self):
+        """
+        This method identifies a transformed dataset by the content of the input files and every setting that
+        changes the tokenized output, so that the same inputs map to the same cache entry across runs
+        """
+        payload = json.dumps({
+            "data_files": {split: self.get_file_hash(path) for split, path in self.get_data_files().items()},
+            "tokenizer_name": str(self.config.tokenizer_name),
+            "max_input_length": self.config.max_input_length,
+            "max_target_length": self.config.max_target_length,
+            "prefix": self.config.prefix
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+    def load_samsum_dataset(self):
+        data_files = self.get_data_files()
         logging.info(f"Data files that will be loaded - {data_files}")
 
         dataset = load_dataset("csv", data_files= data_files)
@@ -50,8 +82,7 @@ class DataTransformation:
 
 
     def preprocess_dataset(self, examples):
-        prefix = "Summarize: "
-        inputs = [prefix + doc for doc in examples["dialogue"]]
+        inputs = [self.config.prefix + doc for doc in examples["dialogue"]]
 
         model_inputs = self.tokenizer(inputs, 
                                       max_length= self.config.max_input_length, 
@@ -67,7 +98,10 @@ class DataTransformation:
 
         return model_inputs
 
-    def convert(self):
+    def transform(self, save_dir):
+        """This method tokenizes the samsum CSVs and saves the result to save_dir"""
+        self.tokenizer = AutoTokenizer.from_pretrained(self.config.tokenizer_name)
+
         # dataset_samsum = load_from_disk(self.config.transformed_data_path)
         dataset_samsum = self.load_samsum_dataset()
 
@@ -81,5 +115,46 @@ class DataTransformation:
         logging.info(f"Model Inputs for test datasets \n {dataset_samsum_pt['test'][:2]}")
         logging.info(f"Model Inputs for validation datasets \n {dataset_samsum_pt['validation'][:2]}")
 
-        dataset_samsum_pt.save_to_disk(self.config.root_dir)
+        dataset_samsum_pt.save_to_disk(save_dir)
+
 
+    @staticmethod
+    def link_or_copy(source, destination):
+        """This method hard-links a cached file into the run directory, copying it across file systems"""
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copy2(source, destination)
+
+
+    def convert(self):
+        """
+        Method Name :   convert
+        Description :   This method reuses the transformed dataset cached under the fingerprint of the inputs
+                        and tokenization settings, and only reads and tokenizes the CSVs on a miss. A new cache
+                        entry is written to a temporary directory and renamed so that an interrupted run never
+                        leaves a partial entry behind. The entry is then linked into root_dir for the later stages.
+        Output      :   None
+        """
+        fingerprint = self.get_fingerprint()
+        cache_path = os.path.join(self.config.cache_dir, fingerprint)
+
+        if os.path.exists(os.path.join(cache_path, "dataset_dict.json")):
+            logging.info(f"Reusing transformed dataset {fingerprint} from {cache_path}")
+        else:
+            logging.info(f"No transformed dataset cached for {fingerprint}, tokenizing the samsum dataset")
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            shutil.rmtree(temp_path, ignore_errors=True)
+            self.transform(temp_path)
+            try:
+                os.replace(temp_path, cache_path)
+            except OSError:
+                # Another run cached the same fingerprint first
+                shutil.rmtree(temp_path, ignore_errors=True)
+            logging.info(f"Cached transformed dataset {fingerprint} in {cache_path}")
+
+        # The previous run's links are replaced rather than merged, as save_to_disk would, so that no shard of
+        # another fingerprint is left behind and a file is never linked onto itself
+        shutil.rmtree(self.config.root_dir, ignore_errors=True)
+        shutil.copytree(cache_path, self.config.root_dir, copy_function=self.link_or_copy)
+        logging.info(f"Transformed dataset {fingerprint} available in {self.config.root_dir}")
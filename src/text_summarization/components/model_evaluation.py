@@ -1,17 +1,77 @@
 """This module is used for Evaluating the models after training"""
+import hashlib
 import json
+import math
+import multiprocessing
 import os, sys
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
 from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-from datasets import load_dataset, load_from_disk, load_metric
+from datasets import load_dataset, load_from_disk
 import torch
 import pandas as pd
 from tqdm import tqdm
+from src.text_summarization.components.rouge_scorer import RougeScorer
 from src.text_summarization.entity import ModelEvaluationConfig
 from src.text_summarization.config.aws_storage_operations import S3Operations 
+from src.text_summarization.utils.common_utils import get_generation_kwargs
 from src.text_summarization.logger import logging
 from src.text_summarization.exception import TextSummarizerException
 
 
+def summarize_batches(model_path: str,
+                      tokenizer_path: str,
+                      articles: List[str],
+                      batches: List[List[int]],
+                      gen_kwargs: Dict,
+                      deadline: float = None,
+                      num_threads: int = None,
+                      device: str = "cpu") -> Dict[int, str]:
+    """
+    This function loads a model and summarizes the given batches of article indices, padding each batch only
+    to its longest member. It stops before a batch that would start after deadline, and runs in worker
+    processes with num_threads torch threads so that shards do not oversubscribe the CPU.
+    Returns the summaries keyed by article index.
+    """
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_path).to(device)
+    model.eval()
+
+    predictions = {}
+    for indices in tqdm(batches, disable=num_threads is not None):
+        # Every worker summarizes at least one batch so that a tight budget still yields a score
+        if deadline is not None and predictions and time.time() >= deadline:
+            break
+
+        inputs = tokenizer([articles[index] for index in indices],
+                           max_length=1024,
+                           truncation=True,
+                           padding="longest",
+                           return_tensors="pt"
+                           )
+
+        with torch.inference_mode():
+            summaries = model.generate(
+                input_ids=inputs["input_ids"].to(device),
+                attention_mask=inputs["attention_mask"].to(device),
+                **gen_kwargs
+                )
+
+        decoded_summaries = tokenizer.batch_decode(summaries,
+                                                   skip_special_tokens=True,
+                                                   clean_up_tokenization_spaces=False
+                                                   )
+        predictions.update(zip(indices, decoded_summaries))
+
+    return predictions
+
+
 class ModelEvaluation:
     def __init__(self, config: ModelEvaluationConfig):
         self.config = config
@@ -25,6 +85,51 @@ class ModelEvaluation:
             yield list_of_elements[i : i + batch_size]
 
 
+    def get_production_version(self):
+        """
+        This method resolves the pointer object to the published model version and its S3 prefix. Buckets that
+        still use the flat layout resolve to a signature of the listed objects with an empty prefix.
+        """
+        pointer = self.s3.read_json(self.config.model_bucket_name, self.config.model_pointer_key)
+        if pointer is not None:
+            return pointer["version"], f"{self.config.model_versions_prefix}/{pointer['version']}"
+
+        if not self.s3.is_bucket_empty(self.config.model_bucket_name):
+            signature = self.s3.get_model_signature(
+                self.config.model_bucket_name,
+                [self.config.model_prefix, self.config.tokenizer_prefix]
+            )
+            return f"legacy-{signature}", ""
+
+        return None, None
+
+
+    def get_evaluation_fingerprint(self, test_dataset) -> str:
+        """This method identifies an evaluation setup by the scored rows and the generation arguments"""
+        payload = json.dumps([
+            get_generation_kwargs(self.config.generation_profile),
+            test_dataset['dialogue'],
+            test_dataset['summary']
+        ], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+    def get_evaluation_cache_key(self, production_version, production_prefix, fingerprint) -> str:
+        """This method returns where the production predictions of an evaluation setup are kept in the bucket"""
+        if production_prefix:
+            return f"{production_prefix}/{self.config.evaluation_cache_prefix}/{fingerprint}.json"
+        return f"{self.config.evaluation_cache_prefix}/{production_version}/{fingerprint}.json"
+
+
+    def get_test_dataset(self, dataset_pt):
+        """This method returns the test split to score, limited to EVALUATION_SAMPLES rows when that is set"""
+        test_dataset = dataset_pt['test']
+        if self.config.evaluation_samples:
+            test_dataset = test_dataset.select(range(min(self.config.evaluation_samples, len(test_dataset))))
+        logging.info(f"Scoring {len(test_dataset)} test dialogues")
+        return test_dataset
+
+
     def save_rouge_score(self, trained_model_average_rouge_score, downloaded_model_average_rouge_score = 0)-> bool:
         try:
             logging.info(f"Trained Model Average ROUGE Score - {trained_model_average_rouge_score}")
@@ -48,56 +153,76 @@ class ModelEvaluation:
             logging.exception(error)
             raise TextSummarizerException(error, sys)
     
-    def get_model_scores(self,
-                         dataset, 
-                         metric, 
-                         model, 
-                         tokenizer,
-                         batch_size=16,
-                         device="cuda" if torch.cuda.is_available() else "cpu",
-                         text_column="article",
-                         summary_column="highlights"):
-        
-        article_batches = list(self.generate_chunks(dataset[text_column], batch_size))
-        target_batches = list(self.generate_chunks(dataset[summary_column], batch_size))
+    def get_model_predictions(self,
+                              dataset,
+                              model_path,
+                              tokenizer_path,
+                              text_column="article",
+                              concurrency=1,
+                              gen_kwargs=None) -> Dict[int, str]:
+        """
+        Method Name :   get_model_predictions
+        Description :   This method summarizes every dataset row. Rows are sorted by tokenized length into
+                        batches that are shuffled with a fixed seed, so that a run cut short by
+                        EVALUATION_TIME_BUDGET_SECONDS still covers a random sample. With EVALUATION_WORKERS
+                        above one, or when concurrency models are scored at once, the batches are sharded
+                        across CPU processes, each with its own model copy and an equal share of the torch
+                        threads.
+        Output      :   summaries keyed by dataset row
+        """
+        # Score with the same generation profile that is served, so ROUGE reflects production summaries
+        gen_kwargs = gen_kwargs or get_generation_kwargs(self.config.generation_profile)
+
+        articles = dataset[text_column]
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+        lengths = [len(ids) for ids in tokenizer(articles, max_length=1024, truncation=True)["input_ids"]]
+        order = sorted(range(len(articles)), key=lambda index: lengths[index])
+        batches = list(self.generate_chunks(order, self.config.evaluation_batch_size))
+        random.Random(0).shuffle(batches)
+
+        budget = self.config.evaluation_time_budget_seconds
+        start_time = time.time()
+        deadline = start_time + budget if budget else None
+        workers = min(self.config.evaluation_workers, len(batches)) or 1
+
+        if workers == 1 and concurrency == 1:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            predictions = summarize_batches(model_path, tokenizer_path, articles, batches, gen_kwargs,
+                                            deadline=deadline, device=device)
+        else:
+            num_threads = max(1, (os.cpu_count() or 1) // (workers * concurrency))
+            logging.info(f"Sharding {len(batches)} batches across {workers} processes "
+                         f"with {num_threads} threads each")
+            predictions = {}
+            mp_context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+                shards = [
+                    executor.submit(summarize_batches, model_path, tokenizer_path, articles,
+                                    batches[shard::workers], gen_kwargs, deadline, num_threads)
+                    for shard in range(workers)
+                ]
+                for shard in shards:
+                    predictions.update(shard.result())
+
+        elapsed = time.time() - start_time
+        logging.info(f"Summarized {len(predictions)} of {len(articles)} test dialogues with {model_path} in "
+                     f"{elapsed:.1f}s ({len(predictions) / elapsed:.2f} dialogues/s, {workers} workers)")
+        if len(predictions) < len(articles):
+            logging.warning(f"Evaluation time budget of {budget}s ran out, scoring {len(predictions)} dialogues")
+
+        return predictions
+
+
+    def get_model_scores(self, dataset, metric, predictions, indices, summary_column="highlights"):
+        """This method merges the summaries of every shard and scores the rows in indices against the references"""
+        references = dataset[summary_column]
 
-        for article_batch, target_batch in tqdm(
-            zip(article_batches, target_batches), total=len(article_batches)):
-            
-            inputs = tokenizer(article_batch,
-                               max_length=1024,
-                               truncation=True,
-                               padding="max_length",
-                               return_tensors="pt"
-                               )
-            
-            summaries = model.generate(
-                input_ids=inputs["input_ids"].to(device),
-                attention_mask=inputs["attention_mask"].to(device),
-                length_penalty=0.8, 
-                num_beams=8, 
-                max_length=128
-                )
-            
-            ''' parameter for length penalty ensures that the model does not generate sequences that are too long. '''
-            
-            # Finally, we decode the generated texts, 
-            decoded_summaries = [
-                tokenizer.decode(summary,
-                                 skip_special_tokens=True,
-                                 clean_up_tokenization_spaces=False
-                                 )
-                for summary in summaries]
-            
-            # decoded_summaries = [d.replace("", " ") for d in decoded_summaries]
-                        
-            metric.add_batch(
-                predictions = decoded_summaries,
-                references = target_batch
-                )
-            
         #  Finally compute and return the ROUGE scores.
-        score = metric.compute()
+        score = metric.compute(
+            predictions = [predictions[index] for index in indices],
+            references = [references[index] for index in indices],
+            workers = self.config.evaluation_workers
+            )
         return score
     
 
@@ -106,72 +231,139 @@ class ModelEvaluation:
         
         logging.info(f"loading test data for model evaluation")
         dataset_pt = load_from_disk(self.config.data_path)
+        test_dataset = self.get_test_dataset(dataset_pt)
 
+        logging.info(f"Scoring with generation profile {self.config.generation_profile}")
         logging.info("Setting ROUGE metrics for scoring")
         rouge_names = ["rouge1", "rouge2", "rougeL", "rougeLsum"]
-        rouge_metric = load_metric('rouge')
+        rouge_metric = RougeScorer(rouge_names)
 
-        logging.info("Fetching the Trained Model")  
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        trained_tokenizer = AutoTokenizer.from_pretrained(self.config.trained_tokenizer_path)
-        trained_model = AutoModelForSeq2SeqLM.from_pretrained(self.config.trained_model_path).to(device)
+        production_version, production_prefix = self.get_production_version()
 
-        logging.info("Calculating Metric Score for Trained Model")       
-        trained_model_scores = self.get_model_scores(
-            dataset_pt['test'][0:10], 
-            rouge_metric,
-            trained_model,
-            trained_tokenizer,
-            batch_size = 2,
-            text_column = 'dialogue',
-            summary_column= 'summary'
-        )
+        if production_version is None:
+            
+            logging.info("Summarizing the test set with the Trained Model")       
+            trained_predictions = self.get_model_predictions(
+                test_dataset,
+                self.config.trained_model_path,
+                self.config.trained_tokenizer_path,
+                text_column = 'dialogue'
+            )
 
-        trained_rouge_dict = dict((rn, trained_model_scores[rn].mid.fmeasure) for rn in rouge_names)
+            logging.info("Calculating Metric Score for Trained Model")       
+            trained_model_scores = self.get_model_scores(
+                test_dataset,
+                rouge_metric,
+                trained_predictions,
+                sorted(trained_predictions),
+                summary_column= 'summary'
+            )
 
-        logging.info(f"trained_rouge_dict - {trained_rouge_dict}")
+            trained_rouge_dict = dict((rn, trained_model_scores[rn].fmeasure) for rn in rouge_names)
 
-        trained_model_avg_scores = sum(trained_rouge_dict.values())/ len(trained_rouge_dict.values())
+            logging.info(f"trained_rouge_dict - {trained_rouge_dict}")
+
+            trained_model_avg_scores = sum(trained_rouge_dict.values())/ len(trained_rouge_dict.values())
 
-        if self.s3.is_bucket_empty(self.config.model_bucket_name):
-            
             self.save_rouge_score(trained_model_avg_scores)
             logging.info(f"{self.config.model_bucket_name} is empty. No Model is saved in S3 Bucket so far.")
-            df = pd.DataFrame([trained_model_scores ], index = ['TrainedModelScores'])
+            df = pd.DataFrame([trained_rouge_dict], index = ['TrainedModelScores'])
             df.to_csv(self.config.metric_file_name, index=False)
 
         else:
-            logging.info("Dowloading latest Models from S3 Bucket")
-            self.s3.get_latest_model_from_s3(
-                self.config.model_bucket_name,
-                self.config.model_prefix,
-                self.config.root_dir
+            # Production summaries only change with the production model or the evaluation setup, so they are
+            # kept next to the model in the bucket and reused by later training runs
+            cache_key = self.get_evaluation_cache_key(
+                production_version,
+                production_prefix,
+                self.get_evaluation_fingerprint(test_dataset)
             )
+            cached_evaluation = self.s3.read_json(self.config.model_bucket_name, cache_key)
 
-            logging.info("Dowloading latest Tokenizer from S3 Bucket")
-            self.s3.get_latest_model_from_s3(
-                self.config.model_bucket_name,
-                self.config.tokenizer_prefix,
-                self.config.root_dir
+            if cached_evaluation is not None:
+                logging.info(f"Reusing production model version {production_version} predictions from {cache_key}")
+                downloaded_predictions = {
+                    int(index): summary for index, summary in cached_evaluation["predictions"].items()
+                }
+
+                logging.info("Summarizing the test set with the Trained Model")       
+                trained_predictions = self.get_model_predictions(
+                    test_dataset,
+                    self.config.trained_model_path,
+                    self.config.trained_tokenizer_path,
+                    text_column = 'dialogue'
+                )
+
+            else:
+                logging.info(f"Dowloading production model version {production_version} from S3 Bucket")
+                self.s3.download_model_version(
+                    self.config.model_bucket_name,
+                    production_prefix,
+                    [self.config.model_prefix, self.config.tokenizer_prefix],
+                    self.config.root_dir
+                )
+
+                # Both models are summarized at the same time on CPU, each with half of the cores
+                concurrency = 1 if torch.cuda.is_available() else 2
+                logging.info("Summarizing the test set with the Trained and Downloaded Models")       
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    trained_future = executor.submit(
+                        self.get_model_predictions,
+                        test_dataset,
+                        self.config.trained_model_path,
+                        self.config.trained_tokenizer_path,
+                        text_column = 'dialogue',
+                        concurrency = concurrency
+                    )
+                    downloaded_future = executor.submit(
+                        self.get_model_predictions,
+                        test_dataset,
+                        self.config.downloaded_model_path,
+                        self.config.downloaded_tokenizer_path,
+                        text_column = 'dialogue',
+                        concurrency = concurrency
+                    )
+                    trained_predictions = trained_future.result()
+                    downloaded_predictions = downloaded_future.result()
+
+                self.s3.write_json(self.config.model_bucket_name, cache_key, {
+                    "version": production_version,
+                    "generation_profile": self.config.generation_profile,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "predictions": downloaded_predictions
+                })
+                logging.info(f"Cached production model version {production_version} predictions at {cache_key}")
+
+            # With a time budget either model may cover only part of the test set, so both are scored on the
+            # rows they have in common
+            scored_indices = sorted(set(trained_predictions) & set(downloaded_predictions))
+            logging.info(f"Comparing both models on {len(scored_indices)} test dialogues")
+
+            logging.info("Calculating Metric Score for Trained Model")       
+            trained_model_scores = self.get_model_scores(
+                test_dataset,
+                rouge_metric,
+                trained_predictions,
+                scored_indices,
+                summary_column= 'summary'
             )
 
-            logging.info("Fetching the Downloaded Model")  
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            downloaded_tokenizer = AutoTokenizer.from_pretrained(self.config.downloaded_tokenizer_path)
-            downloaded_model = AutoModelForSeq2SeqLM.from_pretrained(self.config.downloaded_model_path).to(device)  
+            trained_rouge_dict = dict((rn, trained_model_scores[rn].fmeasure) for rn in rouge_names)
+
+            logging.info(f"trained_rouge_dict - {trained_rouge_dict}")
+
+            trained_model_avg_scores = sum(trained_rouge_dict.values())/ len(trained_rouge_dict.values())
 
             logging.info("Calculating Metric Score for Downloaded Model")       
             downloaded_model_score = self.get_model_scores(
-                dataset_pt['test'][0:10], 
+                test_dataset,
                 rouge_metric,
-                downloaded_model,
-                downloaded_tokenizer,
-                batch_size = 2,
-                text_column = 'dialogue',
+                downloaded_predictions,
+                scored_indices,
                 summary_column= 'summary'
             )
 
-            downloaded_rouge_dict = dict((rn, downloaded_model_score[rn].mid.fmeasure ) for rn in rouge_names)
+            downloaded_rouge_dict = dict((rn, downloaded_model_score[rn].fmeasure ) for rn in rouge_names)
 
             logging.info(f"downloaded_rouge_dict - {downloaded_rouge_dict}")
 
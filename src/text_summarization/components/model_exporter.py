@@ -0,0 +1,134 @@
+"""This module is used for exporting the trained model to ONNX for ONNX Runtime serving"""
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Any, Dict
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from datasets import load_from_disk
+import torch
+from src.text_summarization.entity import ModelExportConfig
+from src.text_summarization.logger import logging
+from src.text_summarization.exception import TextSummarizerException
+from src.text_summarization.utils.common_utils import get_generation_kwargs
+
+
+class ModelExporter:
+    """This class exports the trained model to encoder/decoder ONNX graphs and checks them against PyTorch"""
+    def __init__(self, config: ModelExportConfig):
+        self.config = config
+
+
+    def is_model_accepted(self) -> bool:
+        """This method reads whether model evaluation accepted the trained model, which is the only one pushed"""
+        if not os.path.exists(self.config.model_status_file):
+            logging.warning(f"No model evaluation status in {self.config.model_status_file}")
+            return False
+        with open(self.config.model_status_file, "r") as file:
+            return json.load(file)["trained_model_accepted"]
+
+
+    def export(self):
+        """
+        This method exports the trained model with optimum. With use_cache=True the export produces an encoder
+        graph, a decoder graph and a decoder-with-past graph that reuses the key/value cache between steps.
+        """
+        try:
+            logging.info("Inside ModelExporter.export")
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+            logging.info(f"Exporting {self.config.trained_model_path} to ONNX")
+            ort_model = ORTModelForSeq2SeqLM.from_pretrained(
+                self.config.trained_model_path,
+                export=True,
+                use_cache=True
+            )
+            ort_model.save_pretrained(self.config.onnx_model_path)
+            logging.info(f"Saved ONNX model - {self.config.onnx_model_path}")
+
+            return ort_model
+
+        except Exception as error:
+            logging.exception(error)
+            raise TextSummarizerException(error, sys) from error
+
+
+    def quantize(self):
+        """
+        This method applies dynamic int8 quantization to every graph of the ONNX export. Weights of the
+        MatMul/Gemm nodes are stored as int8 and activations are quantized on the fly, so no calibration
+        data is needed. The instruction set the kernels target is set by ONNX_QUANTIZATION_ISA.
+        """
+        try:
+            logging.info("Inside ModelExporter.quantize")
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+            quantization_config = getattr(AutoQuantizationConfig, self.config.quantization_isa)(
+                is_static=False,
+                per_channel=False
+            )
+            shutil.rmtree(self.config.onnx_int8_model_path, ignore_errors=True)
+            shutil.copytree(self.config.onnx_model_path, self.config.onnx_int8_model_path,
+                            ignore=shutil.ignore_patterns("*.onnx", "*.onnx_data"))
+
+            for file_name in sorted(os.listdir(self.config.onnx_model_path)):
+                if not file_name.endswith(".onnx"):
+                    continue
+                logging.info(f"Quantizing {file_name} for {self.config.quantization_isa}")
+                quantizer = ORTQuantizer.from_pretrained(self.config.onnx_model_path, file_name=file_name)
+                quantizer.quantize(
+                    save_dir=self.config.onnx_int8_model_path,
+                    quantization_config=quantization_config,
+                    file_suffix=""
+                )
+
+            logging.info(f"Saved int8 ONNX model - {self.config.onnx_int8_model_path}")
+            return ORTModelForSeq2SeqLM.from_pretrained(self.config.onnx_int8_model_path, use_cache=True)
+
+        except Exception as error:
+            logging.exception(error)
+            raise TextSummarizerException(error, sys) from error
+
+
+    def check_parity(self, ort_models: Dict[str, Any]):
+        """
+        This method summarizes a few test dialogues with PyTorch and each exported model and records how
+        many summaries agree with PyTorch together with the latency of each
+        """
+        logging.info("Inside ModelExporter.check_parity")
+
+        tokenizer = AutoTokenizer.from_pretrained(self.config.trained_tokenizer_path)
+        torch_model = AutoModelForSeq2SeqLM.from_pretrained(self.config.trained_model_path).eval()
+        dialogues = load_from_disk(self.config.data_path)["test"]["dialogue"][:self.config.parity_samples]
+
+        gen_kwargs = get_generation_kwargs()
+        outputs, seconds = {}, {}
+        for name, model in [("pytorch", torch_model), *ort_models.items()]:
+            start_time = time.perf_counter()
+            summaries = []
+            for dialogue in dialogues:
+                inputs = tokenizer(dialogue, max_length=1024, truncation=True, return_tensors="pt")
+                with torch.inference_mode():
+                    output = model.generate(**inputs, **gen_kwargs)
+                summaries.append(tokenizer.decode(output[0], skip_special_tokens=True))
+            seconds[name] = time.perf_counter() - start_time
+            outputs[name] = summaries
+
+        report = {"samples": len(dialogues), "pytorch_seconds": round(seconds["pytorch"], 3)}
+        for name in ort_models:
+            matches = sum(a == b for a, b in zip(outputs["pytorch"], outputs[name]))
+            report[name] = {
+                "exact_matches": matches,
+                "seconds": round(seconds[name], 3),
+                "speedup": round(seconds["pytorch"] / seconds[name], 2) if seconds[name] else None
+            }
+            if matches != len(dialogues):
+                logging.warning(f"{name} summaries differ from PyTorch summaries on the parity samples")
+        logging.info(f"ONNX parity report - {report}")
+
+        with open(self.config.parity_report_file, "w") as f:
+            json.dump(report, f, indent=4)
+
+        return report
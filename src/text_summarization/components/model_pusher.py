@@ -1,7 +1,12 @@
 """This module is used for Pushing the best models to S3 Bucket after training"""
 import pandas as pd
 import sys, os
+import glob
 import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from transformers import AutoModelForSeq2SeqLM
 from src.text_summarization.entity import ModelPusherConfig
 from src.text_summarization.config.aws_storage_operations import S3Operations 
 from src.text_summarization.logger import logging
@@ -14,21 +19,147 @@ class ModelPusher:
         self.s3 = S3Operations()
 
 
-    def upload_model_files(self, directory_name, s3_prefix):
-        """This method is used to upload model files to S3"""
+    @staticmethod
+    def get_file_hash(file_path):
+        """This method returns the sha256 content hash of a local file"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(8 * 1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
 
-        for file in os.listdir(directory_name):
-            file_path = os.path.join(directory_name, file)
-            file_name = s3_prefix +"/"+ file
-            logging.info(f"File Path - {file_path}")
-            logging.info(f"File Name - {file_name}")
-            self.s3.upload_file(
-                local_file_path = file_path,
-                file_name = file_name,
-                bucket_name = self.config.model_bucket_name
+
+    def hash_model_files(self, directory_name, s3_prefix):
+        """This method returns the size and content hash of every file in directory_name keyed by its relative key"""
+        paths = {
+            s3_prefix + "/" + file: os.path.join(directory_name, file)
+            for file in os.listdir(directory_name)
+            if os.path.isfile(os.path.join(directory_name, file))
+        }
+        with ThreadPoolExecutor(max_workers=self.s3.transfer_const.UPLOAD_WORKERS) as executor:
+            hashes = dict(zip(paths, executor.map(self.get_file_hash, paths.values())))
+
+        return {
+            relative_key: {"sha256": hashes[relative_key], "size": os.path.getsize(path), "path": path}
+            for relative_key, path in paths.items()
+        }
+
+
+    def convert_to_safetensors(self, model_path):
+        """
+        This method re-saves a model directory that only has pickled PyTorch weights in safetensors format, so
+        that every published version can be memory-mapped by the serving pods
+        """
+        pickled_weights = glob.glob(os.path.join(model_path, "pytorch_model*.bin"))
+        if not pickled_weights or glob.glob(os.path.join(model_path, "*.safetensors")):
+            return
+
+        logging.info(f"Converting the weights in {model_path} to safetensors")
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_path)
+        model.save_pretrained(model_path, safe_serialization=True)
+        for weights_file in pickled_weights + glob.glob(os.path.join(model_path, "pytorch_model.bin.index.json")):
+            os.remove(weights_file)
+
+
+    def get_current_version(self):
+        """This method resolves the pointer object to the currently published version and its manifest"""
+        pointer = self.s3.read_json(self.config.model_bucket_name, self.config.model_pointer_key)
+        if pointer is None:
+            return None, {}
+
+        manifest = self.s3.read_json(
+            self.config.model_bucket_name,
+            f"{self.config.model_versions_prefix}/{pointer['version']}/{self.config.model_manifest_file}"
+        )
+        return pointer["version"], manifest or {}
+
+
+    def _push_file(self, version, relative_key, entry, previous_version, previous_files):
+        """This method uploads one file, or copies it server-side when the previous version has identical content"""
+        file_name = f"{self.config.model_versions_prefix}/{version}/{relative_key}"
+
+        if previous_files.get(relative_key, {}).get("sha256") == entry["sha256"]:
+            logging.info(f"Copying unchanged {relative_key} from version {previous_version}")
+            self.s3.copy_object(
+                bucket_name = self.config.model_bucket_name,
+                source_key = f"{self.config.model_versions_prefix}/{previous_version}/{relative_key}",
+                destination_key = file_name
             )
+            return False
+
+        logging.info(f"File Path - {entry['path']}")
+        logging.info(f"File Name - {file_name}")
+        self.s3.upload_file(
+            local_file_path = entry["path"],
+            file_name = file_name,
+            bucket_name = self.config.model_bucket_name,
+            metadata = {"sha256": entry["sha256"]}
+        )
+        return True
+
+
+    def upload_model_files(self, files, version, previous_version=None, previous_files=None):
+        """This method pushes the files of a new version to its immutable prefix in parallel"""
+        previous_files = previous_files or {}
+        with ThreadPoolExecutor(max_workers=self.s3.transfer_const.UPLOAD_WORKERS) as executor:
+            uploaded = list(executor.map(
+                lambda relative_key: self._push_file(version, relative_key, files[relative_key],
+                                                     previous_version, previous_files),
+                files
+            ))
+
+        logging.info(f"Uploaded {sum(uploaded)} and copied {len(files) - sum(uploaded)} files for version {version}")
+
+
+    def push_model_version(self):
+        """
+        This method publishes the trained model as a new immutable version. Files go to
+        versions/<version>/, then the version manifest is written, and the pointer object is flipped last,
+        so readers resolving the pointer only ever see complete versions.
+        Returns the published version, or the current one when the content is unchanged.
+        """
+        self.convert_to_safetensors(self.config.trained_model_path)
+        files = self.hash_model_files(self.config.trained_model_path, self.config.model_prefix)
+        files.update(self.hash_model_files(self.config.trained_tokenizer_path, self.config.tokenizer_prefix))
+        if os.path.exists(self.config.onnx_model_path):
+            files.update(self.hash_model_files(self.config.onnx_model_path, self.config.onnx_prefix))
+        if os.path.exists(self.config.onnx_int8_model_path):
+            files.update(self.hash_model_files(self.config.onnx_int8_model_path, self.config.onnx_int8_prefix))
+
+        content_hash = hashlib.sha256(
+            "".join(f"{key}:{files[key]['sha256']};" for key in sorted(files)).encode()
+        ).hexdigest()
+
+        previous_version, previous_manifest = self.get_current_version()
+        if previous_manifest.get("content_hash") == content_hash:
+            logging.info(f"Trained model is identical to published version {previous_version}, nothing to push")
+            return previous_version
+
+        version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{content_hash[:8]}"
+        logging.info(f"Publishing model version {version}")
+        self.upload_model_files(files, version, previous_version, previous_manifest.get("files"))
+
+        manifest = {
+            "version": version,
+            "content_hash": content_hash,
+            "pushed_at": datetime.now(timezone.utc).isoformat(),
+            "files": {key: {"sha256": entry["sha256"], "size": entry["size"]} for key, entry in files.items()}
+        }
+        self.s3.write_json(
+            self.config.model_bucket_name,
+            f"{self.config.model_versions_prefix}/{version}/{self.config.model_manifest_file}",
+            manifest
+        )
+
+        self.s3.write_json(
+            self.config.model_bucket_name,
+            self.config.model_pointer_key,
+            {"version": version, "previous_version": previous_version, "pushed_at": manifest["pushed_at"]}
+        )
+        logging.info(f"Pointer {self.config.model_pointer_key} now references version {version}")
+
+        return version
 
-        return 
 
     def initiate_model_pusher(self):
         """This method is used to push the models to S3 bucket"""
@@ -42,13 +173,9 @@ class ModelPusher:
             logging.info(f"trained_model_accepted is set to {data}")
 
             if data['trained_model_accepted']:
-                logging.info("Uploading models to s3 bucket")
-                self.upload_model_files(self.config.trained_model_path, self.config.model_prefix)
-                logging.info("Uploaded models to s3 bucket")
-                
-                logging.info("Uploading tokenizer to s3 bucket")
-                self.upload_model_files(self.config.trained_tokenizer_path, self.config.tokenizer_prefix) 
-                logging.info("Uploaded tokenizer to s3 bucket")
+                logging.info("Uploading models and tokenizer to s3 bucket")
+                self.push_model_version()
+                logging.info("Uploaded models and tokenizer to s3 bucket")
             else:
                 logging.info("Trained Model is not accpted as the best model")
                 logging.info("Trained model will not be pushed to S3 Bucket")
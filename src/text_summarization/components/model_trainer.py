@@ -75,7 +75,7 @@ class ModelTraining:
         logging.info(f"Model Training completed.")
 
         logging.info(f"Saving Trained Model - {self.config.model_path}")
-        model.save_pretrained(self.config.model_path)
+        model.save_pretrained(self.config.model_path, safe_serialization=True)
 
         logging.info(f"Saving tokenizer - {self.config.tokenizer_path}")
         tokenizer.save_pretrained(self.config.tokenizer_path)
@@ -0,0 +1,238 @@
+"""This module scores summaries with ROUGE-N, ROUGE-L and ROUGE-Lsum without going through datasets.load_metric"""
+import multiprocessing
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+
+NON_ALPHANUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class RougeScore:
+    """This class holds the precision, recall and F-measure of one ROUGE type"""
+    precision: float
+    recall: float
+    fmeasure: float
+
+
+def fmeasure(precision: float, recall: float) -> float:
+    return 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+
+
+def tokenize(text: str, stemmer=None) -> List[str]:
+    """This function lowercases text and keeps runs of ASCII letters and digits, like rouge_score does"""
+    tokens = NON_ALPHANUM_RE.sub(" ", text.lower()).split()
+    if stemmer is not None:
+        tokens = [stemmer.stem(token) if len(token) > 3 else token for token in tokens]
+    return tokens
+
+
+def ngram_overlap(reference: Sequence[str], prediction: Sequence[str], n: int) -> RougeScore:
+    """This function scores clipped n-gram matches between two token sequences"""
+    reference_ngrams = Counter(zip(*(reference[i:] for i in range(n))))
+    prediction_ngrams = Counter(zip(*(prediction[i:] for i in range(n))))
+    overlap = sum((reference_ngrams & prediction_ngrams).values())
+
+    precision = overlap / max(sum(prediction_ngrams.values()), 1)
+    recall = overlap / max(sum(reference_ngrams.values()), 1)
+    return RougeScore(precision, recall, fmeasure(precision, recall))
+
+
+def lcs_length(reference: Sequence[str], prediction: Sequence[str]) -> int:
+    """
+    This function returns the length of the longest common subsequence with the bit-parallel algorithm of
+    Hyyrö, which processes one prediction token per step over all reference positions at once
+    """
+    positions = {}
+    for index, token in enumerate(reference):
+        positions[token] = positions.get(token, 0) | (1 << index)
+
+    mask = (1 << len(reference)) - 1
+    row = mask
+    for token in prediction:
+        matches = row & positions.get(token, 0)
+        row = ((row + matches) | (row - matches)) & mask
+
+    return len(reference) - bin(row).count("1")
+
+
+def lcs_indices(reference: Sequence[str], prediction: Sequence[str]) -> List[int]:
+    """This function returns the reference positions of one longest common subsequence, read out of the DP table"""
+    table = [[0] * (len(prediction) + 1)]
+    for reference_token in reference:
+        previous, current = table[-1], [0]
+        for j, prediction_token in enumerate(prediction, start=1):
+            if reference_token == prediction_token:
+                current.append(previous[j - 1] + 1)
+            else:
+                current.append(max(previous[j], current[j - 1]))
+        table.append(current)
+
+    i, j, indices = len(reference), len(prediction), []
+    while i > 0 and j > 0:
+        if reference[i - 1] == prediction[j - 1]:
+            indices.append(i - 1)
+            i -= 1
+            j -= 1
+        elif table[i][j - 1] > table[i - 1][j]:
+            j -= 1
+        else:
+            i -= 1
+    return indices[::-1]
+
+
+def summary_level_lcs(reference_sentences: List[List[str]], prediction_sentences: List[List[str]]) -> RougeScore:
+    """This function scores the union LCS of every reference sentence against all prediction sentences"""
+    reference_length = sum(map(len, reference_sentences))
+    prediction_length = sum(map(len, prediction_sentences))
+    if not reference_length or not prediction_length:
+        return RougeScore(0.0, 0.0, 0.0)
+
+    # With one sentence on each side the union LCS is the LCS itself, which the bit-parallel form finds faster
+    if len(reference_sentences) == 1 and len(prediction_sentences) == 1:
+        hits = lcs_length(reference_sentences[0], prediction_sentences[0])
+        precision, recall = hits / prediction_length, hits / reference_length
+        return RougeScore(precision, recall, fmeasure(precision, recall))
+
+    reference_counts = Counter(token for sentence in reference_sentences for token in sentence)
+    prediction_counts = Counter(token for sentence in prediction_sentences for token in sentence)
+
+    hits = 0
+    for sentence in reference_sentences:
+        union = sorted(set().union(*(lcs_indices(sentence, prediction) for prediction in prediction_sentences)))
+        # Tokens are only counted as often as they occur in both texts, as in ROUGE 1.5.5
+        for token in (sentence[index] for index in union):
+            if reference_counts[token] > 0 and prediction_counts[token] > 0:
+                hits += 1
+                reference_counts[token] -= 1
+                prediction_counts[token] -= 1
+
+    precision = hits / prediction_length
+    recall = hits / reference_length
+    return RougeScore(precision, recall, fmeasure(precision, recall))
+
+
+class RougeAccumulator:
+    """This class sums per-example scores so that partial results from batches or processes can be merged"""
+
+    def __init__(self, rouge_types: Sequence[str]):
+        self.rouge_types = list(rouge_types)
+        self.count = 0
+        self.totals = {rouge_type: [0.0, 0.0, 0.0] for rouge_type in self.rouge_types}
+
+
+    def add(self, scores: Dict[str, RougeScore]) -> None:
+        self.count += 1
+        for rouge_type, score in scores.items():
+            totals = self.totals[rouge_type]
+            totals[0] += score.precision
+            totals[1] += score.recall
+            totals[2] += score.fmeasure
+
+
+    def merge(self, other: "RougeAccumulator") -> "RougeAccumulator":
+        self.count += other.count
+        for rouge_type, totals in other.totals.items():
+            self.totals[rouge_type] = [a + b for a, b in zip(self.totals[rouge_type], totals)]
+        return self
+
+
+    def compute(self) -> Dict[str, RougeScore]:
+        """This method returns the mean precision, recall and F-measure of every ROUGE type"""
+        count = max(self.count, 1)
+        return {rouge_type: RougeScore(*(total / count for total in totals))
+                for rouge_type, totals in self.totals.items()}
+
+
+class RougeScorer:
+    """
+    This class computes ROUGE-1/2/L/Lsum like rouge_score, which backs datasets.load_metric('rouge'), but
+    tokenizes every text once, counts n-grams with Counter intersections, computes ROUGE-L with a
+    bit-parallel LCS and averages instead of bootstrapping. Large prediction sets are scored in worker
+    processes whose accumulators are merged.
+    """
+
+    ROUGE_TYPES = ("rouge1", "rouge2", "rougeL", "rougeLsum")
+    MIN_EXAMPLES_PER_WORKER = 5000
+
+    def __init__(self, rouge_types: Sequence[str] = ROUGE_TYPES, use_stemmer: bool = False):
+        for rouge_type in rouge_types:
+            if not re.fullmatch(r"rouge[1-9]|rougeL|rougeLsum", rouge_type):
+                raise ValueError(f"Invalid rouge type: {rouge_type}")
+        self.rouge_types = list(rouge_types)
+        self.use_stemmer = use_stemmer
+        self._stemmer = None
+        if use_stemmer:
+            from nltk.stem import porter
+            self._stemmer = porter.PorterStemmer()
+
+
+    def _tokenize_sentences(self, text: str) -> List[List[str]]:
+        return [tokenize(sentence, self._stemmer) for sentence in text.split("\n") if sentence]
+
+
+    def score(self, reference: str, prediction: str) -> Dict[str, RougeScore]:
+        """
+        Method Name :   score
+        Description :   This method scores one prediction against its reference. Sentences for ROUGE-Lsum are
+                        separated by newlines, and the token lists of all types are built from one pass.
+        Output      :   scores keyed by ROUGE type
+        """
+        reference_sentences = self._tokenize_sentences(reference)
+        prediction_sentences = self._tokenize_sentences(prediction)
+        reference_tokens = [token for sentence in reference_sentences for token in sentence]
+        prediction_tokens = [token for sentence in prediction_sentences for token in sentence]
+
+        scores = {}
+        for rouge_type in self.rouge_types:
+            if rouge_type == "rougeL":
+                if not reference_tokens or not prediction_tokens:
+                    scores[rouge_type] = RougeScore(0.0, 0.0, 0.0)
+                    continue
+                length = lcs_length(reference_tokens, prediction_tokens)
+                precision, recall = length / len(prediction_tokens), length / len(reference_tokens)
+                scores[rouge_type] = RougeScore(precision, recall, fmeasure(precision, recall))
+            elif rouge_type == "rougeLsum":
+                scores[rouge_type] = summary_level_lcs(reference_sentences, prediction_sentences)
+            else:
+                scores[rouge_type] = ngram_overlap(reference_tokens, prediction_tokens, int(rouge_type[5:]))
+        return scores
+
+
+    def accumulate(self, predictions: Sequence[str], references: Sequence[str]) -> RougeAccumulator:
+        """This method scores pairs of predictions and references into a mergeable accumulator"""
+        accumulator = RougeAccumulator(self.rouge_types)
+        for prediction, reference in zip(predictions, references):
+            accumulator.add(self.score(reference, prediction))
+        return accumulator
+
+
+    def compute(self,
+                predictions: Sequence[str],
+                references: Sequence[str],
+                workers: int = 1) -> Dict[str, RougeScore]:
+        """
+        Method Name :   compute
+        Description :   This method scores a prediction set, splitting it across up to workers processes
+                        when it is large enough for that to outweigh starting them
+        Output      :   mean scores keyed by ROUGE type
+        """
+        if len(predictions) != len(references):
+            raise ValueError(f"Got {len(predictions)} predictions for {len(references)} references")
+
+        workers = max(1, min(workers, len(predictions) // self.MIN_EXAMPLES_PER_WORKER))
+        if workers == 1:
+            return self.accumulate(predictions, references).compute()
+
+        shards: List[Tuple[Sequence[str], Sequence[str]]] = [
+            (predictions[shard::workers], references[shard::workers]) for shard in range(workers)
+        ]
+        accumulator = RougeAccumulator(self.rouge_types)
+        mp_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+            for shard_accumulator in executor.map(self.accumulate, *zip(*shards)):
+                accumulator.merge(shard_accumulator)
+        return accumulator.compute()
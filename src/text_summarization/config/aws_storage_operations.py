@@ -2,13 +2,20 @@
 
 import os
 import sys
-from typing import List, Union
+import json
+import time
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Union
 import pickle
 from pandas import DataFrame, read_csv
 import boto3
+from boto3.s3.transfer import TransferConfig
 from datetime import datetime, timedelta
 from botocore.exceptions import ClientError
 from mypy_boto3_s3.service_resource import Bucket
+from src.text_summarization.constants import S3TransferConstants
 from src.text_summarization.logger import logging
 from src.text_summarization.exception import TextSummarizerException
 
@@ -19,6 +26,12 @@ class S3Operations:
     def __init__(self):
         self.s3_client = boto3.client("s3")
         self.s3_resource = boto3.resource("s3")
+        self.transfer_const = S3TransferConstants()
+        self.transfer_config = TransferConfig(
+            multipart_threshold = self.transfer_const.MULTIPART_THRESHOLD,
+            multipart_chunksize = self.transfer_const.MULTIPART_CHUNKSIZE,
+            max_concurrency = self.transfer_const.MAX_CONCURRENCY_PER_FILE
+        )
 
 
     def download_object(self, file_name, bucket_name, file_path):
@@ -127,7 +140,7 @@ class S3Operations:
 
 
     def upload_file(self, local_file_path: str, file_name: str, bucket_name: str,
-                    remove: bool = False) -> None:
+                    remove: bool = False, metadata: Dict[str, str] = None) -> None:
         """
         Method Name :   upload_file
         Description :   This method uploads the from_filename file to bucket_name bucket with
@@ -140,7 +153,13 @@ class S3Operations:
                 f"Uploading {local_file_path} file to {file_name} file in {bucket_name} bucket"
             )
 
-            self.s3_resource.Bucket(bucket_name).upload_file(local_file_path, file_name)
+            self.s3_client.upload_file(
+                local_file_path,
+                bucket_name,
+                file_name,
+                ExtraArgs = {"Metadata": metadata} if metadata else None,
+                Config = self.transfer_config
+            )
 
             logging.info(
                 f"Uploaded {local_file_path} file to {file_name} file in {bucket_name} bucket"
@@ -158,6 +177,62 @@ class S3Operations:
             raise TextSummarizerException(error, sys) from error
 
 
+    def read_json(self, bucket_name: str, key: str) -> Union[Dict, None]:
+        """
+        Method Name :   read_json
+        Description :   This method reads a small JSON object from the bucket
+        Output      :   parsed JSON, or None when the object does not exist
+        """
+        try:
+            response = self.s3_client.get_object(Bucket=bucket_name, Key=key)
+            return json.loads(response["Body"].read())
+
+        except ClientError as error:
+            if error.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            logging.error(error)
+            raise TextSummarizerException(error, sys) from error
+
+
+    def write_json(self, bucket_name: str, key: str, content: Dict) -> None:
+        """
+        Method Name :   write_json
+        Description :   This method writes a small JSON object to the bucket in a single PUT
+        Output      :   Object is created in s3 bucket
+        """
+        try:
+            self.s3_client.put_object(
+                Bucket = bucket_name,
+                Key = key,
+                Body = json.dumps(content, indent=4).encode("utf-8"),
+                ContentType = "application/json"
+            )
+
+        except Exception as error:
+            logging.error(error)
+            raise TextSummarizerException(error, sys) from error
+
+
+    def copy_object(self, bucket_name: str, source_key: str, destination_key: str) -> None:
+        """
+        Method Name :   copy_object
+        Description :   This method copies an object inside the bucket server-side, without moving the bytes
+                        through this machine
+        Output      :   Object is created in s3 bucket
+        """
+        try:
+            self.s3_client.copy(
+                {"Bucket": bucket_name, "Key": source_key},
+                bucket_name,
+                destination_key,
+                Config = self.transfer_config
+            )
+
+        except Exception as error:
+            logging.error(error)
+            raise TextSummarizerException(error, sys) from error
+
+
     def upload_folder(self, folder_name: str, bucket_name: str) -> None:
         """
         Method Name :   upload_file
@@ -249,28 +324,250 @@ class S3Operations:
         return (current_time - last_modified_datetime) < timedelta(hours=24)
 
     
-    def get_latest_model_from_s3(self, model_bucket_name, model_prefix, model_directory):
-        logging.info(f"Downloading latest model from S3 Bucket")
-      
-        response = self.s3_client.list_objects_v2(
-            Bucket = model_bucket_name,
-            Prefix = model_prefix + "/"
-            )
-        
-        logging.info(f"Latest response from S3 Bucket - {response}")
-        
-        if 'Contents' in response:
-            for obj in response['Contents']:
-                file_name = obj['Key']
-                file_name_with_path = os.path.join(model_directory, file_name)
-                os.makedirs(os.path.dirname(file_name_with_path), exist_ok=True)
-                self.s3_client.download_file(
-                    model_bucket_name,
-                    file_name,
-                    file_name_with_path
+    def list_objects(self, bucket_name: str, prefix: str) -> List[Dict]:
+        """
+        Method Name :   list_objects
+        Description :   This method lists every object under prefix, following list_objects_v2 pagination
+                        past the 1000 keys returned per page. Folder marker objects are skipped.
+        Output      :   list of object summaries with Key, ETag, Size and LastModified
+        """
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        return [
+            obj
+            for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+            for obj in page.get("Contents", [])
+            if not obj["Key"].endswith("/")
+        ]
+
+
+    def get_model_signature(self, bucket_name: str, prefixes: List[str]) -> Union[str, None]:
+        """
+        Method Name :   get_model_signature
+        Description :   This method fingerprints the objects under the given prefixes from their keys, ETags,
+                        sizes and LastModified timestamps, so that a change in the bucket can be detected
+                        without downloading anything
+        Output      :   short hex digest, or None when no objects exist under the prefixes
+        """
+        try:
+            digest = hashlib.sha256()
+            found = False
+            for prefix in prefixes:
+                for obj in self.list_objects(bucket_name, prefix + "/"):
+                    found = True
+                    digest.update(
+                        f"{obj['Key']}:{obj['ETag']}:{obj['Size']}:{obj['LastModified'].isoformat()};".encode()
                     )
-        else:
-            logging.info(f"No files found in folder 'model' of bucket {model_bucket_name}")
+
+            return digest.hexdigest()[:16] if found else None
+
+        except Exception as error:
+            logging.error(error)
+            raise TextSummarizerException(error, sys) from error
+
+
+    def get_part_size(self, bucket_name: str, obj: Dict) -> Union[int, None]:
+        """
+        Method Name :   get_part_size
+        Description :   This method finds the part size a multipart object was uploaded with from the length
+                        of its first part, which S3 reports along with the part count. Objects uploaded by
+                        other tools need not use our MULTIPART_CHUNKSIZE.
+        Output      :   part size in bytes, or None when S3 does not report the parts
+        """
+        try:
+            response = self.s3_client.head_object(Bucket=bucket_name, Key=obj["Key"], PartNumber=1)
+        except Exception as error:
+            logging.warning(f"Could not read the part size of {obj['Key']}, verifying its size only: {error}")
+            return None
+
+        parts_count = response.get("PartsCount")
+        part_size = response.get("ContentLength")
+        if not parts_count or not part_size or str(parts_count) != obj["ETag"].strip('"').split("-")[-1]:
+            return None
+        return part_size
+
+
+    def compute_etag(self, file_path: str, etag: str, part_size: Union[int, None] = None) -> Union[str, None]:
+        """
+        Method Name :   compute_etag
+        Description :   This method recomputes the S3 ETag of a local file. A multipart ETag is the md5 of the
+                        md5 digests of its parts, so it can only be reproduced with the part size the object was
+                        uploaded with.
+        Output      :   ETag string, or None when it cannot be reproduced locally
+        """
+        if "-" not in etag:
+            return self.md5_of_file(file_path)
+        if not part_size:
+            return None
+
+        part_digests = []
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(part_size), b""):
+                part_digests.append(hashlib.md5(chunk).digest())
+
+        return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+    @staticmethod
+    def md5_of_file(file_path: str) -> str:
+        """This method returns the hex md5 digest of a file, read in chunks"""
+        digest = hashlib.md5()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(8 * 1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+    def _download_verified(self, bucket_name: str, obj: Dict, file_path: str) -> int:
+        """This method downloads one object to a temp file, verifies size and checksum and renames it into place"""
+        temp_path = file_path + ".part"
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self.s3_client.download_file(bucket_name, obj["Key"], temp_path, Config=self.transfer_config)
+
+        size = os.path.getsize(temp_path)
+        if size != obj["Size"]:
+            os.remove(temp_path)
+            raise IOError(f"Size mismatch for {obj['Key']}: expected {obj['Size']} bytes, got {size}")
+
+        etag = obj["ETag"].strip('"')
+        # Without a known part size a multipart object is verified by its size alone
+        part_size = self.get_part_size(bucket_name, obj) if "-" in etag else None
+        local_etag = self.compute_etag(temp_path, etag, part_size)
+        if local_etag is not None and local_etag != etag:
+            os.remove(temp_path)
+            raise IOError(f"Checksum mismatch for {obj['Key']}: expected ETag {etag}, got {local_etag}")
+
+        os.replace(temp_path, file_path)
+        return size
+
+
+    @staticmethod
+    def write_manifest(manifest_path: str, manifest: Dict) -> None:
+        """This method atomically replaces the local download manifest"""
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        with open(manifest_path + ".tmp", "w") as file:
+            json.dump(manifest, file)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+
+    @staticmethod
+    def remove_unlisted_files(directory: str, keep_paths) -> int:
+        """This method deletes the files under directory that are not in keep_paths and then the emptied folders"""
+        keep_paths = {os.path.normpath(path) for path in keep_paths}
+        removed = 0
+        for root, _, files in os.walk(directory, topdown=False):
+            for name in files:
+                file_path = os.path.normpath(os.path.join(root, name))
+                if file_path not in keep_paths:
+                    os.remove(file_path)
+                    removed += 1
+            if root != directory and not os.listdir(root):
+                os.rmdir(root)
+        return removed
+
+
+    def get_latest_model_from_s3(self, model_bucket_name, model_prefix, model_directory, max_workers=None,
+                                 relative_to="") -> Dict:
+        """
+        Method Name :   get_latest_model_from_s3
+        Description :   This method downloads every object under model_prefix into model_directory, with
+                        relative_to stripped from the keys, using a
+                        pool of workers and multipart transfers. Each file is written to a temp file, verified
+                        against its size and ETag and atomically renamed. Objects whose ETag and size match
+                        the local manifest of a previous download are skipped, so an interrupted download
+                        resumes where it stopped. Local files that are no longer listed under model_prefix
+                        are deleted, so the folder mirrors the prefix.
+        Output      :   download statistics
+        """
+        logging.info(f"Downloading latest model from S3 Bucket")
+        try:
+            start_time = time.perf_counter()
+            local_directory = os.path.join(model_directory, model_prefix[len(relative_to):])
+            objects = self.list_objects(model_bucket_name, model_prefix + "/")
+            if not objects:
+                logging.info(f"No files found in folder '{model_prefix}' of bucket {model_bucket_name}")
+                shutil.rmtree(local_directory, ignore_errors=True)
+                return {"files": 0, "skipped": 0, "bytes": 0, "seconds": 0.0, "bytes_per_second": 0.0}
+
+            manifest_path = os.path.join(local_directory, self.transfer_const.LOCAL_MANIFEST_FILE)
+            listed_paths = {os.path.join(model_directory, obj["Key"][len(relative_to):]) for obj in objects}
+            removed = self.remove_unlisted_files(local_directory, listed_paths | {manifest_path})
+            if removed:
+                logging.info(f"Removed {removed} local files that are no longer listed under {model_prefix}/")
+
+            manifest = {}
+            if os.path.exists(manifest_path):
+                with open(manifest_path, "r") as file:
+                    manifest = {
+                        relative_key: entry for relative_key, entry in json.load(file).items()
+                        if os.path.join(model_directory, relative_key) in listed_paths
+                    }
+
+            pending = []
+            for obj in objects:
+                relative_key = obj["Key"][len(relative_to):]
+                file_path = os.path.join(model_directory, relative_key)
+                if (manifest.get(relative_key) == {"etag": obj["ETag"], "size": obj["Size"]}
+                        and os.path.exists(file_path) and os.path.getsize(file_path) == obj["Size"]):
+                    continue
+                pending.append((obj, file_path))
+
+            logging.info(f"Downloading {len(pending)} of {len(objects)} objects under {model_prefix}/")
+
+            downloaded_bytes = 0
+            errors = []
+            with ThreadPoolExecutor(max_workers=max_workers or self.transfer_const.DOWNLOAD_WORKERS) as executor:
+                futures = {
+                    executor.submit(self._download_verified, model_bucket_name, obj, file_path): obj
+                    for obj, file_path in pending
+                }
+                for future in as_completed(futures):
+                    obj = futures[future]
+                    try:
+                        downloaded_bytes += future.result()
+                    except Exception as error:
+                        logging.error(f"Failed to download {obj['Key']}: {error}")
+                        errors.append(error)
+                        continue
+                    # The manifest is saved after every verified file, so a crashed download resumes from it
+                    manifest[obj["Key"][len(relative_to):]] = {"etag": obj["ETag"], "size": obj["Size"]}
+                    self.write_manifest(manifest_path, manifest)
+
+            self.write_manifest(manifest_path, manifest)
+
+            if errors:
+                raise errors[0]
+
+            seconds = time.perf_counter() - start_time
+            stats = {
+                "files": len(pending),
+                "skipped": len(objects) - len(pending),
+                "bytes": downloaded_bytes,
+                "seconds": round(seconds, 3),
+                "bytes_per_second": round(downloaded_bytes / seconds, 1) if seconds else 0.0
+            }
+            logging.info(f"Downloaded {downloaded_bytes / 1e6:.1f} MB from {model_prefix}/ in {seconds:.2f}s "
+                         f"({stats['bytes_per_second'] / 1e6:.1f} MB/s), skipped {stats['skipped']} unchanged files")
+            return stats
+
+        except Exception as error:
+            logging.error(error)
+            raise TextSummarizerException(error, sys) from error
+
+
+    def download_model_version(self, bucket_name: str, version_prefix: str, prefixes: List[str], directory: str) -> None:
+        """
+        Method Name :   download_model_version
+        Description :   This method downloads the given prefixes of the model version stored under
+                        version_prefix into directory, laid out as directory/<prefix>. An empty version_prefix
+                        downloads the legacy flat layout.
+        Output      :   Files are downloaded into directory
+        """
+        for prefix in prefixes:
+            if version_prefix:
+                self.get_latest_model_from_s3(bucket_name, f"{version_prefix}/{prefix}", directory,
+                                              relative_to=version_prefix + "/")
+            else:
+                self.get_latest_model_from_s3(bucket_name, prefix, directory)
 
 
     def is_bucket_empty(self, bucket_name):
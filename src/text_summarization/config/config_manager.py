@@ -2,20 +2,25 @@
 This module basically manages the configurations for each stage fo the pipeline
 """
 
+from dataclasses import replace
+
 from src.text_summarization.constants import ( TrainingArguments, 
                                               DataIngestionConstants,
                                               DataTransformationConstants,
                                               DataValidationConstants,
                                               ModelTrainingConstants,
+                                              ModelExportConstants,
                                               ModelEvaluationConstants,
                                               ModelPusherConstants,
-                                              PredictionPipelineConstants)
+                                              PredictionPipelineConstants,
+                                              BulkSummarizationConstants)
 
 from src.text_summarization.utils.common_utils import read_yaml, create_directories
 from src.text_summarization.entity import (DataIngestionConfig, 
                                            DataValidationConfig, 
                                            DataTransformationConfig, 
                                            ModelTrainingConfig,
+                                           ModelExportConfig,
                                            ModelEvaluationConfig,
                                            ModelPusherConfig,
                                            PredictionPipelineConfig
@@ -74,7 +79,8 @@ class ConfigurationManager:
             tokenizer_name = self.data_transformation_const.TOKENIZER_NAME,
             max_input_length= self.data_transformation_const.MAX_INPUT_LENGTH,
             max_target_length= self.data_transformation_const.MAX_TARGET_LENGTH,
-            prefix = self.data_transformation_const.PREFIX
+            prefix = self.data_transformation_const.PREFIX,
+            cache_dir = self.data_transformation_const.CACHE_DIR
         )
 
         return data_transformation_config
@@ -110,6 +116,30 @@ class ConfigurationManager:
     
 
 
+    def get_model_export_config(self) -> ModelExportConfig:
+        """This method assigns the constants for Model Export config"""
+
+        config = ModelExportConstants()
+
+        create_directories([config.MODEL_EXPORT_ROOT_DIR])
+
+        model_export_config = ModelExportConfig(
+            root_dir = config.MODEL_EXPORT_ROOT_DIR,
+            data_path = config.DATA_PATH,
+            trained_model_path = config.TRAINED_MODEL_PATH,
+            trained_tokenizer_path = config.TRAINED_TOKENIZER_PATH,
+            onnx_model_path = config.ONNX_MODEL_PATH,
+            onnx_int8_model_path = config.ONNX_INT8_MODEL_PATH,
+            quantization_isa = config.QUANTIZATION_ISA,
+            parity_report_file = config.PARITY_REPORT_FILE,
+            parity_samples = config.PARITY_SAMPLES,
+            model_status_file = config.MODEL_EVALUATION_STATUS_FILE
+            )
+
+        return model_export_config
+
+
+
     def get_model_evaluation_config(self) -> ModelEvaluationConfig:
         """This method assigns the constants for Model Evaluation config"""
 
@@ -128,7 +158,16 @@ class ConfigurationManager:
             model_bucket_name = config.MODEL_BUCKET_NAME,
             model_prefix = config.MODEL_PREFIX,
             tokenizer_prefix = config.TOKENIZER_PREFIX,
-            model_status_file = config.MODEL_EVALUATION_STATUS_FILE
+            model_status_file = config.MODEL_EVALUATION_STATUS_FILE,
+            model_versions_prefix = config.MODEL_VERSIONS_PREFIX,
+            model_manifest_file = config.MODEL_MANIFEST_FILE,
+            model_pointer_key = config.MODEL_POINTER_KEY,
+            generation_profile = config.GENERATION_PROFILE,
+            evaluation_samples = config.EVALUATION_SAMPLES,
+            evaluation_batch_size = config.EVALUATION_BATCH_SIZE,
+            evaluation_workers = config.EVALUATION_WORKERS,
+            evaluation_time_budget_seconds = config.EVALUATION_TIME_BUDGET_SECONDS,
+            evaluation_cache_prefix = config.EVALUATION_CACHE_PREFIX
             )
 
         return model_evaluation_config
@@ -143,13 +182,20 @@ class ConfigurationManager:
             reference_dir = config.REFERENCE_DIR,
             trained_model_path = config.TRAINED_MODEL_PATH,
             trained_tokenizer_path = config.TRAINED_TOKENIZER_PATH,
+            onnx_model_path = config.ONNX_MODEL_PATH,
+            onnx_int8_model_path = config.ONNX_INT8_MODEL_PATH,
             downloaded_model_path = config.DOWNLOADED_MODEL_PATH,
             downloaded_tokenizer_path = config.DOWNLOADED_TOKENIZER_PATH,
             metric_file_name = config.METRIC_FILE_NAME,
             model_bucket_name = config.MODEL_BUCKET_NAME,
             model_prefix = config.MODEL_PREFIX,
             tokenizer_prefix = config.TOKENIZER_PREFIX,
-            model_status_file = config.MODEL_EVALUATION_STATUS_FILE
+            onnx_prefix = config.ONNX_PREFIX,
+            onnx_int8_prefix = config.ONNX_INT8_PREFIX,
+            model_status_file = config.MODEL_EVALUATION_STATUS_FILE,
+            model_versions_prefix = config.MODEL_VERSIONS_PREFIX,
+            model_manifest_file = config.MODEL_MANIFEST_FILE,
+            model_pointer_key = config.MODEL_POINTER_KEY
             )
 
         return model_pusher_config
@@ -164,11 +210,64 @@ class ConfigurationManager:
         prediction_pipeline_config = PredictionPipelineConfig(
             root_dir = config.PREDICTION_PIPELINE_ROOT_DIR,
             data_path = config.PREDICTION_DATA_PATH,
-            saved_model_path = config.MODEL_FOR_PREDICTION,
-            tokenizer_path = config.TOKENIZER_FOR_PREDICTION,
+            model_versions_dir = config.MODEL_VERSIONS_DIR,
+            model_staging_dir = config.MODEL_STAGING_DIR,
+            current_version_file = config.CURRENT_VERSION_FILE,
+            model_in_use_dir = config.MODEL_IN_USE_DIR,
+            model_refresh_interval_seconds = config.MODEL_REFRESH_INTERVAL_SECONDS,
+            model_load_retry_seconds = config.MODEL_LOAD_RETRY_SECONDS,
+            warmup_input_tokens = config.WARMUP_INPUT_TOKENS,
+            warmup_batch_size = config.WARMUP_BATCH_SIZE,
+            warmup_max_new_tokens = config.WARMUP_MAX_NEW_TOKENS,
             model_bucket_name = config.MODEL_BUCKET_NAME,
             model_prefix = config.MODEL_PREFIX,
-            tokenizer_prefix = config.TOKENIZER_PREFIX
+            tokenizer_prefix = config.TOKENIZER_PREFIX,
+            onnx_prefix = config.ONNX_PREFIX,
+            onnx_int8_prefix = config.ONNX_INT8_PREFIX,
+            model_versions_prefix = config.MODEL_VERSIONS_PREFIX,
+            model_manifest_file = config.MODEL_MANIFEST_FILE,
+            model_pointer_key = config.MODEL_POINTER_KEY,
+            inference_backend = config.INFERENCE_BACKEND,
+            mmap_model_weights = config.MMAP_MODEL_WEIGHTS,
+            generation_profile = config.GENERATION_PROFILE,
+            streaming_generation_profile = config.STREAMING_GENERATION_PROFILE,
+            max_input_length = config.MAX_INPUT_LENGTH,
+            long_input_enabled = config.LONG_INPUT_ENABLED,
+            long_input_chunk_tokens = config.LONG_INPUT_CHUNK_TOKENS,
+            long_input_chunk_overlap = config.LONG_INPUT_CHUNK_OVERLAP,
+            long_input_max_chunks = config.LONG_INPUT_MAX_CHUNKS,
+            max_batch_size = config.MAX_BATCH_SIZE,
+            max_batch_wait_ms = config.MAX_BATCH_WAIT_MS,
+            max_queue_depth = config.MAX_QUEUE_DEPTH,
+            max_bulk_documents = config.MAX_BULK_DOCUMENTS,
+            inference_workers = config.INFERENCE_WORKERS,
+            io_workers = config.IO_WORKERS,
+            io_queue_depth = config.IO_QUEUE_DEPTH,
+            streaming_workers = config.STREAMING_WORKERS,
+            streaming_queue_depth = config.STREAMING_QUEUE_DEPTH,
+            summary_cache_max_bytes = config.SUMMARY_CACHE_MAX_BYTES,
+            summary_cache_dir = config.SUMMARY_CACHE_DIR if config.SUMMARY_CACHE_DISK_ENABLED else None,
+            summary_cache_disk_max_bytes = config.SUMMARY_CACHE_DISK_MAX_BYTES
             )
 
         return prediction_pipeline_config
+
+
+    def get_bulk_prediction_pipeline_config(self) -> PredictionPipelineConfig:
+        """
+        This method sets the prediction pipeline config for offline bulk runs. Model versions are kept in their
+        own directories, so that activating one never removes or replaces the version a server on the same node
+        is serving, and the summary cache stays off.
+        """
+        config = BulkSummarizationConstants()
+
+        create_directories([config.BULK_SUMMARIZATION_ROOT_DIR])
+
+        return replace(
+            self.get_prediction_pipeline_config(),
+            model_versions_dir = config.MODEL_VERSIONS_DIR,
+            model_staging_dir = config.MODEL_STAGING_DIR,
+            current_version_file = config.CURRENT_VERSION_FILE,
+            model_in_use_dir = config.MODEL_IN_USE_DIR,
+            summary_cache_dir = None
+        )
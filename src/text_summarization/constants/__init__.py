@@ -4,7 +4,7 @@ import os
 from pathlib import Path
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List
+from typing import Dict, List
 
 TIMESTAMP: str = datetime.now().strftime("%m_%d_%Y_%H_%M_%S")
 
@@ -25,6 +25,42 @@ class TrainingArguments:
 
 
 
+@dataclass
+class LoggingConstants:
+  LOG_LEVEL: str = os.environ.get("LOG_LEVEL", "INFO").upper()
+  LOG_MODULE_LEVELS: str = os.environ.get("LOG_MODULE_LEVELS", "botocore=WARNING,urllib3=WARNING,s3transfer=WARNING")
+  LOG_FORMAT: str = os.environ.get("LOG_FORMAT", "json")
+  LOG_TO_STDOUT: bool = os.environ.get("LOG_TO_STDOUT", "false").lower() == "true"
+  LOG_SAMPLED_MODULES: str = os.environ.get("LOG_SAMPLED_MODULES", "app,prediction_pipeline,batch_scheduler")
+  LOG_SAMPLE_RATE: float = float(os.environ.get("LOG_SAMPLE_RATE", 1.0))
+  LOG_MAX_MESSAGE_LENGTH: int = int(os.environ.get("LOG_MAX_MESSAGE_LENGTH", 2000))
+  LOG_QUEUE_SIZE: int = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+
+
+
+@dataclass
+class GenerationProfileConstants:
+  PROFILES: Dict[str, Dict] = field(default_factory=lambda: {
+    "quality": {"length_penalty": 0.8, "num_beams": 8, "max_length": 128},
+    "balanced": {"length_penalty": 0.8, "num_beams": 4, "max_length": 128, "early_stopping": True},
+    "fast": {"num_beams": 2, "max_length": 128, "early_stopping": True},
+    "greedy": {"num_beams": 1, "do_sample": False, "max_length": 128}
+  })
+  DEFAULT_PROFILE: str = os.environ.get("GENERATION_PROFILE", "quality")
+
+
+
+@dataclass
+class S3TransferConstants:
+  DOWNLOAD_WORKERS: int = int(os.environ.get("S3_DOWNLOAD_WORKERS", 8))
+  UPLOAD_WORKERS: int = int(os.environ.get("S3_UPLOAD_WORKERS", 8))
+  MAX_CONCURRENCY_PER_FILE: int = int(os.environ.get("S3_MAX_CONCURRENCY_PER_FILE", 4))
+  MULTIPART_THRESHOLD: int = 8 * 1024 * 1024
+  MULTIPART_CHUNKSIZE: int = 8 * 1024 * 1024
+  LOCAL_MANIFEST_FILE: str = ".s3_manifest.json"
+
+
+
 @dataclass
 class DataIngestionConstants:
   DATA_INGESTION_ROOT_DIR: str = os.path.join(ARTIFACTS_ROOT,"DataIngestionArtifacts")
@@ -53,6 +89,7 @@ class DataTransformationConstants:
   MAX_INPUT_LENGTH: int = 1024
   MAX_TARGET_LENGTH: int = 128
   PREFIX: str = "Summarize: "
+  CACHE_DIR: str = os.environ.get("DATA_TRANSFORMATION_CACHE_DIR", os.path.join("artifacts", "cache", "DataTransformation"))
 
 
 
@@ -74,12 +111,41 @@ class ModelEvaluationConstants:
   TRAINED_TOKENIZER_PATH: str =  ModelTrainingConstants.TOKENIZER_PATH
   MODEL_PREFIX: str = "models"
   TOKENIZER_PREFIX: str = "tokenizer"
+  ONNX_PREFIX: str = "onnx"
+  ONNX_INT8_PREFIX: str = "onnx-int8"
   DOWNLOADED_MODEL_PATH: str = os.path.join(MODEL_EVALUATION_ROOT_DIR, MODEL_PREFIX)
   DOWNLOADED_TOKENIZER_PATH: str =  os.path.join(MODEL_EVALUATION_ROOT_DIR, TOKENIZER_PREFIX)
   METRIC_FILE_NAME: str = os.path.join(MODEL_EVALUATION_ROOT_DIR, "metrics.csv")
   MODEL_BUCKET_NAME: str = "text-summarization-models-06062024"
   MODEL_EVALUATION_STATUS_FILE = "model_evaluation.json"
   MODEL_EVALUATION_STATUS_FILE: str = os.path.join(MODEL_EVALUATION_ROOT_DIR, MODEL_EVALUATION_STATUS_FILE)
+  MODEL_VERSIONS_PREFIX: str = "versions"
+  MODEL_MANIFEST_FILE: str = "manifest.json"
+  MODEL_POINTER_KEY: str = "current.json"
+  GENERATION_PROFILE: str = GenerationProfileConstants.DEFAULT_PROFILE
+  EVALUATION_SAMPLES: int = int(os.environ.get("EVALUATION_SAMPLES", 0))
+  EVALUATION_BATCH_SIZE: int = int(os.environ.get("EVALUATION_BATCH_SIZE", 16))
+  EVALUATION_WORKERS: int = int(os.environ.get("EVALUATION_WORKERS", 1))
+  # The time budget is opt-in, 0 scores the whole test split. A budgeted run scores whichever batches finish in
+  # time, so the rows the accept decision rests on, and the production predictions cached for later runs, would
+  # depend on the speed of the machine. EVALUATION_SAMPLES bounds the work reproducibly instead.
+  EVALUATION_TIME_BUDGET_SECONDS: float = float(os.environ.get("EVALUATION_TIME_BUDGET_SECONDS", 0))
+  EVALUATION_CACHE_PREFIX: str = "evaluations"
+
+
+
+@dataclass
+class ModelExportConstants:
+  MODEL_EXPORT_ROOT_DIR: str = os.path.join(ARTIFACTS_ROOT, "ModelExport")
+  DATA_PATH: str = ModelTrainingConstants.MODEL_TRAINING_DATA_PATH
+  TRAINED_MODEL_PATH: str = ModelTrainingConstants.MODEL_PATH
+  TRAINED_TOKENIZER_PATH: str = ModelTrainingConstants.TOKENIZER_PATH
+  ONNX_MODEL_PATH: str = os.path.join(MODEL_EXPORT_ROOT_DIR, "onnx")
+  ONNX_INT8_MODEL_PATH: str = os.path.join(MODEL_EXPORT_ROOT_DIR, "onnx-int8")
+  QUANTIZATION_ISA: str = os.environ.get("ONNX_QUANTIZATION_ISA", "avx512_vnni")
+  PARITY_REPORT_FILE: str = os.path.join(MODEL_EXPORT_ROOT_DIR, "parity.json")
+  PARITY_SAMPLES: int = 4
+  MODEL_EVALUATION_STATUS_FILE: str = ModelEvaluationConstants.MODEL_EVALUATION_STATUS_FILE
 
 
 
@@ -88,13 +154,20 @@ class ModelPusherConstants:
   REFERENCE_DIR: str = os.path.join(ARTIFACTS_ROOT, "ModelEvaluation")
   TRAINED_MODEL_PATH: str = ModelTrainingConstants.MODEL_PATH
   TRAINED_TOKENIZER_PATH: str =  ModelTrainingConstants.TOKENIZER_PATH
+  ONNX_MODEL_PATH: str = ModelExportConstants.ONNX_MODEL_PATH
+  ONNX_INT8_MODEL_PATH: str = ModelExportConstants.ONNX_INT8_MODEL_PATH
   MODEL_PREFIX: str = ModelEvaluationConstants.MODEL_PREFIX
   TOKENIZER_PREFIX: str = ModelEvaluationConstants.TOKENIZER_PREFIX
+  ONNX_PREFIX: str = ModelEvaluationConstants.ONNX_PREFIX
+  ONNX_INT8_PREFIX: str = ModelEvaluationConstants.ONNX_INT8_PREFIX
   DOWNLOADED_MODEL_PATH: str = ModelEvaluationConstants.DOWNLOADED_MODEL_PATH
   DOWNLOADED_TOKENIZER_PATH: str =  ModelEvaluationConstants.DOWNLOADED_TOKENIZER_PATH
   METRIC_FILE_NAME: str = ModelEvaluationConstants.METRIC_FILE_NAME
   MODEL_BUCKET_NAME: str = ModelEvaluationConstants.MODEL_BUCKET_NAME
   MODEL_EVALUATION_STATUS_FILE: str = ModelEvaluationConstants.MODEL_EVALUATION_STATUS_FILE
+  MODEL_VERSIONS_PREFIX: str = ModelEvaluationConstants.MODEL_VERSIONS_PREFIX
+  MODEL_MANIFEST_FILE: str = ModelEvaluationConstants.MODEL_MANIFEST_FILE
+  MODEL_POINTER_KEY: str = ModelEvaluationConstants.MODEL_POINTER_KEY
 
 
 
@@ -105,5 +178,49 @@ class PredictionPipelineConstants:
   MODEL_BUCKET_NAME: str = ModelEvaluationConstants.MODEL_BUCKET_NAME
   MODEL_PREFIX: str = ModelEvaluationConstants.MODEL_PREFIX
   TOKENIZER_PREFIX: str = ModelEvaluationConstants.TOKENIZER_PREFIX
-  MODEL_FOR_PREDICTION: str = os.path.join(PREDICTION_PIPELINE_ROOT_DIR, MODEL_PREFIX)
-  TOKENIZER_FOR_PREDICTION: str = os.path.join(PREDICTION_PIPELINE_ROOT_DIR, TOKENIZER_PREFIX)
+  ONNX_PREFIX: str = ModelEvaluationConstants.ONNX_PREFIX
+  ONNX_INT8_PREFIX: str = ModelEvaluationConstants.ONNX_INT8_PREFIX
+  MODEL_VERSIONS_PREFIX: str = ModelEvaluationConstants.MODEL_VERSIONS_PREFIX
+  MODEL_MANIFEST_FILE: str = ModelEvaluationConstants.MODEL_MANIFEST_FILE
+  MODEL_POINTER_KEY: str = ModelEvaluationConstants.MODEL_POINTER_KEY
+  INFERENCE_BACKEND: str = os.environ.get("INFERENCE_BACKEND", "pytorch")
+  MMAP_MODEL_WEIGHTS: bool = os.environ.get("MMAP_MODEL_WEIGHTS", "true").lower() == "true"
+  GENERATION_PROFILE: str = GenerationProfileConstants.DEFAULT_PROFILE
+  STREAMING_GENERATION_PROFILE: str = os.environ.get("STREAMING_GENERATION_PROFILE", "greedy")
+  MODEL_VERSIONS_DIR: str = os.path.join(PREDICTION_PIPELINE_ROOT_DIR, "versions")
+  MODEL_STAGING_DIR: str = os.path.join(PREDICTION_PIPELINE_ROOT_DIR, "staging")
+  CURRENT_VERSION_FILE: str = os.path.join(PREDICTION_PIPELINE_ROOT_DIR, "current_version")
+  MODEL_IN_USE_DIR: str = os.path.join(PREDICTION_PIPELINE_ROOT_DIR, "in_use")
+  MODEL_REFRESH_INTERVAL_SECONDS: float = float(os.environ.get("MODEL_REFRESH_INTERVAL_SECONDS", 300))
+  MODEL_LOAD_RETRY_SECONDS: float = float(os.environ.get("MODEL_LOAD_RETRY_SECONDS", 30))
+  WARMUP_INPUT_TOKENS: tuple = tuple(int(n) for n in os.environ.get("WARMUP_INPUT_TOKENS", "32,256,1024").split(","))
+  WARMUP_BATCH_SIZE: int = int(os.environ.get("WARMUP_BATCH_SIZE", 2))
+  WARMUP_MAX_NEW_TOKENS: int = int(os.environ.get("WARMUP_MAX_NEW_TOKENS", 8))
+  MAX_INPUT_LENGTH: int = DataTransformationConstants.MAX_INPUT_LENGTH
+  LONG_INPUT_ENABLED: bool = os.environ.get("LONG_INPUT_ENABLED", "true").lower() == "true"
+  LONG_INPUT_CHUNK_TOKENS: int = int(os.environ.get("LONG_INPUT_CHUNK_TOKENS", DataTransformationConstants.MAX_INPUT_LENGTH))
+  LONG_INPUT_CHUNK_OVERLAP: int = int(os.environ.get("LONG_INPUT_CHUNK_OVERLAP", 128))
+  LONG_INPUT_MAX_CHUNKS: int = int(os.environ.get("LONG_INPUT_MAX_CHUNKS", 64))
+  MAX_BATCH_SIZE: int = int(os.environ.get("MAX_BATCH_SIZE", 8))
+  MAX_BATCH_WAIT_MS: float = float(os.environ.get("MAX_BATCH_WAIT_MS", 20))
+  MAX_QUEUE_DEPTH: int = int(os.environ.get("MAX_QUEUE_DEPTH", 64))
+  MAX_BULK_DOCUMENTS: int = int(os.environ.get("MAX_BULK_DOCUMENTS", 10000))
+  INFERENCE_WORKERS: int = int(os.environ.get("INFERENCE_WORKERS", 1))
+  IO_WORKERS: int = int(os.environ.get("IO_WORKERS", 4))
+  IO_QUEUE_DEPTH: int = int(os.environ.get("IO_QUEUE_DEPTH", 16))
+  STREAMING_WORKERS: int = int(os.environ.get("STREAMING_WORKERS", 1))
+  STREAMING_QUEUE_DEPTH: int = int(os.environ.get("STREAMING_QUEUE_DEPTH", 4))
+  SUMMARY_CACHE_MAX_BYTES: int = int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+  SUMMARY_CACHE_DISK_ENABLED: bool = os.environ.get("SUMMARY_CACHE_DISK_ENABLED", "false").lower() == "true"
+  SUMMARY_CACHE_DIR: str = os.path.join(PREDICTION_PIPELINE_ROOT_DIR, "cache")
+  SUMMARY_CACHE_DISK_MAX_BYTES: int = int(os.environ.get("SUMMARY_CACHE_DISK_MAX_BYTES", 1024 * 1024 * 1024))
+
+
+
+@dataclass
+class BulkSummarizationConstants:
+  BULK_SUMMARIZATION_ROOT_DIR: str = os.path.join("artifacts","BulkSummarization")
+  MODEL_VERSIONS_DIR: str = os.path.join(BULK_SUMMARIZATION_ROOT_DIR, "versions")
+  MODEL_STAGING_DIR: str = os.path.join(BULK_SUMMARIZATION_ROOT_DIR, "staging")
+  CURRENT_VERSION_FILE: str = os.path.join(BULK_SUMMARIZATION_ROOT_DIR, "current_version")
+  MODEL_IN_USE_DIR: str = os.path.join(BULK_SUMMARIZATION_ROOT_DIR, "in_use")
@@ -29,6 +29,7 @@ class DataTransformationConfig:
     max_input_length: int
     max_target_length: int
     prefix: str
+    cache_dir: Path
 
 
 
@@ -52,6 +53,21 @@ class ModelTrainingConfig:
 
 
 
+@dataclass(frozen=True)
+class ModelExportConfig:
+    root_dir: Path
+    data_path: Path
+    trained_model_path: Path
+    trained_tokenizer_path: Path
+    onnx_model_path: Path
+    onnx_int8_model_path: Path
+    quantization_isa: str
+    parity_report_file: Path
+    parity_samples: int
+    model_status_file: str
+
+
+
 @dataclass(frozen=True)
 class ModelEvaluationConfig:
     root_dir: Path
@@ -65,27 +81,76 @@ class ModelEvaluationConfig:
     metric_file_name: Path
     model_bucket_name: str
     model_status_file: str
+    model_versions_prefix: str
+    model_manifest_file: str
+    model_pointer_key: str
+    generation_profile: str
+    evaluation_samples: int
+    evaluation_batch_size: int
+    evaluation_workers: int
+    evaluation_time_budget_seconds: float
+    evaluation_cache_prefix: str
 
 @dataclass(frozen=True)
 class ModelPusherConfig:
     reference_dir: Path
     trained_model_path: Path
     trained_tokenizer_path: Path
+    onnx_model_path: Path
+    onnx_int8_model_path: Path
     model_prefix: str
     tokenizer_prefix: str
+    onnx_prefix: str
+    onnx_int8_prefix: str
     downloaded_model_path: Path
     downloaded_tokenizer_path: Path
     metric_file_name: Path
     model_bucket_name: str
     model_status_file: str
+    model_versions_prefix: str
+    model_manifest_file: str
+    model_pointer_key: str
 
 
 @dataclass(frozen=True)
 class PredictionPipelineConfig:
     root_dir: Path
     data_path: Path
-    saved_model_path: Path
-    tokenizer_path: Path
+    model_versions_dir: Path
+    model_staging_dir: Path
+    current_version_file: Path
+    model_in_use_dir: Path
+    model_refresh_interval_seconds: float
+    model_load_retry_seconds: float
+    warmup_input_tokens: tuple
+    warmup_batch_size: int
+    warmup_max_new_tokens: int
     model_bucket_name: str
     model_prefix: str
-    tokenizer_prefix: str
\ No newline at end of file
+    tokenizer_prefix: str
+    onnx_prefix: str
+    onnx_int8_prefix: str
+    model_versions_prefix: str
+    model_manifest_file: str
+    model_pointer_key: str
+    inference_backend: str
+    mmap_model_weights: bool
+    generation_profile: str
+    streaming_generation_profile: str
+    max_input_length: int
+    long_input_enabled: bool
+    long_input_chunk_tokens: int
+    long_input_chunk_overlap: int
+    long_input_max_chunks: int
+    max_batch_size: int
+    max_batch_wait_ms: float
+    max_queue_depth: int
+    max_bulk_documents: int
+    inference_workers: int
+    io_workers: int
+    io_queue_depth: int
+    streaming_workers: int
+    streaming_queue_depth: int
+    summary_cache_max_bytes: int
+    summary_cache_dir: Path
+    summary_cache_disk_max_bytes: int
\ No newline at end of file
@@ -29,3 +29,7 @@ class TextSummarizerException(Exception):
 
     def __str__(self):
         return self.error_message
+
+
+class ServiceOverloadedError(Exception):
+    """This class signals that a bounded queue or executor is full and the request should be rejected"""
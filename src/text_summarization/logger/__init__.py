@@ -1,10 +1,22 @@
-"""This module includes logging configurations"""
+"""
+This module includes logging configurations. Records are put on an in-memory queue by the thread that logs
+them and written to the log file by a background listener thread, so formatting and disk I/O stay off the
+request path. Levels, sampling, truncation and the output format are configured by LoggingConstants.
+"""
 
+import atexit
+import json
 import logging
 import os
-from datetime import datetime
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
 
 from from_root import from_root
+from src.text_summarization.constants import LoggingConstants
 
 
 LOG_FILE = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
@@ -15,9 +27,211 @@ logs_path = os.path.join(from_root(), LOG_DIR, LOG_FILE)
 
 os.makedirs(LOG_DIR, exist_ok=True)
 
+TEXT_FORMAT = "[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s"
 
-logging.basicConfig(
-    filename=logs_path,
-    format="[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s",
-    level=logging.DEBUG,
-)
+
+def truncate(message: str, max_length: int) -> str:
+    """This function shortens a message to max_length characters, noting how much was cut"""
+    if max_length <= 0 or len(message) <= max_length:
+        return message
+    return f"{message[:max_length]}... [truncated {len(message) - max_length} characters]"
+
+
+def parse_level(level: str) -> Optional[int]:
+    """This function returns the number of a level given by name, such as INFO, or as a number, or None if unknown"""
+    level = level.strip().upper()
+    try:
+        return int(level)
+    except ValueError:
+        return logging._nameToLevel.get(level)
+
+
+def parse_levels(module_levels: str, invalid_entries: List[str]) -> Dict[str, int]:
+    """
+    This function parses "module=LEVEL,module=LEVEL" into a mapping of module or logger name to level. Entries
+    without a name or with an unknown level are skipped and appended to invalid_entries.
+    """
+    levels = {}
+    for entry in filter(None, (entry.strip() for entry in module_levels.split(","))):
+        name, _, level = entry.partition("=")
+        level_number = parse_level(level)
+        if not name.strip() or level_number is None:
+            invalid_entries.append(entry)
+            continue
+        levels[name.strip()] = level_number
+    return levels
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    This class applies a level per module. The code base logs through the root logger, so its records are
+    matched by module name, while libraries are matched by logger name and its parents.
+    """
+
+    def __init__(self, default_level: int, levels: Dict[str, int]):
+        super().__init__()
+        self.default_level = default_level
+        self.levels = levels
+
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        level = self.levels.get(record.module)
+        name = record.name
+        while level is None and name:
+            level = self.levels.get(name)
+            name = name.rpartition(".")[0]
+        return record.levelno >= (self.default_level if level is None else level)
+
+
+class SamplingFilter(logging.Filter):
+    """This class keeps only a fraction of the INFO and DEBUG records of high-volume modules"""
+
+    def __init__(self, modules, sample_rate: float):
+        super().__init__()
+        self.modules = set(modules)
+        self.sample_rate = sample_rate
+
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.sample_rate >= 1 or record.levelno >= logging.WARNING or record.module not in self.modules:
+            return True
+        record.sample_rate = self.sample_rate
+        return random.random() < self.sample_rate
+
+
+class TruncatingFormatter(logging.Formatter):
+    """This class formats records as text lines with messages cut to max_message_length"""
+
+    def __init__(self, max_message_length: int):
+        super().__init__(TEXT_FORMAT)
+        self.max_message_length = max_message_length
+
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message, self.max_message_length)
+        return super().formatMessage(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """This class formats records as one JSON object per line with messages cut to max_message_length"""
+
+    def __init__(self, max_message_length: int):
+        super().__init__()
+        self.max_message_length = max_message_length
+
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+            "message": truncate(record.getMessage(), self.max_message_length)
+        }
+        if hasattr(record, "sample_rate"):
+            payload["sample_rate"] = record.sample_rate
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    This class hands records to the listener thread as they are. The queue never leaves the process, so
+    records do not need to be formatted up front, and when the queue is full records are dropped instead of
+    blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def start_listener() -> QueueListener:
+    """This function starts the thread that writes queued records to the output handlers"""
+    queue_handler.queue = queue.Queue(logging_const.LOG_QUEUE_SIZE)
+    queue_listener = QueueListener(queue_handler.queue, *output_handlers)
+    queue_listener.start()
+    return queue_listener
+
+
+def quiesce_output_handlers() -> None:
+    """This function holds the output handlers across fork so that no write is half done in the child's copy"""
+    for output_handler in output_handlers:
+        output_handler.acquire()
+        output_handler.flush()
+
+
+def resume_output_handlers() -> None:
+    """This function lets the parent's listener write again once the child has been forked"""
+    for output_handler in output_handlers:
+        output_handler.release()
+
+
+def restart_listener_after_fork() -> None:
+    """The listener thread does not survive fork, so forked processes such as gunicorn workers start their own"""
+    global listener
+    for output_handler in output_handlers:
+        output_handler.createLock()
+    listener = start_listener()
+
+
+def stop_listener() -> None:
+    """This function writes out the records still on the queue when the process exits"""
+    listener.stop()
+
+
+logging_const = LoggingConstants()
+invalid_levels = []
+default_level = parse_level(logging_const.LOG_LEVEL)
+if default_level is None:
+    invalid_levels.append(f"LOG_LEVEL={logging_const.LOG_LEVEL}")
+    default_level = logging.INFO
+module_levels = parse_levels(logging_const.LOG_MODULE_LEVELS, invalid_levels)
+
+formatter = (JsonFormatter(logging_const.LOG_MAX_MESSAGE_LENGTH) if logging_const.LOG_FORMAT == "json"
+             else TruncatingFormatter(logging_const.LOG_MAX_MESSAGE_LENGTH))
+output_handlers = [logging.FileHandler(logs_path)]
+if logging_const.LOG_TO_STDOUT:
+    output_handlers.append(logging.StreamHandler(sys.stdout))
+for output_handler in output_handlers:
+    output_handler.setFormatter(formatter)
+
+queue_handler = NonBlockingQueueHandler(queue.Queue(logging_const.LOG_QUEUE_SIZE))
+queue_handler.addFilter(ModuleLevelFilter(default_level, module_levels))
+queue_handler.addFilter(SamplingFilter(
+    [module.strip() for module in logging_const.LOG_SAMPLED_MODULES.split(",") if module.strip()],
+    logging_const.LOG_SAMPLE_RATE
+))
+
+# Loggers named in LOG_MODULE_LEVELS get their level directly, so records below it are never created
+for logger_name, level in module_levels.items():
+    logging.getLogger(logger_name).setLevel(level)
+
+root_logger = logging.getLogger()
+root_logger.handlers = [queue_handler]
+root_logger.setLevel(min([default_level, *module_levels.values()]))
+
+listener = start_listener()
+os.register_at_fork(before=quiesce_output_handlers,
+                    after_in_parent=resume_output_handlers,
+                    after_in_child=restart_listener_after_fork)
+atexit.register(stop_listener)
+
+if invalid_levels:
+    logging.warning(f"Ignoring unknown log levels {', '.join(invalid_levels)}")
@@ -0,0 +1,138 @@
+"""This module coalesces concurrent summarization requests into batches for a single generate call"""
+
+import asyncio
+from typing import Callable, List, Optional, Tuple
+from src.text_summarization.pipeline.bounded_executor import BoundedExecutor
+from src.text_summarization.pipeline import metrics
+from src.text_summarization.logger import logging
+from src.text_summarization.exception import ServiceOverloadedError
+
+
+QueueItem = Tuple[List[str], Optional[str], asyncio.Future]
+
+
+class MicroBatchScheduler:
+    """
+    This class queues incoming texts and runs them through the model in dynamically sized batches. Every
+    batch uses a single generation profile, since one generate call cannot mix beam settings.
+    """
+
+    def __init__(self,
+                 predict_batch: Callable[[List[str], Optional[str]], List[str]],
+                 executor: BoundedExecutor,
+                 max_batch_size: int = 8,
+                 max_batch_wait_ms: float = 20,
+                 max_queue_depth: int = 64):
+        self.predict_batch = predict_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_batch_wait_ms = max_batch_wait_ms
+        self.max_queue_depth = max_queue_depth
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+
+    @property
+    def queue_depth(self) -> int:
+        """This property returns the number of requests waiting to be batched"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+
+    def start(self) -> None:
+        """This method starts one batching worker per executor thread on the running event loop"""
+        if not self._workers:
+            loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue(maxsize=self.max_queue_depth)
+            self._workers = [loop.create_task(self._run()) for _ in range(self.executor.max_workers)]
+            logging.info(f"Started MicroBatchScheduler with max_batch_size={self.max_batch_size}, "
+                         f"max_batch_wait_ms={self.max_batch_wait_ms} and max_queue_depth={self.max_queue_depth}")
+
+
+    async def stop(self) -> None:
+        """This method cancels the batching workers"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+    async def submit_batch(self, texts: List[str], profile: str = None) -> List[str]:
+        """
+        Method Name :   submit_batch
+        Description :   This method enqueues a group of texts that should stay together in one generate call,
+                        such as a length-sorted slice of a bulk request, and waits for their summaries
+        Output      :   list of summaries in the order of texts
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((texts, profile, future))
+        except asyncio.QueueFull:
+            raise ServiceOverloadedError(f"Prediction queue is full with {self.queue_depth} requests, retry later")
+        metrics.QUEUE_DEPTH.set(self.queue_depth)
+        return await future
+
+
+    async def submit(self, text: str, profile: str = None) -> str:
+        """This method enqueues a text and waits until its summary has been generated"""
+        summaries = await self.submit_batch([text], profile)
+        return summaries[0]
+
+
+    async def _collect_batch(self, carry_over: Optional[QueueItem]) -> Tuple[List[QueueItem], Optional[QueueItem]]:
+        """
+        Method Name :   _collect_batch
+        Description :   This method waits for the first request, then keeps collecting until the batch is full or
+                        the wait expires. An item that would overflow the batch, or that asks for a different
+                        generation profile, is carried over to the next one.
+        Output      :   collected items and the carried over item
+        """
+        loop = asyncio.get_running_loop()
+        batch = [carry_over if carry_over is not None else await self._queue.get()]
+        batch_size = len(batch[0][0])
+        profile = batch[0][1]
+        deadline = loop.time() + self.max_batch_wait_ms / 1000
+        carry_over = None
+
+        while batch_size < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item[1] != profile or batch_size + len(item[0]) > self.max_batch_size:
+                carry_over = item
+                break
+            batch.append(item)
+            batch_size += len(item[0])
+
+        metrics.QUEUE_DEPTH.set(self.queue_depth)
+        # Requests whose callers have gone away are not worth generating for
+        return [item for item in batch if not item[2].cancelled()], carry_over
+
+
+    async def _run(self) -> None:
+        """This method runs one generate per collected batch and fans the summaries back out"""
+        carry_over = None
+        while True:
+            batch, carry_over = await self._collect_batch(carry_over)
+            if not batch:
+                continue
+
+            texts = [text for item_texts, _, _ in batch for text in item_texts]
+            profile = batch[0][1]
+            logging.info(f"Running micro-batch of size {len(texts)} with generation profile {profile}")
+            try:
+                summaries = await self.executor.run(self.predict_batch, texts, profile)
+            except Exception as error:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+            else:
+                offset = 0
+                for item_texts, _, future in batch:
+                    if not future.done():
+                        future.set_result(summaries[offset : offset + len(item_texts)])
+                    offset += len(item_texts)
@@ -0,0 +1,67 @@
+"""This module runs blocking work off the event loop on a bounded pool of threads"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from src.text_summarization.logger import logging
+from src.text_summarization.exception import ServiceOverloadedError
+
+
+class BoundedExecutor:
+    """This class wraps a thread pool and rejects work once running plus queued tasks reach the limit"""
+
+    def __init__(self, name: str, max_workers: int, max_queue_depth: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue_depth)
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+
+    @property
+    def in_flight(self) -> int:
+        """This property returns the number of running and queued tasks"""
+        return self._in_flight
+
+
+    def _release(self, _future) -> None:
+        with self._in_flight_lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+
+    def submit(self, func, *args, **kwargs) -> asyncio.Future:
+        """
+        Method Name :   submit
+        Description :   This method schedules func on the pool and returns an awaitable for its result. The
+                        slot is only released when the thread finishes, so cancelled callers still count
+                        against the limit until their work is actually done.
+        Output      :   asyncio future of func's return value, ServiceOverloadedError when the pool is saturated
+        """
+        if not self._slots.acquire(blocking=False):
+            logging.warning(f"{self.name} executor is saturated with {self.in_flight} tasks")
+            raise ServiceOverloadedError(f"{self.name} executor is saturated, retry later")
+
+        with self._in_flight_lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(partial(func, *args, **kwargs))
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+
+        return asyncio.wrap_future(future)
+
+
+    async def run(self, func, *args, **kwargs):
+        """This method executes func on the pool without blocking the event loop and returns its result"""
+        return await self.submit(func, *args, **kwargs)
+
+
+    def shutdown(self, wait: bool = False) -> None:
+        """This method stops accepting work and tears the pool down"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,156 @@
+"""This module summarizes large CSV or JSONL corpora offline with resumable checkpoints"""
+
+import csv
+import json
+import os
+import sys
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+from src.text_summarization.config.config_manager import ConfigurationManager
+from src.text_summarization.pipeline.prediction_pipeline import PredictionPipeline
+from src.text_summarization.logger import logging
+from src.text_summarization.exception import TextSummarizerException
+
+
+class BulkSummarizationPipeline:
+    """
+    This class streams records from a file through the model in batches and appends summaries as JSONL. By
+    default the model is downloaded into the bulk summarization directories, apart from the serving model.
+    """
+
+    def __init__(self,
+                 input_path: str,
+                 output_path: str,
+                 text_column: str = "dialogue",
+                 id_column: str = "id",
+                 batch_size: int = None,
+                 window_batches: int = 8,
+                 profile: str = None,
+                 prediction_pipeline: PredictionPipeline = None):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint_path = output_path + ".checkpoint.json"
+        self.text_column = text_column
+        self.id_column = id_column
+        self.prediction_pipeline = (prediction_pipeline if prediction_pipeline is not None else
+                                    PredictionPipeline(config=ConfigurationManager().get_bulk_prediction_pipeline_config()))
+        self.batch_size = batch_size or self.prediction_pipeline.config.max_batch_size
+        self.window_size = self.batch_size * window_batches
+        self.profile = profile
+
+
+    def read_records(self, start_offset: int = 0) -> Iterator[Tuple[int, Dict]]:
+        """This method lazily yields (offset, record) pairs from the CSV or JSONL input, skipping start_offset records"""
+        with open(self.input_path, newline="", encoding="utf-8") as file:
+            if self.input_path.endswith((".jsonl", ".ndjson")):
+                records = (json.loads(line) for line in file if line.strip())
+            else:
+                records = csv.DictReader(file)
+            yield from enumerate(islice(records, start_offset, None), start=start_offset)
+
+
+    @staticmethod
+    def generate_windows(records: Iterator[Tuple[int, Dict]], window_size: int) -> Iterator[List[Tuple[int, Dict]]]:
+        """This method groups the record stream into bounded windows so that memory stays flat"""
+        while True:
+            window = list(islice(records, window_size))
+            if not window:
+                return
+            yield window
+
+
+    def get_run_identity(self) -> Dict:
+        """This method describes what the output is made from, so that a checkpoint is only resumed for the same run"""
+        input_stat = os.stat(self.input_path)
+        return {
+            "input_path": os.path.abspath(self.input_path),
+            "input_size": input_stat.st_size,
+            "input_mtime_ns": input_stat.st_mtime_ns,
+            "text_column": self.text_column,
+            "id_column": self.id_column,
+            "profile": self.profile or self.prediction_pipeline.config.generation_profile
+        }
+
+
+    def load_checkpoint(self) -> Tuple[int, int]:
+        """
+        This method returns the next offset to process and the output size that offset corresponds to. A checkpoint
+        written for another input file, a modified input or other settings is refused, since resuming from it
+        would append to output that does not belong to this run.
+        """
+        if not os.path.exists(self.checkpoint_path):
+            return 0, 0
+
+        with open(self.checkpoint_path, "r") as file:
+            checkpoint = json.load(file)
+
+        if checkpoint.get("run") != self.get_run_identity():
+            raise ValueError(f"Checkpoint {self.checkpoint_path} was written for {checkpoint.get('run')}, not for "
+                             f"{self.get_run_identity()}. Remove it and {self.output_path}, or choose another "
+                             f"output path, to summarize from the start.")
+        logging.info(f"Resuming bulk summarization from checkpoint {checkpoint}")
+
+        return checkpoint["offset"], checkpoint["output_bytes"]
+
+
+    def save_checkpoint(self, offset: int, output_bytes: int) -> None:
+        """This method atomically records that every record before offset has been written"""
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"offset": offset, "output_bytes": output_bytes, "run": self.get_run_identity()}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+
+
+    def summarize_window(self, window: List[Tuple[int, Dict]]) -> List[str]:
+        """This method summarizes one window in length-sorted batches and returns summaries in input order"""
+        texts = [record.get(self.text_column) or "" for _, record in window]
+        summaries = [None] * len(texts)
+
+        for indices in self.prediction_pipeline.get_length_sorted_batches(texts, self.batch_size):
+            batch_summaries = self.prediction_pipeline.predict_batch([texts[index] for index in indices], self.profile)
+            for index, summary in zip(indices, batch_summaries):
+                summaries[index] = summary
+
+        return summaries
+
+
+    def run(self) -> int:
+        """
+        Method Name :   run
+        Description :   This method summarizes every record after the last checkpoint. Output written after the
+                        checkpoint by an interrupted run is truncated away before resuming, so no record is
+                        duplicated or lost.
+        Output      :   number of records summarized in this run
+        """
+        try:
+            logging.info(f"Inside BulkSummarizationPipeline.run for {self.input_path}")
+            offset, output_bytes = self.load_checkpoint()
+            processed = 0
+
+            with open(self.output_path, "ab") as output_file:
+                output_file.truncate(output_bytes)
+
+                for window in self.generate_windows(self.read_records(offset), self.window_size):
+                    summaries = self.summarize_window(window)
+
+                    lines = [
+                        json.dumps({"offset": record_offset, "id": record.get(self.id_column), "summary": summary})
+                        for (record_offset, record), summary in zip(window, summaries)
+                    ]
+                    output_file.write(("\n".join(lines) + "\n").encode("utf-8"))
+                    output_file.flush()
+                    os.fsync(output_file.fileno())
+
+                    offset = window[-1][0] + 1
+                    processed += len(window)
+                    self.save_checkpoint(offset, output_file.tell())
+                    logging.info(f"Summarized records up to offset {offset}")
+
+            logging.info(f"Completed BulkSummarizationPipeline.run with {processed} records summarized")
+            return processed
+
+        except Exception as error:
+            logging.exception(error)
+            raise TextSummarizerException(error, sys) from error
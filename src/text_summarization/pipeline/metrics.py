@@ -0,0 +1,95 @@
+"""This module defines the Prometheus metrics of the summarization service and renders them for /metrics"""
+
+import os
+from typing import List, Tuple
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+REQUESTS = Counter(
+    "summarization_requests", "HTTP requests by endpoint and status code", ["endpoint", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "summarization_request_duration_seconds", "Time until the response starts, by endpoint", ["endpoint"],
+    buckets=LATENCY_BUCKETS
+)
+QUEUE_DEPTH = Gauge(
+    "summarization_queue_depth", "Requests waiting in the micro-batch queue", multiprocess_mode="livesum"
+)
+BATCH_SIZE = Histogram(
+    "summarization_batch_size", "Texts per generate call", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+STAGE_LATENCY = Histogram(
+    "summarization_stage_duration_seconds", "Time spent per generate call in each inference stage", ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+INPUT_TOKENS = Histogram(
+    "summarization_input_tokens", "Tokens per input text after truncation", buckets=TOKEN_BUCKETS
+)
+OUTPUT_TOKENS = Histogram(
+    "summarization_output_tokens", "Tokens per generated summary", buckets=TOKEN_BUCKETS
+)
+GENERATED_TOKENS = Counter(
+    "summarization_generated_tokens", "Generated summary tokens, whose rate is the service-wide tokens per second"
+)
+GENERATION_TOKENS_PER_SECOND = Histogram(
+    "summarization_generation_tokens_per_second", "Generated tokens per second of each generate call",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+)
+CACHE_LOOKUPS = Counter(
+    "summarization_cache_lookups", "Summary cache lookups by result", ["result"]
+)
+MODEL_INFO = Gauge(
+    "summarization_model_info", "1 for the model version and backend that is serving", ["version", "backend"],
+    multiprocess_mode="max"
+)
+
+_model_labels = None
+
+
+def observe_generation(input_lengths: List[int], output_lengths: List[int], generate_seconds: float) -> None:
+    """This method records the batch size, token counts and throughput of one generate call"""
+    BATCH_SIZE.observe(len(input_lengths))
+    for length in input_lengths:
+        INPUT_TOKENS.observe(length)
+    for length in output_lengths:
+        OUTPUT_TOKENS.observe(length)
+
+    generated_tokens = sum(output_lengths)
+    GENERATED_TOKENS.inc(generated_tokens)
+    if generate_seconds > 0:
+        GENERATION_TOKENS_PER_SECOND.observe(generated_tokens / generate_seconds)
+
+
+def clear_model_info() -> None:
+    """This method stops reporting a serving model from this process"""
+    global _model_labels
+    if _model_labels is not None:
+        MODEL_INFO.labels(*_model_labels).set(0)
+    _model_labels = None
+
+
+def set_model_info(version: str, backend: str) -> None:
+    """This method marks version as the serving model and clears the previous one"""
+    global _model_labels
+    clear_model_info()
+    _model_labels = (version, backend)
+    MODEL_INFO.labels(*_model_labels).set(1)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Method Name :   render_metrics
+    Description :   This method renders every metric in the Prometheus text format. When
+                    PROMETHEUS_MULTIPROC_DIR is set, as under gunicorn, the values written by all workers
+                    are aggregated, so that a scrape sees the whole pod rather than the worker it reached.
+    Output      :   response body and content type
+    """
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,48 @@
+"""This module keeps the serving model up to date with the model bucket in the background"""
+
+import threading
+from src.text_summarization.pipeline.prediction_pipeline import PredictionPipeline
+from src.text_summarization.logger import logging
+
+
+class ModelRefresher:
+    """This class polls S3 on a schedule and swaps in new model versions off the request path"""
+
+    def __init__(self, prediction_pipeline: PredictionPipeline, interval_seconds: float,
+                 stop_timeout_seconds: float = 5.0):
+        self.prediction_pipeline = prediction_pipeline
+        self.interval_seconds = interval_seconds
+        self.stop_timeout_seconds = stop_timeout_seconds
+        self._stop_event = threading.Event()
+        self._thread = None
+
+
+    def start(self) -> None:
+        """This method starts the polling thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="model-refresher", daemon=True)
+            self._thread.start()
+            logging.info(f"Started ModelRefresher polling every {self.interval_seconds} seconds")
+
+
+    def stop(self) -> None:
+        """This method asks the polling thread to exit and waits for it for at most stop_timeout_seconds"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(self.stop_timeout_seconds)
+            if self._thread.is_alive():
+                # The thread is a daemon, so a refresh stuck in a download does not hold the process back
+                logging.warning(f"ModelRefresher did not stop within {self.stop_timeout_seconds} seconds")
+            self._thread = None
+
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                if self.prediction_pipeline.refresh_model():
+                    logging.info(f"ModelRefresher activated model version "
+                                 f"{self.prediction_pipeline.model_registry.current.version}")
+            except Exception as error:
+                # A failed poll keeps the current model serving and is retried on the next tick
+                logging.exception(f"ModelRefresher failed to refresh the model: {error}")
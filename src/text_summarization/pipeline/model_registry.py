@@ -0,0 +1,232 @@
+"""This module keeps the summarization models loaded in memory and shares them across requests"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from dataclasses import dataclass
+from itertools import chain
+from typing import Any, Dict, List, Optional, Tuple
+import torch
+from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer, GenerationConfig
+from src.text_summarization.logger import logging
+from src.text_summarization.exception import TextSummarizerException
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """This class holds a warm model together with its tokenizer"""
+    version: str
+    backend: str
+    model_path: str
+    tokenizer_path: str
+    tokenizer: Any
+    model: Any
+
+
+class ModelRegistry:
+    """This class encapsulates a process-wide cache of loaded models keyed by model path, version and backend"""
+
+    BACKENDS = ("pytorch", "pytorch-int8", "onnx", "onnx-int8")
+    SAFETENSORS_DTYPES = {
+        "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+        "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+        "U8": torch.uint8, "BOOL": torch.bool
+    }
+
+    def __init__(self, mmap_weights: bool = True):
+        self.mmap_weights = mmap_weights
+        self._models: Dict[Tuple[str, str, str, str], LoadedModel] = {}
+        self._current: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+
+
+    @property
+    def current(self) -> Optional[LoadedModel]:
+        """This property returns the model that is currently serving requests"""
+        return self._current
+
+
+    @staticmethod
+    def get_model_version(*directories) -> str:
+        """
+        Method Name :   get_model_version
+        Description :   This method fingerprints the model files on disk using their names, sizes and
+                        modification times, so that a re-downloaded model gets a new version
+        Output      :   short hex digest identifying the model version
+        """
+        digest = hashlib.sha256()
+        for directory in directories:
+            if not os.path.exists(directory):
+                continue
+            for file in sorted(os.listdir(directory)):
+                stat = os.stat(os.path.join(directory, file))
+                digest.update(f"{directory}/{file}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()[:16]
+
+
+    @staticmethod
+    def get_safetensors_files(model_path: str) -> List[str]:
+        """This method returns the safetensors weight files of a model directory, following the shard index"""
+        index_file = os.path.join(model_path, "model.safetensors.index.json")
+        if os.path.exists(index_file):
+            with open(index_file, "r") as file:
+                shards = sorted(set(json.load(file)["weight_map"].values()))
+            return [os.path.join(model_path, shard) for shard in shards]
+
+        weights_file = os.path.join(model_path, "model.safetensors")
+        return [weights_file] if os.path.exists(weights_file) else []
+
+
+    @classmethod
+    def mmap_safetensors(cls, weights_file: str) -> Dict[str, torch.Tensor]:
+        """
+        This method maps a safetensors file into memory and returns its tensors as views of the mapping. The
+        mapping is private and read through the page cache, so pages are only read when first touched and
+        are shared by every process that maps the same file.
+        """
+        with open(weights_file, "rb") as file:
+            header_size = struct.unpack("<Q", file.read(8))[0]
+            header = json.loads(file.read(header_size))
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        buffer = torch.frombuffer(mapped, dtype=torch.uint8)
+        data_start = 8 + header_size
+        tensors = {}
+        for name, info in header.items():
+            if name == "__metadata__":
+                continue
+            begin, end = info["data_offsets"]
+            tensors[name] = (buffer[data_start + begin : data_start + end]
+                             .view(cls.SAFETENSORS_DTYPES[info["dtype"]])
+                             .reshape(info["shape"]))
+        return tensors
+
+
+    def _load_mmap_model(self, model_path: str):
+        """
+        Method Name :   _load_mmap_model
+        Description :   This method builds the model on the meta device, without allocating or initializing
+                        weights, and assigns the memory-mapped safetensors tensors as its parameters. Weights
+                        that were not saved, such as tied embeddings, are re-tied afterwards.
+        Output      :   model whose weights live in the mapped files, or None when the model directory has
+                        no safetensors weights or the weights cannot be mapped
+        """
+        weights_files = self.get_safetensors_files(model_path)
+        if not weights_files:
+            logging.info(f"{model_path} has no safetensors weights, loading them into memory")
+            return None
+
+        try:
+            state_dict = {}
+            for weights_file in weights_files:
+                state_dict.update(self.mmap_safetensors(weights_file))
+
+            with torch.device("meta"):
+                model = AutoModelForSeq2SeqLM.from_config(AutoConfig.from_pretrained(model_path))
+            model.load_state_dict(state_dict, strict=False, assign=True)
+            model.tie_weights()
+
+            unloaded = [name for name, tensor in chain(model.named_parameters(), model.named_buffers())
+                        if tensor.is_meta]
+            if unloaded:
+                logging.warning(f"{model_path} has no weights for {unloaded}, loading them into memory")
+                return None
+
+            if os.path.exists(os.path.join(model_path, "generation_config.json")):
+                model.generation_config = GenerationConfig.from_pretrained(model_path)
+            return model.eval()
+
+        except (RuntimeError, ValueError, KeyError) as error:
+            logging.warning(f"Could not memory-map the weights in {model_path} ({error}), loading them into memory")
+            return None
+
+
+    def _load(self, model_path: str, tokenizer_path: str, version: str, backend: str) -> LoadedModel:
+        """
+        This method deserializes the tokenizer and model from disk. The onnx backends load the encoder,
+        decoder and decoder-with-past graphs into ONNX Runtime sessions, which expose the same generate API;
+        onnx-int8 points at graphs that were quantized at export time. The pytorch backend memory-maps
+        safetensors weights when mmap_weights is set. The pytorch-int8 backend quantizes the Linear layers of
+        the PyTorch model to dynamic int8 on load, which needs its own copy of the weights anyway.
+        """
+        logging.info(f"Loading {backend} model version {version} from {model_path} with tokenizer {tokenizer_path}")
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+        if backend.startswith("onnx"):
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+            model = ORTModelForSeq2SeqLM.from_pretrained(model_path, use_cache=True)
+        else:
+            model = None
+            if self.mmap_weights and backend == "pytorch":
+                model = self._load_mmap_model(model_path)
+            if model is None:
+                model = AutoModelForSeq2SeqLM.from_pretrained(model_path, low_cpu_mem_usage=True)
+            model.eval()
+            if backend == "pytorch-int8":
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        logging.info(f"Loaded model version {version}")
+
+        return LoadedModel(
+            version = version,
+            backend = backend,
+            model_path = model_path,
+            tokenizer_path = tokenizer_path,
+            tokenizer = tokenizer,
+            model = model
+        )
+
+
+    def get(self, model_path: str, tokenizer_path: str, version: str = None, backend: str = "pytorch") -> LoadedModel:
+        """
+        Method Name :   get
+        Description :   This method returns the warm model for model_path, loading it only when the
+                        requested version is not in memory yet
+        Output      :   LoadedModel
+        """
+        try:
+            if backend not in self.BACKENDS:
+                raise ValueError(f"Unknown inference backend {backend}, expected one of {self.BACKENDS}")
+            if version is None:
+                version = self.get_model_version(model_path, tokenizer_path)
+
+            key = (model_path, tokenizer_path, version, backend)
+            loaded_model = self._models.get(key)
+            if loaded_model is not None:
+                return loaded_model
+
+            with self._lock:
+                loaded_model = self._models.get(key)
+                if loaded_model is None:
+                    loaded_model = self._load(model_path, tokenizer_path, version, backend)
+                    self._models[key] = loaded_model
+
+            return loaded_model
+
+        except Exception as error:
+            logging.exception(error)
+            raise TextSummarizerException(error, sys) from error
+
+
+    def activate(self, loaded_model: LoadedModel) -> None:
+        """
+        Method Name :   activate
+        Description :   This method atomically makes loaded_model the serving model and evicts every other
+                        version. Batches already running keep their own reference to the previous model.
+        Output      :   None
+        """
+        with self._lock:
+            self._current = loaded_model
+            for stale_key in [k for k, v in self._models.items() if v is not loaded_model]:
+                logging.info(f"Evicting model version {stale_key[2]} of {stale_key[0]}")
+                del self._models[stale_key]
+        logging.info(f"Activated model version {loaded_model.version}")
+
+
+    def clear(self) -> None:
+        """This method drops every loaded model from the registry"""
+        with self._lock:
+            self._models.clear()
+            self._current = None
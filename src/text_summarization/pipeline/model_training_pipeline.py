@@ -1,3 +1,4 @@
+import importlib.util
 from src.text_summarization.config.config_manager import ConfigurationManager
 from src.text_summarization.components.data_ingestion import DataIngestion
 from src.text_summarization.components.data_transformations import DataTransformation
@@ -5,6 +6,7 @@ from src.text_summarization.components.data_validation import DataValiadtion
 from src.text_summarization.components.model_evaluation import ModelEvaluation
 from src.text_summarization.components.model_trainer import ModelTraining
 from src.text_summarization.components.model_pusher import ModelPusher
+from src.text_summarization.components.model_exporter import ModelExporter
 from src.text_summarization.logger import logging
 
 
@@ -93,6 +95,30 @@ class ModelEvaluationPipeline:
         logging.info("Completed execution of ModelEvaluationPipeline.main of model_training_pipeline module")
 
 
+class ModelExportPipeline:
+    """This class contains the methods that triggers the Model Export Pipeline"""
+    def __init__(self):
+        pass
+
+    def main(self):
+        """This method triggers the Model Export Pipeline"""
+        logging.info("Inside ModelExportPipeline.main of model_training_pipeline module")
+        if importlib.util.find_spec("optimum") is None:
+            logging.warning("optimum is not installed, skipping the ONNX export")
+            return
+        config = ConfigurationManager()
+        model_export_config = config.get_model_export_config()
+        model_exporter = ModelExporter(config = model_export_config)
+        # ModelPusher only publishes an accepted model, so exporting a rejected one would be wasted work
+        if not model_exporter.is_model_accepted():
+            logging.info("Trained model was not accepted by model evaluation, skipping the ONNX export")
+            return
+        ort_models = {"onnx": model_exporter.export()}
+        ort_models["onnx-int8"] = model_exporter.quantize()
+        model_exporter.check_parity(ort_models)
+        logging.info("Completed execution of ModelExportPipeline.main of model_training_pipeline module")
+
+
 class ModelPusherPipeline:
     """This class contains the methods that triggers the Model Pusher Pipeline"""
     def __init__(self):
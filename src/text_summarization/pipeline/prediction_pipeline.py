@@ -1,77 +1,647 @@
-from datetime import datetime, timedelta
+import fcntl
 import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList, TextStreamer
 from src.text_summarization.config.config_manager import ConfigurationManager
 from src.text_summarization.config.aws_storage_operations import S3Operations
-from transformers import AutoTokenizer
-from transformers import pipeline
+from src.text_summarization.entity import PredictionPipelineConfig
+from src.text_summarization.pipeline.model_registry import ModelRegistry, LoadedModel
+from src.text_summarization.pipeline.summary_cache import SummaryCache
+from src.text_summarization.pipeline import metrics
+from src.text_summarization.utils.common_utils import get_generation_kwargs
 from src.text_summarization.logger import logging
 
 
+class CallbackTextStreamer(TextStreamer):
+    """This class hands every decoded chunk of a summary to a callback as generate produces it"""
+    def __init__(self, tokenizer, on_text: Callable[[str], None]):
+        # The first chunk put by an encoder-decoder is the decoder start token, which skip_prompt drops
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.on_text = on_text
+
+
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        if text:
+            self.on_text(text)
+
+
+
+class CancellationCriteria(StoppingCriteria):
+    """This class stops generation at the next decoding step once cancel_event is set"""
+    def __init__(self, cancel_event: threading.Event):
+        self.cancel_event = cancel_event
+
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs):
+        return torch.full((input_ids.shape[0],), self.cancel_event.is_set(),
+                          dtype=torch.bool, device=input_ids.device)
+
+
+
+WARMUP_DIALOGUE = ("Hannah: Hey, do you have Betty's number?\nAmanda: Lemme check\nAmanda: Sorry, can't find it.\n"
+                   "Amanda: Ask Larry\nAmanda: He called her last time we were at the park together\n")
+
+
 class PredictionPipeline:
-    def __init__(self):
-        self.config = ConfigurationManager().get_prediction_pipeline_config()
+    def __init__(self, model_registry: ModelRegistry = None, summary_cache: SummaryCache = None,
+                 config: PredictionPipelineConfig = None):
+        self.config = config if config is not None else ConfigurationManager().get_prediction_pipeline_config()
         self.s3 = S3Operations()
+        self.model_registry = (model_registry if model_registry is not None
+                               else ModelRegistry(mmap_weights=self.config.mmap_model_weights))
+        self.summary_cache = summary_cache
+        self._refresh_lock = threading.Lock()
+        self.load_timeline: Dict = {}
+        self.warmup_on_activate = True
+        self.warmed_versions = set()
+        self.remove_stale_staging_dirs()
+
+
+    def get_model_prefix(self, backend: str) -> str:
+        """This method returns the prefix of a model version that holds the weights loaded by backend"""
+        return {
+            "onnx": self.config.onnx_prefix,
+            "onnx-int8": self.config.onnx_int8_prefix
+        }.get(backend, self.config.model_prefix)
+
+
+    def get_version_paths(self, version: str) -> Tuple[str, str, str]:
+        """
+        This method returns the local model and tokenizer directories of a model version for the configured
+        backend, falling back to PyTorch when the version was published without the ONNX export it needs
+        """
+        version_dir = os.path.join(self.config.model_versions_dir, version)
+        tokenizer_path = os.path.join(version_dir, self.config.tokenizer_prefix)
+        backend = self.config.inference_backend
+
+        if backend.startswith("onnx"):
+            onnx_path = os.path.join(version_dir, self.get_model_prefix(backend))
+            if os.path.exists(onnx_path):
+                return onnx_path, tokenizer_path, backend
+            backend = backend.replace("onnx", "pytorch")
+            logging.warning(f"Model version {version} has no {self.config.inference_backend} export, "
+                            f"serving it with {backend}")
+
+        return os.path.join(version_dir, self.config.model_prefix), tokenizer_path, backend
+
+
+    def get_model_prefixes(self) -> List[str]:
+        """This method returns the S3 prefixes the configured backend needs from a model version"""
+        prefixes = [self.config.model_prefix, self.config.tokenizer_prefix]
+        if self.config.inference_backend.startswith("onnx"):
+            prefixes.append(self.get_model_prefix(self.config.inference_backend))
+        return prefixes
+
+
+    def get_local_version(self) -> Optional[str]:
+        """This method returns the version that was last activated on this node, if it is still on disk"""
+        if not os.path.exists(self.config.current_version_file):
+            return None
+        with open(self.config.current_version_file, "r") as file:
+            version = file.read().strip()
+        return version if os.path.exists(os.path.join(self.config.model_versions_dir, version)) else None
+
+
+    def get_remote_version(self) -> Tuple[Optional[str], str]:
+        """
+        This method resolves the pointer object written by ModelPusher to the published version and the prefix
+        it is stored under. Buckets without a pointer fall back to the legacy flat layout, versioned by a
+        signature of the listed objects.
+        """
+        pointer = self.s3.read_json(self.config.model_bucket_name, self.config.model_pointer_key)
+        if pointer is not None:
+            return pointer["version"], f"{self.config.model_versions_prefix}/{pointer['version']}"
+
+        version = self.s3.get_model_signature(
+            self.config.model_bucket_name,
+            [self.config.model_prefix, self.config.tokenizer_prefix]
+        )
+        return version, ""
+
+
+    def remove_stale_staging_dirs(self) -> None:
+        """This method deletes the per-process staging directories, named <version>.<pid>, of earlier releases"""
+        if not os.path.isdir(self.config.model_staging_dir):
+            return
+        for name in os.listdir(self.config.model_staging_dir):
+            staging_dir = os.path.join(self.config.model_staging_dir, name)
+            if name.rpartition(".")[2].isdigit() and os.path.isdir(staging_dir):
+                logging.info(f"Removing stale staging directory {staging_dir}")
+                shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+    def download_model_version(self, version: str, version_prefix: str) -> None:
+        """
+        This method downloads the model and tokenizer into a staging directory and renames it into place,
+        so that a version directory is either complete or absent. The staging directory of a version is
+        shared by the processes on the node and guarded by a lock file, so one process downloads while the
+        others wait, and the files verified before a restart are kept and skipped on the next attempt.
+        """
+        version_dir = os.path.join(self.config.model_versions_dir, version)
+        if os.path.exists(version_dir):
+            logging.info(f"Model version {version} is already available in {version_dir}")
+            return
+
+        os.makedirs(self.config.model_staging_dir, exist_ok=True)
+        staging_dir = os.path.join(self.config.model_staging_dir, version)
+        with open(staging_dir + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if os.path.exists(version_dir):
+                    logging.info(f"Model version {version} was downloaded concurrently by another process")
+                    return
+
+                # Seeding the staging directory with hard links to the serving version lets the download skip
+                # every file whose ETag is unchanged. Downloads replace files by rename, so the links are never
+                # written to, and seeded files or folders the new version does not list are deleted before it
+                # is renamed into place. A staging directory left by an interrupted download is resumed instead.
+                local_version = self.get_local_version()
+                if local_version is not None and not os.path.exists(staging_dir):
+                    shutil.copytree(os.path.join(self.config.model_versions_dir, local_version), staging_dir,
+                                    copy_function=os.link)
+
+                logging.info(f"Dowloading model version {version} from S3 Bucket into {staging_dir}")
+                self.s3.download_model_version(
+                    self.config.model_bucket_name,
+                    version_prefix,
+                    self.get_model_prefixes(),
+                    staging_dir
+                )
+
+                os.makedirs(self.config.model_versions_dir, exist_ok=True)
+                os.rename(staging_dir, version_dir)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+    @staticmethod
+    def get_task_params(loaded_model: LoadedModel) -> Dict:
+        """This method returns the summarization settings the model config carries in task_specific_params"""
+        task_params = getattr(loaded_model.model.config, "task_specific_params", None) or {}
+        return dict(task_params.get("summarization", {}))
+
+
+    def get_prefix(self, loaded_model: LoadedModel) -> str:
+        """This method returns the task prefix put before every input, e.g. "summarize: " for T5 models"""
+        return loaded_model.model.config.prefix or self.get_task_params(loaded_model).get("prefix") or ""
+
+
+    def resolve_generation_kwargs(self, loaded_model: LoadedModel, profile: str = None) -> Dict:
+        """
+        This method returns the generate kwargs of a profile on top of the summarization settings of the model
+        config, as the transformers summarization pipeline applied them, so that settings the profile does not
+        name, such as min_length and no_repeat_ngram_size, still apply
+        """
+        gen_kwargs = self.get_task_params(loaded_model)
+        gen_kwargs.pop("prefix", None)
+        gen_kwargs.update(get_generation_kwargs(profile or self.config.generation_profile))
+        return gen_kwargs
+
+
+    def warmup(self, loaded_model: LoadedModel) -> float:
+        """
+        Method Name :   warmup
+        Description :   This method runs a synthetic batch at each of the WARMUP_INPUT_TOKENS lengths through the
+                        serving code path with the default generation profile, so that kernel selection,
+                        allocator growth and other first-call costs are paid before the model takes traffic.
+                        Generation stops after WARMUP_MAX_NEW_TOKENS tokens to keep startup short.
+        Output      :   seconds spent warming up
+        """
+        start_time = time.perf_counter()
+        tokenizer = loaded_model.tokenizer
+        gen_kwargs = self.resolve_generation_kwargs(loaded_model)
+        gen_kwargs.pop("max_length", None)
+        gen_kwargs.pop("min_length", None)
+        gen_kwargs["max_new_tokens"] = self.config.warmup_max_new_tokens
+
+        sample_ids = tokenizer(WARMUP_DIALOGUE, add_special_tokens=False)["input_ids"]
+        for input_tokens in self.config.warmup_input_tokens:
+            input_ids = (sample_ids * (input_tokens // len(sample_ids) + 1))[:input_tokens]
+            text = tokenizer.decode(input_ids, skip_special_tokens=True)
+            self.generate_summaries(loaded_model, [text] * self.config.warmup_batch_size, gen_kwargs)
+            logging.info(f"Warmed up model version {loaded_model.version} on "
+                         f"{self.config.warmup_batch_size} x {input_tokens} tokens")
+
+        self.warmed_versions.add(loaded_model.version)
+        return time.perf_counter() - start_time
+
+
+    def ensure_warm(self) -> LoadedModel:
+        """This method returns the serving model, fetching it first if needed, and warms it up unless this process already has"""
+        loaded_model = self.load_model()
+        if loaded_model.version not in self.warmed_versions:
+            self.load_timeline["warmup_seconds"] = round(self.warmup(loaded_model), 3)
+            logging.info(f"Model load timeline - {self.load_timeline}")
+        metrics.set_model_info(loaded_model.version, loaded_model.backend)
+        return loaded_model
+
+
+    def is_ready(self) -> bool:
+        """This method returns whether a model is serving and has been warmed up in this process"""
+        current = self.model_registry.current
+        return current is not None and current.version in self.warmed_versions
+
+
+    def mark_versions_in_use(self, *versions: Optional[str]) -> None:
+        """
+        This method records the versions this process serves or is about to load, so that the other processes
+        keep them on disk
+        """
+        os.makedirs(self.config.model_in_use_dir, exist_ok=True)
+        marker_path = os.path.join(self.config.model_in_use_dir, str(os.getpid()))
+        with open(marker_path + ".tmp", "w") as file:
+            file.write("\n".join(version for version in versions if version is not None))
+        os.replace(marker_path + ".tmp", marker_path)
+
+
+    def get_versions_in_use(self) -> Set[str]:
+        """This method returns the versions served by live processes and drops the records of exited ones"""
+        if not os.path.isdir(self.config.model_in_use_dir):
+            return set()
+
+        versions = set()
+        for name in os.listdir(self.config.model_in_use_dir):
+            if not name.isdigit():
+                continue
+            marker_path = os.path.join(self.config.model_in_use_dir, name)
+            try:
+                os.kill(int(name), 0)
+            except ProcessLookupError:
+                os.remove(marker_path)
+                continue
+            except PermissionError:
+                # The process exists but belongs to another user
+                pass
+            try:
+                with open(marker_path, "r") as file:
+                    versions.update(file.read().split())
+            except OSError:
+                continue
+        return versions
+
+
+    def remove_unused_versions(self) -> None:
+        """
+        This method deletes the downloaded versions that no live process on the node serves. Workers refresh on
+        their own schedule, and a preloading gunicorn master keeps the version it forks new workers with, so a
+        version other than this process's may still be loaded, memory-mapped or used to seed a download.
+        """
+        keep_versions = self.get_versions_in_use()
+        keep_versions.add(self.get_local_version())
+        for version in os.listdir(self.config.model_versions_dir):
+            if version not in keep_versions:
+                logging.info(f"Removing model version {version}, which no process on this node serves")
+                shutil.rmtree(os.path.join(self.config.model_versions_dir, version), ignore_errors=True)
+
+
+    def activate_model_version(self, version: str, download_seconds: float = 0.0) -> LoadedModel:
+        """
+        This method loads a downloaded version, warms it up, swaps it in for serving and removes the versions
+        no process serves any more from disk. The time spent downloading, loading and warming up is logged as
+        the model load timeline.
+        """
+        current = self.model_registry.current
+        self.mark_versions_in_use(version, current.version if current is not None else None)
+
+        model_path, tokenizer_path, backend = self.get_version_paths(version)
+        start_time = time.perf_counter()
+        loaded_model = self.model_registry.get(model_path, tokenizer_path, version, backend)
+        load_seconds = time.perf_counter() - start_time
+
+        # A preloading gunicorn master leaves the warmup to the workers, so that no torch thread pool exists before fork
+        warmup_seconds = self.warmup(loaded_model) if self.warmup_on_activate else 0.0
+
+        self.model_registry.activate(loaded_model)
+        metrics.set_model_info(version, backend)
+        self.load_timeline = {
+            "version": version,
+            "backend": backend,
+            "mmap_weights": self.config.mmap_model_weights,
+            "download_seconds": round(download_seconds, 3),
+            "load_seconds": round(load_seconds, 3),
+            "warmup_seconds": round(warmup_seconds, 3),
+            "total_seconds": round(download_seconds + load_seconds + warmup_seconds, 3)
+        }
+        logging.info(f"Model load timeline - {self.load_timeline}")
+
+        with open(self.config.current_version_file, "w") as file:
+            file.write(version)
+
+        self.mark_versions_in_use(version)
+        self.remove_unused_versions()
+
+        return loaded_model
+
+
+    def refresh_model(self) -> bool:
+        """
+        This method compares the model objects in S3 with the serving version and, when they differ, downloads
+        and activates the new version. When S3 cannot be reached and nothing is serving yet, the version last
+        activated on this node is loaded instead.
+        Returns True when a new version was activated.
+        """
+        with self._refresh_lock:
+            current = self.model_registry.current
+            try:
+                version, version_prefix = self.get_remote_version()
+            except Exception as error:
+                local_version = self.get_local_version()
+                if current is None and local_version is not None:
+                    logging.warning(f"S3 is unavailable ({error}), falling back to local model version {local_version}")
+                    self.activate_model_version(local_version)
+                    return True
+                raise
+
+            if version is None:
+                logging.warning(f"No model found in bucket {self.config.model_bucket_name}")
+                local_version = self.get_local_version()
+                if current is None and local_version is not None:
+                    self.activate_model_version(local_version)
+                    return True
+                return False
+
+            if current is not None and current.version == version:
+                logging.info(f"Model version {version} is up to date")
+                return False
+
+            # The new version is marked before it is downloaded, so that no other process removes it before it is loaded
+            self.mark_versions_in_use(version, current.version if current is not None else None)
+            start_time = time.perf_counter()
+            self.download_model_version(version, version_prefix)
+            self.activate_model_version(version, time.perf_counter() - start_time)
+            return True
+
+
+    def load_model(self) -> LoadedModel:
+        """This method returns the serving model, fetching it first if nothing has been activated yet"""
+        loaded_model = self.model_registry.current
+        if loaded_model is None:
+            self.refresh_model()
+            loaded_model = self.model_registry.current
+            if loaded_model is None:
+                raise FileNotFoundError("No summarization model is available locally or in S3")
+
+        return loaded_model
+
+
+    def get_length_sorted_batches(self, texts: List[str], batch_size: int) -> List[List[int]]:
+        """
+        Method Name :   get_length_sorted_batches
+        Description :   This method groups texts of similar tokenized length so that padding inside each
+                        batch is minimal
+        Output      :   list of batches, each a list of indices into texts
+        """
+        tokenizer = self.load_model().tokenizer
+        input_ids = tokenizer(texts, max_length=self.config.max_input_length, truncation=True)["input_ids"]
+        order = sorted(range(len(texts)), key=lambda index: len(input_ids[index]))
+
+        return [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+    @staticmethod
+    def count_tokens(tokenizer, token_ids: torch.Tensor) -> List[int]:
+        """This method returns the number of non-padding tokens in each row of token_ids"""
+        if tokenizer.pad_token_id is None:
+            return [token_ids.shape[-1]] * token_ids.shape[0]
+        return (token_ids != tokenizer.pad_token_id).sum(dim=-1).tolist()
+
+
+    def generate_summaries(self, loaded_model: LoadedModel, texts: List[str], gen_kwargs: dict) -> List[str]:
+        """
+        This method summarizes a batch of texts with a single padded generate call, recording the latency of
+        tokenization, generation and decoding together with the token counts of the batch
+        """
+        tokenizer, model = loaded_model.tokenizer, loaded_model.model
+
+        start_time = time.perf_counter()
+        prefix = self.get_prefix(loaded_model)
+        inputs = tokenizer([prefix + text for text in texts],
+                           max_length=self.config.max_input_length,
+                           truncation=True,
+                           padding="longest",
+                           return_tensors="pt"
+                           )
+        metrics.STAGE_LATENCY.labels("tokenize").observe(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        with torch.inference_mode():
+            summaries = model.generate(
+                input_ids=inputs["input_ids"].to(model.device),
+                attention_mask=inputs["attention_mask"].to(model.device),
+                **gen_kwargs
+                )
+        generate_seconds = time.perf_counter() - start_time
+        metrics.STAGE_LATENCY.labels("generate").observe(generate_seconds)
+
+        start_time = time.perf_counter()
+        outputs = tokenizer.batch_decode(summaries,
+                                         skip_special_tokens=True,
+                                         clean_up_tokenization_spaces=True
+                                         )
+        metrics.STAGE_LATENCY.labels("decode").observe(time.perf_counter() - start_time)
+
+        metrics.observe_generation(inputs["attention_mask"].sum(dim=-1).tolist(),
+                                   self.count_tokens(tokenizer, summaries),
+                                   generate_seconds)
+        return outputs
+
+
+    def split_into_chunks(self, loaded_model: LoadedModel, text: str) -> List[str]:
+        """
+        Method Name :   split_into_chunks
+        Description :   This method splits a text that does not fit the model input into overlapping windows
+                        of at most LONG_INPUT_CHUNK_TOKENS tokens, leaving room for the task prefix and special
+                        tokens. Texts that fit are returned as a single chunk.
+        Output      :   list of chunk texts
+        """
+        tokenizer = loaded_model.tokenizer
+        prefix = self.get_prefix(loaded_model)
+        reserved = len(tokenizer(prefix, add_special_tokens=False)["input_ids"])
+        reserved += tokenizer.num_special_tokens_to_add()
+        chunk_tokens = min(self.config.long_input_chunk_tokens, self.config.max_input_length) - reserved
+        stride = max(chunk_tokens - self.config.long_input_chunk_overlap, 1)
+
+        input_ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+        if len(input_ids) <= chunk_tokens:
+            return [text]
+
+        starts = list(range(0, len(input_ids) - self.config.long_input_chunk_overlap, stride))
+        if len(starts) > self.config.long_input_max_chunks:
+            logging.warning(f"Text of {len(input_ids)} tokens needs {len(starts)} chunks, only the first "
+                            f"{self.config.long_input_max_chunks} are summarized")
+            starts = starts[:self.config.long_input_max_chunks]
+
+        return [tokenizer.decode(input_ids[start : start + chunk_tokens], skip_special_tokens=True)
+                for start in starts]
+
+
+    def generate_in_batches(self, loaded_model: LoadedModel, texts: List[str], gen_kwargs: dict) -> List[str]:
+        """This method summarizes any number of texts in length-sorted batches of MAX_BATCH_SIZE"""
+        summaries = [None] * len(texts)
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        for i in range(0, len(order), self.config.max_batch_size):
+            indices = order[i : i + self.config.max_batch_size]
+            batch_summaries = self.generate_summaries(loaded_model, [texts[index] for index in indices], gen_kwargs)
+            for index, summary in zip(indices, batch_summaries):
+                summaries[index] = summary
+        return summaries
+
+
+    def reduce_long_inputs(self, loaded_model: LoadedModel, texts: List[str], gen_kwargs: dict) -> List[str]:
+        """
+        Method Name :   reduce_long_inputs
+        Description :   This method is the map step of long-document summarization. The chunks of every text
+                        that exceeds the model input are summarized together in batched generate calls and the
+                        partial summaries of each text are concatenated, repeating until every text fits, so
+                        the final generate reads the whole document instead of its first window.
+        Output      :   texts that fit the model input, in the order of texts
+        """
+        if not self.config.long_input_enabled:
+            return texts
+
+        texts = list(texts)
+        while True:
+            chunks = [self.split_into_chunks(loaded_model, text) for text in texts]
+            long_indices = [index for index, text_chunks in enumerate(chunks) if len(text_chunks) > 1]
+            if not long_indices:
+                return texts
+
+            flat_chunks = [chunk for index in long_indices for chunk in chunks[index]]
+            logging.info(f"Summarizing {len(flat_chunks)} chunks of {len(long_indices)} long texts")
+            partial_summaries = iter(self.generate_in_batches(loaded_model, flat_chunks, gen_kwargs))
+
+            for index in long_indices:
+                reduced = "\n".join(next(partial_summaries) for _ in chunks[index])
+                # Each pass must shrink the text, otherwise fall back to truncating what is left
+                if len(reduced) >= len(texts[index]):
+                    logging.warning("Partial summaries did not shrink the text, truncating it to the model input")
+                    reduced = chunks[index][0]
+                texts[index] = reduced
+
+
+    def summarize_texts(self, loaded_model: LoadedModel, texts: List[str], gen_kwargs: dict) -> List[str]:
+        """This method summarizes texts of any length, reducing long ones chunk by chunk before the final pass"""
+        texts = self.reduce_long_inputs(loaded_model, texts, gen_kwargs)
+        return self.generate_in_batches(loaded_model, texts, gen_kwargs)
+
+
+    def predict_batch(self, texts: List[str], profile: str = None) -> List[str]:
+        """
+        This method summarizes a batch of texts with a named generation profile, defaulting to the server's
+        GENERATION_PROFILE, generating only those that are not already cached
+        """
+        profile = profile or self.config.generation_profile
+        logging.info(f"Inside PredictionPipeline.predict_batch methods with batch size {len(texts)} "
+                     f"and generation profile {profile}")
+
+        loaded_model = self.load_model()
+
+        gen_kwargs = self.resolve_generation_kwargs(loaded_model, profile)
+
+        if self.summary_cache is None:
+            return self.summarize_texts(loaded_model, texts, gen_kwargs)
+
+        self.summary_cache.set_model_version(loaded_model.version)
+        keys = [self.summary_cache.make_key(text, gen_kwargs, loaded_model.version) for text in texts]
+        outputs = [self.summary_cache.get(key) for key in keys]
+        missing = [index for index, output in enumerate(outputs) if output is None]
+        metrics.CACHE_LOOKUPS.labels("hit").inc(len(texts) - len(missing))
+        metrics.CACHE_LOOKUPS.labels("miss").inc(len(missing))
+
+        if missing:
+            summaries = self.summarize_texts(loaded_model, [texts[index] for index in missing], gen_kwargs)
+            for index, summary in zip(missing, summaries):
+                outputs[index] = summary
+                self.summary_cache.put(keys[index], summary)
+
+        logging.info(f"Completed execution of PredictionPipeline.predict_batch methods with "
+                     f"{len(texts) - len(missing)} cached summaries")
+
+        return outputs
+
+
+    def stream_summary(self,
+                       text: str,
+                       profile: str,
+                       on_text: Callable[[str], None],
+                       cancel_event: threading.Event) -> Optional[str]:
+        """
+        Method Name :   stream_summary
+        Description :   This method summarizes one text with the serving model and passes each decoded chunk to
+                        on_text as soon as it is generated. Setting cancel_event stops generation at the next
+                        step, so abandoned requests free the worker. Beam search cannot be streamed, so the
+                        profile must use a single beam.
+        Output      :   the complete summary, or None when cancelled
+        """
+        if cancel_event.is_set():
+            return None
+
+        loaded_model = self.load_model()
+        gen_kwargs = self.resolve_generation_kwargs(loaded_model, profile)
+
+        if self.summary_cache is not None:
+            self.summary_cache.set_model_version(loaded_model.version)
+            key = self.summary_cache.make_key(text, gen_kwargs, loaded_model.version)
+            summary = self.summary_cache.get(key)
+            metrics.CACHE_LOOKUPS.labels("miss" if summary is None else "hit").inc()
+            if summary is not None:
+                on_text(summary)
+                return summary
+
+        # Long documents are reduced first, only the final pass over the partial summaries is streamed
+        text = self.reduce_long_inputs(loaded_model, [text], gen_kwargs)[0]
+        if cancel_event.is_set():
+            return None
+
+        tokenizer, model = loaded_model.tokenizer, loaded_model.model
+        start_time = time.perf_counter()
+        prefix = self.get_prefix(loaded_model)
+        inputs = tokenizer(prefix + text,
+                           max_length=self.config.max_input_length,
+                           truncation=True,
+                           return_tensors="pt"
+                           )
+        metrics.STAGE_LATENCY.labels("tokenize").observe(time.perf_counter() - start_time)
+
+        start_time = time.perf_counter()
+        with torch.inference_mode():
+            output = model.generate(
+                input_ids=inputs["input_ids"].to(model.device),
+                attention_mask=inputs["attention_mask"].to(model.device),
+                streamer=CallbackTextStreamer(tokenizer, on_text),
+                stopping_criteria=StoppingCriteriaList([CancellationCriteria(cancel_event)]),
+                **gen_kwargs
+                )
+        generate_seconds = time.perf_counter() - start_time
+        metrics.STAGE_LATENCY.labels("generate").observe(generate_seconds)
+        metrics.observe_generation([inputs["input_ids"].shape[-1]], self.count_tokens(tokenizer, output), generate_seconds)
+
+        if cancel_event.is_set():
+            logging.info(f"Streaming summary cancelled by the client after {output.shape[-1]} tokens")
+            return None
+
+        start_time = time.perf_counter()
+        summary = tokenizer.decode(output[0], skip_special_tokens=True, clean_up_tokenization_spaces=True)
+        metrics.STAGE_LATENCY.labels("decode").observe(time.perf_counter() - start_time)
+        if self.summary_cache is not None:
+            self.summary_cache.put(key, summary)
+
+        return summary
+
 
-    def predict(self, text):
+    def predict(self, text, profile: str = None):
         """This method is used to Summarize the texts"""
 
         logging.info("Inside PredictionPipeline.predict methods")
 
-        if os.path.exists(self.config.saved_model_path):
-            for file in os.listdir(self.config.saved_model_path):
-                status = self.s3.is_modified_within_last_24_hours(os.path.join(self.config.saved_model_path, file))
-                if status:
-                    logging.info("Latest Models are available in the local directory")
-                    logging.info("Latest Models will be downloaded after 24 hours")
-                else:
-                    logging.info("Dowloading latest Models from S3 Bucket")
-                    self.s3.get_latest_model_from_s3(
-                        self.config.model_bucket_name,
-                        self.config.model_prefix,
-                        self.config.root_dir
-                    )
-        else:
-            logging.info("Dowloading latest Models from S3 Bucket")
-            self.s3.get_latest_model_from_s3(
-                self.config.model_bucket_name,
-                self.config.model_prefix,
-                self.config.root_dir
-            )
-
-        if os.path.exists(self.config.tokenizer_path):
-            for file in os.listdir(self.config.tokenizer_path):
-                status = self.s3.is_modified_within_last_24_hours(os.path.join(self.config.tokenizer_path, file))
-                if status:
-                    logging.info("Latest Tokenizer is available in the local directory")
-                    logging.info("Latest Tokenizer will be downloaded after 24 hours")
-                else:
-                    logging.info("Dowloading latest Tokenizer from S3 Bucket")
-                    self.s3.get_latest_model_from_s3(
-                        self.config.model_bucket_name,
-                        self.config.tokenizer_prefix,
-                        self.config.root_dir
-                    )
-        else:
-            logging.info("Dowloading latest Tokenizer from S3 Bucket")
-            self.s3.get_latest_model_from_s3(
-                self.config.model_bucket_name,
-                self.config.tokenizer_prefix,
-                self.config.root_dir
-            )
-
-        logging.info(f"Tokenizer Path - {self.config.tokenizer_path}")
-        tokenizer = AutoTokenizer.from_pretrained(self.config.tokenizer_path)
-        
-        gen_kwargs = {"length_penalty": 0.8, "num_beams":8, "max_length": 128}
-
-        logging.info(f"Downloaded Model Path - {self.config.saved_model_path}")
-        pipe = pipeline("summarization", model = self.config.saved_model_path, tokenizer=tokenizer)
-
-        logging.info(f"Dialogue: {text}")
-
-        output = pipe(text, **gen_kwargs)[0]["summary_text"]
-        logging.info(f"Model Summary: {output}")
+        output = self.predict_batch([text], profile)[0]
+        # Dialogues and summaries can hold personal data and are long, so only their sizes are logged
+        logging.debug(f"Summarized a dialogue of {len(text)} characters into {len(output)} characters")
 
         logging.info("Completed execution of PredictionPipeline.predict methods")
 
-        return output
\ No newline at end of file
+        return output
@@ -0,0 +1,251 @@
+"""This module caches generated summaries keyed by normalized input, generation parameters and model version"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from src.text_summarization.logger import logging
+
+
+class SummaryCache:
+    """
+    This class encapsulates a byte-bounded in-memory LRU with an optional on-disk tier. The disk tier is shared
+    by every worker on the node, so its entries are kept in one folder per model version and a version change
+    never deletes them; the oldest entries of any version are evicted once the tier exceeds max_disk_bytes.
+    The disk tier is best effort: an I/O error is logged and counted, and the lookup is treated as a miss, so
+    the cache never fails a request.
+    """
+
+    ENTRY_OVERHEAD_BYTES = 128
+    DISK_EVICTION_TARGET = 0.9
+
+    def __init__(self, max_memory_bytes: int, disk_dir: str = None, max_disk_bytes: int = 1024 * 1024 * 1024):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.model_version = None
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        # Bytes on disk as of the last scan plus those this process wrote since, None until the first scan
+        self._disk_bytes = None
+        self._disk_bytes_since_scan = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0,
+                       "disk_evictions": 0, "disk_errors": 0}
+
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """This method collapses whitespace so that trivially different copies of a text share an entry"""
+        return " ".join(text.split())
+
+
+    def make_key(self, text: str, gen_kwargs: Dict, model_version: str) -> str:
+        """This method returns the content address of a summary"""
+        payload = json.dumps([self.normalize(text), gen_kwargs, model_version], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+    def _entry_size(self, key: str, summary: str) -> int:
+        return len(key) + len(summary.encode("utf-8")) + self.ENTRY_OVERHEAD_BYTES
+
+
+    def _version_dir(self, model_version: Optional[str]) -> str:
+        # Versions are hashed into folder names, since a version string need not be a valid path component
+        version_digest = hashlib.sha256(str(model_version).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.disk_dir, version_digest)
+
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self._version_dir(self.model_version), key[:2], key + ".txt")
+
+
+    def _disk_error(self, action: str, error: OSError) -> None:
+        logging.warning(f"Summary cache could not {action} on disk, continuing without it: {error}")
+        self._stats["disk_errors"] += 1
+
+
+    def set_model_version(self, model_version: str) -> None:
+        """
+        Method Name :   set_model_version
+        Description :   This method records the version of the serving model and drops the in-memory summaries
+                        when a different model has been pulled. Disk entries are read from and written to the
+                        folder of the new version; those of other versions are left to workers that may still
+                        serve them and are evicted oldest first.
+        Output      :   None
+        """
+        if model_version == self.model_version:
+            return
+
+        with self._lock:
+            if model_version == self.model_version:
+                return
+
+            if self.model_version is not None:
+                logging.info(f"Invalidating summary cache for model version {model_version}")
+                self._entries.clear()
+                self._memory_bytes = 0
+                self._stats["invalidations"] += 1
+
+            self.model_version = model_version
+
+
+    def invalidate(self) -> None:
+        """This method drops every cached summary of the current model version"""
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+            self._stats["invalidations"] += 1
+            if self.disk_dir:
+                shutil.rmtree(self._version_dir(self.model_version), ignore_errors=True)
+
+
+    def _scan_disk(self) -> List[Tuple[float, int, str]]:
+        """This method lists the modification time, size and path of every entry of the disk tier"""
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith(".txt"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # Another worker evicted it in the meantime
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+
+    def _evict_disk(self) -> None:
+        """
+        This method rescans the disk tier and, when it holds more than max_disk_bytes, removes the oldest
+        entries of any version until it is back under DISK_EVICTION_TARGET of the bound
+        """
+        entries = self._scan_disk()
+        disk_bytes = sum(size for _, size, _ in entries)
+        evicted = 0
+        if disk_bytes > self.max_disk_bytes:
+            target_bytes = self.max_disk_bytes * self.DISK_EVICTION_TARGET
+            for _, size, path in sorted(entries):
+                if disk_bytes <= target_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    evicted += 1
+                except FileNotFoundError:
+                    pass
+                disk_bytes -= size
+            logging.info(f"Evicted {evicted} summaries from the disk cache, {disk_bytes} bytes remain")
+
+        self._disk_bytes = disk_bytes
+        self._disk_bytes_since_scan = 0
+        with self._lock:
+            self._stats["disk_evictions"] += evicted
+
+
+    def _record_disk_write(self, size: int) -> None:
+        """
+        This method accounts for an entry written to disk. The other workers write to the same tier, so it is
+        rescanned whenever this process alone has written a sixteenth of the bound since the last scan.
+        """
+        with self._disk_lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += size
+                self._disk_bytes_since_scan += size
+                if (self._disk_bytes <= self.max_disk_bytes
+                        and self._disk_bytes_since_scan <= self.max_disk_bytes / 16):
+                    return
+            try:
+                self._evict_disk()
+            except OSError as error:
+                with self._lock:
+                    self._disk_error("evict entries", error)
+
+
+    def get(self, key: str) -> Optional[str]:
+        """This method returns the cached summary for key from memory or disk, or None on a miss"""
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return summary
+
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                with open(self._disk_path(key), "r", encoding="utf-8") as file:
+                    summary = file.read()
+            except OSError as error:
+                # The entry can also vanish between the check and the read when the cache is invalidated
+                with self._lock:
+                    self._disk_error("read an entry", error)
+                    self._stats["misses"] += 1
+                return None
+
+            self._put_memory(key, summary)
+            with self._lock:
+                self._stats["disk_hits"] += 1
+            return summary
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+
+    def _put_memory(self, key: str, summary: str) -> None:
+        size = self._entry_size(key, summary)
+        if size > self.max_memory_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._memory_bytes -= self._entry_size(key, self._entries.pop(key))
+            self._entries[key] = summary
+            self._memory_bytes += size
+
+            while self._memory_bytes > self.max_memory_bytes:
+                evicted_key, evicted_summary = self._entries.popitem(last=False)
+                self._memory_bytes -= self._entry_size(evicted_key, evicted_summary)
+                self._stats["evictions"] += 1
+
+
+    def put(self, key: str, summary: str) -> None:
+        """This method stores a summary in memory and, when enabled, on disk"""
+        self._put_memory(key, summary)
+
+        if self.disk_dir:
+            path = self._disk_path(key)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(temp_path, "w", encoding="utf-8") as file:
+                    file.write(summary)
+                os.replace(temp_path, path)
+            except OSError as error:
+                with self._lock:
+                    self._disk_error("store an entry", error)
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                return
+
+            self._record_disk_write(len(summary.encode("utf-8")))
+
+
+    def get_stats(self) -> Dict:
+        """This method returns hit, miss and size counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["memory_bytes"] = self._memory_bytes
+            stats["disk_bytes"] = self._disk_bytes
+            stats["model_version"] = self.model_version
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -6,6 +6,7 @@ from ensure import ensure_annotations
 from box import ConfigBox
 from pathlib import Path
 from typing import Any
+from src.text_summarization.constants import GenerationProfileConstants
 
 
 
@@ -64,4 +65,23 @@ def get_size(file_path: Path) -> str:
     size_in_kb = round(os.path.getsize(file_path)/1024)
     return f"~ {size_in_kb} KB"
 
-    
\ No newline at end of file
+    
+
+
+def get_generation_kwargs(profile: str = None) -> dict:
+    """returns the generate() keyword arguments of a named generation profile
+
+    Args:
+        profile (str, optional): profile name. Defaults to the GENERATION_PROFILE environment variable.
+
+    Raises:
+        ValueError: if the profile is unknown
+
+    Returns:
+        dict: a copy of the profile's generation arguments
+    """
+    profiles = GenerationProfileConstants().PROFILES
+    profile = profile or GenerationProfileConstants.DEFAULT_PROFILE
+    if profile not in profiles:
+        raise ValueError(f"Unknown generation profile {profile}, expected one of {sorted(profiles)}")
+    return dict(profiles[profile])
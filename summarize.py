@@ -0,0 +1,39 @@
+"""Offline bulk summarization of CSV or JSONL files, e.g. python summarize.py samsum-test.csv"""
+
+import argparse
+import os
+from src.text_summarization.pipeline.bulk_summarization_pipeline import BulkSummarizationPipeline
+from src.text_summarization.constants import GenerationProfileConstants
+from src.text_summarization.logger import logging
+
+
+parser = argparse.ArgumentParser(description="Summarize every record of a CSV or JSONL file")
+parser.add_argument("input_path", help="CSV or JSONL file to summarize")
+parser.add_argument("--output-path", help="JSONL file the summaries are appended to")
+parser.add_argument("--text-column", default="dialogue", help="column holding the text to summarize")
+parser.add_argument("--id-column", default="id", help="column copied to the output to identify records")
+parser.add_argument("--batch-size", type=int, help="texts per generate call, defaults to MAX_BATCH_SIZE")
+parser.add_argument("--window-batches", type=int, default=8, help="batches read and length-sorted together")
+parser.add_argument("--profile", choices=sorted(GenerationProfileConstants().PROFILES),
+                    help="generation profile, defaults to GENERATION_PROFILE")
+args = parser.parse_args()
+
+output_path = args.output_path or os.path.splitext(args.input_path)[0] + ".summaries.jsonl"
+
+STAGE_NAME = "Bulk Summarization stage"
+try:
+    logging.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+    bulk_summarization = BulkSummarizationPipeline(
+        input_path = args.input_path,
+        output_path = output_path,
+        text_column = args.text_column,
+        id_column = args.id_column,
+        batch_size = args.batch_size,
+        window_batches = args.window_batches,
+        profile = args.profile
+    )
+    bulk_summarization.run()
+    logging.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+except Exception as e:
+    logging.exception(e)
+    raise e
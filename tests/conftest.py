@@ -0,0 +1,69 @@
+"""Shared fixtures that run the FastAPI app against a stub prediction pipeline, so no model is downloaded"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+import pytest
+
+
+class StubPredictionPipeline:
+    """This class stands in for PredictionPipeline and summarizes a text by upper-casing it"""
+
+    def __init__(self):
+        self.config = SimpleNamespace(generation_profile="greedy", streaming_generation_profile="greedy",
+                                      max_batch_size=2, max_bulk_documents=4)
+        self.model_registry = SimpleNamespace(current=SimpleNamespace(version="v1"))
+        self.load_timeline = {"version": "v1", "total_seconds": 1.5}
+        self.ready = True
+        self.batches = []
+        self.profiles = []
+        self.cancel_events = []
+        self.release = threading.Event()
+        self.release.set()
+
+
+    def is_ready(self) -> bool:
+        return self.ready
+
+
+    def predict_batch(self, texts, profile=None):
+        self.batches.append(list(texts))
+        self.profiles.append(profile)
+        self.release.wait(10)
+        return [text.upper() for text in texts]
+
+
+    def stream_summary(self, text, profile, on_text, cancel_event):
+        self.profiles.append(profile)
+        self.cancel_events.append(cancel_event)
+        words = text.upper().split()
+        for word in words:
+            if cancel_event.is_set():
+                return None
+            on_text(word + " ")
+        return " ".join(words)
+
+
+    def get_length_sorted_batches(self, texts, batch_size):
+        indices = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        return [indices[i : i + batch_size] for i in range(0, len(indices), batch_size)]
+
+
+@pytest.fixture
+def stub_pipeline():
+    return StubPredictionPipeline()
+
+
+@pytest.fixture
+def client(monkeypatch, stub_pipeline):
+    """This fixture starts the app with the stub pipeline and without the background model loader"""
+    from fastapi.testclient import TestClient
+    import app
+
+    async def skip_model_loading(config):
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(app, "load_and_warm_model", skip_model_loading)
+    monkeypatch.setattr(app.TextSummarizationApp.state, "prediction_pipeline", stub_pipeline, raising=False)
+    with TestClient(app.TextSummarizationApp) as test_client:
+        yield test_client
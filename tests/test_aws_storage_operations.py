@@ -0,0 +1,193 @@
+"""Unit tests for listing, verifying and resuming S3 downloads against an in-memory S3 client"""
+
+import hashlib
+import os
+import pytest
+from src.text_summarization.config.aws_storage_operations import S3Operations
+from src.text_summarization.constants import S3TransferConstants
+from src.text_summarization.exception import TextSummarizerException
+
+
+def multipart_etag(body, part_size):
+    parts = [body[start:start + part_size] for start in range(0, len(body), part_size)]
+    return f'"{hashlib.md5(b"".join(hashlib.md5(part).digest() for part in parts)).hexdigest()}-{len(parts)}"'
+
+
+class FakePaginator:
+    def __init__(self, client):
+        self.client = client
+
+    def paginate(self, Bucket, Prefix):
+        keys = sorted(key for key in self.client.objects if key.startswith(Prefix))
+        for start in range(0, len(keys), self.client.page_size):
+            yield {"Contents": [self.client.summary(key) for key in keys[start:start + self.client.page_size]]}
+        if not keys:
+            yield {}
+
+
+class FakeS3Client:
+    """This class keeps objects in memory and answers the calls S3Operations makes on a boto3 client"""
+
+    def __init__(self, page_size=1000):
+        self.objects = {}
+        self.part_sizes = {}
+        self.page_size = page_size
+        self.downloaded_keys = []
+
+    def put(self, key, body, part_size=None):
+        self.objects[key] = body
+        if part_size:
+            self.part_sizes[key] = part_size
+
+    def etag(self, key):
+        body = self.objects[key]
+        if key in self.part_sizes:
+            return multipart_etag(body, self.part_sizes[key])
+        return f'"{hashlib.md5(body).hexdigest()}"'
+
+    def summary(self, key):
+        return {"Key": key, "ETag": self.etag(key), "Size": len(self.objects[key]), "LastModified": None}
+
+    def get_paginator(self, operation_name):
+        assert operation_name == "list_objects_v2"
+        return FakePaginator(self)
+
+    def head_object(self, Bucket, Key, PartNumber):
+        part_size = self.part_sizes.get(Key)
+        if part_size is None:
+            return {"ContentLength": len(self.objects[Key])}
+        return {"PartsCount": -(-len(self.objects[Key]) // part_size), "ContentLength": part_size}
+
+    def download_file(self, bucket_name, key, file_path, Config=None):
+        self.downloaded_keys.append(key)
+        with open(file_path, "wb") as file:
+            file.write(self.objects[key])
+
+
+def make_s3(client):
+    """This method builds S3Operations around the fake client instead of boto3's"""
+    s3 = object.__new__(S3Operations)
+    s3.s3_client = client
+    s3.transfer_const = S3TransferConstants()
+    s3.transfer_config = None
+    return s3
+
+
+def test_list_objects_follows_pagination_and_skips_folder_markers():
+    client = FakeS3Client(page_size=2)
+    for key in ("models/", "models/a.bin", "models/b.bin", "models/c/d.bin", "tokenizer/e.json"):
+        client.put(key, b"x")
+
+    keys = [obj["Key"] for obj in make_s3(client).list_objects("bucket", "models/")]
+
+    assert keys == ["models/a.bin", "models/b.bin", "models/c/d.bin"]
+
+
+def test_compute_etag_reproduces_single_and_multipart_etags(tmp_path):
+    body = os.urandom(2500)
+    file_path = tmp_path / "weights.bin"
+    file_path.write_bytes(body)
+    s3 = make_s3(FakeS3Client())
+
+    assert s3.compute_etag(str(file_path), hashlib.md5(body).hexdigest()) == hashlib.md5(body).hexdigest()
+    etag = multipart_etag(body, 1000).strip('"')
+    assert s3.compute_etag(str(file_path), etag, part_size=1000) == etag
+    assert s3.compute_etag(str(file_path), etag) is None
+
+
+def test_get_part_size_reads_the_first_part_and_checks_the_part_count():
+    client = FakeS3Client()
+    client.put("models/weights.bin", os.urandom(2500), part_size=1000)
+    s3 = make_s3(client)
+    obj = client.summary("models/weights.bin")
+
+    assert s3.get_part_size("bucket", obj) == 1000
+    assert s3.get_part_size("bucket", dict(obj, ETag='"abc-7"')) is None
+
+
+def test_download_verified_renames_the_part_file_into_place(tmp_path):
+    client = FakeS3Client()
+    client.put("models/weights.bin", os.urandom(2500), part_size=1000)
+    file_path = str(tmp_path / "models" / "weights.bin")
+
+    size = make_s3(client)._download_verified("bucket", client.summary("models/weights.bin"), file_path)
+
+    assert size == 2500
+    assert open(file_path, "rb").read() == client.objects["models/weights.bin"]
+    assert os.listdir(tmp_path / "models") == ["weights.bin"]
+
+
+def test_download_verified_rejects_a_checksum_mismatch(tmp_path):
+    client = FakeS3Client()
+    client.put("models/config.json", b"{}")
+    obj = dict(client.summary("models/config.json"), ETag=f'"{hashlib.md5(b"[]").hexdigest()}"')
+    file_path = str(tmp_path / "models" / "config.json")
+
+    with pytest.raises(IOError, match="Checksum mismatch"):
+        make_s3(client)._download_verified("bucket", obj, file_path)
+
+    assert os.listdir(tmp_path / "models") == []
+
+
+def test_unchanged_objects_in_the_manifest_are_skipped(tmp_path):
+    client = FakeS3Client()
+    client.put("models/config.json", b"{}")
+    client.put("models/weights.bin", os.urandom(100))
+    s3 = make_s3(client)
+
+    first = s3.get_latest_model_from_s3("bucket", "models", str(tmp_path))
+    client.put("models/config.json", b'{"d_model": 512}')
+    second = s3.get_latest_model_from_s3("bucket", "models", str(tmp_path))
+
+    assert (first["files"], first["skipped"]) == (2, 0)
+    assert (second["files"], second["skipped"]) == (1, 1)
+    assert sorted(client.downloaded_keys) == ["models/config.json", "models/config.json", "models/weights.bin"]
+    assert (tmp_path / "models" / "config.json").read_bytes() == b'{"d_model": 512}'
+
+
+def test_files_no_longer_listed_are_removed(tmp_path):
+    client = FakeS3Client()
+    client.put("models/config.json", b"{}")
+    stale_file = tmp_path / "models" / "old" / "weights.bin"
+    stale_file.parent.mkdir(parents=True)
+    stale_file.write_bytes(b"stale")
+
+    make_s3(client).get_latest_model_from_s3("bucket", "models", str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path / "models")) == [S3TransferConstants.LOCAL_MANIFEST_FILE, "config.json"]
+
+
+def test_remove_unlisted_files_keeps_listed_paths_and_drops_empty_folders(tmp_path):
+    for relative_path in ("keep.bin", "drop.bin", "nested/drop.bin", "other/keep.json"):
+        file_path = tmp_path / relative_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(b"x")
+
+    removed = S3Operations.remove_unlisted_files(
+        str(tmp_path), [str(tmp_path / "keep.bin"), str(tmp_path / "other" / "keep.json")]
+    )
+
+    assert removed == 2
+    assert sorted(os.listdir(tmp_path)) == ["keep.bin", "other"]
+
+
+def test_failed_downloads_keep_the_verified_files_in_the_manifest(tmp_path):
+    client = FakeS3Client()
+    client.put("models/config.json", b"{}")
+    client.put("models/weights.bin", os.urandom(100))
+    s3 = make_s3(client)
+    download_file = client.download_file
+
+    def fail_weights(bucket_name, key, file_path, Config=None):
+        if key == "models/weights.bin":
+            raise ConnectionError("connection reset")
+        download_file(bucket_name, key, file_path, Config)
+
+    client.download_file = fail_weights
+    with pytest.raises(TextSummarizerException):
+        s3.get_latest_model_from_s3("bucket", "models", str(tmp_path))
+
+    client.download_file = download_file
+    stats = s3.get_latest_model_from_s3("bucket", "models", str(tmp_path))
+
+    assert (stats["files"], stats["skipped"]) == (1, 1)
@@ -0,0 +1,82 @@
+"""Unit tests for the micro-batch scheduler, with generation replaced by a stub"""
+
+import asyncio
+import pytest
+from src.text_summarization.exception import ServiceOverloadedError
+from src.text_summarization.pipeline.batch_scheduler import MicroBatchScheduler
+from src.text_summarization.pipeline.bounded_executor import BoundedExecutor
+
+
+class FakePredictor:
+    """This class records every batch it is called with and summarizes a text as profile:text"""
+
+    def __init__(self, error: Exception = None):
+        self.calls = []
+        self.error = error
+
+
+    def __call__(self, texts, profile):
+        self.calls.append((list(texts), profile))
+        if self.error is not None:
+            raise self.error
+        return [f"{profile}:{text}" for text in texts]
+
+
+def run_scheduler(predictor, submissions, **kwargs):
+    """This method submits every (texts, profile) pair concurrently and returns what each submission got back"""
+    async def main():
+        scheduler = MicroBatchScheduler(predictor, BoundedExecutor("test", 1, 0), **kwargs)
+        try:
+            return await asyncio.gather(
+                *(scheduler.submit_batch(texts, profile) for texts, profile in submissions),
+                return_exceptions=True
+            )
+        finally:
+            await scheduler.stop()
+
+    return asyncio.run(main())
+
+
+def test_concurrent_requests_share_one_batch():
+    predictor = FakePredictor()
+    results = run_scheduler(predictor, [(["a"], "greedy"), (["b"], "greedy"), (["c"], "greedy")],
+                            max_batch_size=8, max_batch_wait_ms=50)
+
+    assert predictor.calls == [(["a", "b", "c"], "greedy")]
+    assert results == [["greedy:a"], ["greedy:b"], ["greedy:c"]]
+
+
+def test_item_that_overflows_the_batch_is_carried_over():
+    predictor = FakePredictor()
+    results = run_scheduler(predictor, [(["a"], None), (["b", "c"], None), (["d"], None)],
+                            max_batch_size=2, max_batch_wait_ms=50)
+
+    assert predictor.calls == [(["a"], None), (["b", "c"], None), (["d"], None)]
+    assert results == [["None:a"], ["None:b", "None:c"], ["None:d"]]
+
+
+def test_batches_never_mix_generation_profiles():
+    predictor = FakePredictor()
+    results = run_scheduler(predictor, [(["a"], "greedy"), (["b"], "greedy"), (["c"], "beam"), (["d"], "greedy")],
+                            max_batch_size=8, max_batch_wait_ms=50)
+
+    assert predictor.calls == [(["a", "b"], "greedy"), (["c"], "beam"), (["d"], "greedy")]
+    assert results == [["greedy:a"], ["greedy:b"], ["beam:c"], ["greedy:d"]]
+
+
+def test_full_queue_rejects_requests():
+    predictor = FakePredictor()
+    results = run_scheduler(predictor, [([text], None) for text in "abcd"],
+                            max_batch_size=1, max_batch_wait_ms=0, max_queue_depth=2)
+
+    assert sum(isinstance(result, ServiceOverloadedError) for result in results) >= 1
+    assert all(result == [f"None:{text}"] for result, text in zip(results, "abcd")
+               if not isinstance(result, Exception))
+
+
+def test_generation_error_reaches_every_caller_in_the_batch():
+    predictor = FakePredictor(error=RuntimeError("out of memory"))
+    results = run_scheduler(predictor, [(["a"], None), (["b"], None)], max_batch_size=8, max_batch_wait_ms=50)
+
+    assert len(predictor.calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
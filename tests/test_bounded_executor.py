@@ -0,0 +1,101 @@
+"""Unit tests for the bounded executor and the status codes the app returns when it is saturated"""
+
+import asyncio
+import threading
+import time
+import pytest
+import app
+from src.text_summarization.exception import ServiceOverloadedError
+from src.text_summarization.pipeline.batch_scheduler import MicroBatchScheduler
+from src.text_summarization.pipeline.bounded_executor import BoundedExecutor
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    """This method polls condition until it holds, failing the test after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition was not met in time"
+        time.sleep(0.01)
+
+
+def test_executor_rejects_work_beyond_workers_plus_queue():
+    async def main():
+        executor = BoundedExecutor("test", max_workers=1, max_queue_depth=1)
+        release = threading.Event()
+        running = [executor.submit(release.wait, 5), executor.submit(release.wait, 5)]
+
+        with pytest.raises(ServiceOverloadedError):
+            executor.submit(release.wait, 5)
+        assert executor.in_flight == 2
+
+        release.set()
+        await asyncio.gather(*running)
+        assert executor.in_flight == 0
+        assert await executor.run(lambda: "accepted again") == "accepted again"
+        executor.shutdown()
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_holds_its_slot_until_the_work_finishes():
+    async def main():
+        executor = BoundedExecutor("test", max_workers=1, max_queue_depth=0)
+        release = threading.Event()
+        future = executor.submit(release.wait, 5)
+        future.cancel()
+
+        with pytest.raises(ServiceOverloadedError):
+            executor.submit(release.wait, 5)
+
+        release.set()
+        await asyncio.sleep(0.1)
+        assert executor.in_flight == 0
+        executor.shutdown()
+
+    asyncio.run(main())
+
+
+def test_predict_returns_503_when_the_queue_is_full(client, stub_pipeline):
+    stub_pipeline.release.clear()
+    client.app.state.batch_scheduler = MicroBatchScheduler(
+        predict_batch = stub_pipeline.predict_batch,
+        executor = BoundedExecutor("inference", max_workers=1, max_queue_depth=0),
+        max_batch_size = 1,
+        max_batch_wait_ms = 0,
+        max_queue_depth = 1
+    )
+
+    # The first request occupies the executor and the second waits in the queue, which then is full
+    responses = []
+    requests = [threading.Thread(target=lambda text=text: responses.append(client.post("/predict", params={"text": text})))
+                for text in ("first", "second")]
+    requests[0].start()
+    wait_until(lambda: stub_pipeline.batches == [["first"]])
+    requests[1].start()
+    wait_until(lambda: client.app.state.batch_scheduler.queue_depth == 1)
+
+    rejected = client.post("/predict", params={"text": "third"})
+    stub_pipeline.release.set()
+    for request in requests:
+        request.join()
+
+    assert rejected.status_code == 503
+    assert sorted(response.json() for response in responses) == ["FIRST", "SECOND"]
+
+
+def test_concurrent_training_is_rejected_with_409(client, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(app.subprocess, "run", lambda *args, **kwargs: release.wait(5))
+
+    responses = []
+    training = threading.Thread(target=lambda: responses.append(client.get("/train")))
+    training.start()
+    wait_until(lambda: client.app.state.training_executor.in_flight == 1)
+
+    rejected = client.get("/train")
+    release.set()
+    training.join()
+
+    assert rejected.status_code == 409
+    assert responses[0].status_code == 200
+    assert client.app.state.io_executor.in_flight == 0
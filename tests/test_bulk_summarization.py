@@ -0,0 +1,116 @@
+"""Unit tests for resuming offline bulk summarization from its checkpoint, with generation replaced by a stub"""
+
+import json
+from types import SimpleNamespace
+import pytest
+from src.text_summarization.config.config_manager import ConfigurationManager
+from src.text_summarization.pipeline.bulk_summarization_pipeline import BulkSummarizationPipeline
+
+
+class FakePredictionPipeline:
+    """This class upper-cases texts and fails once fail_after texts have been summarized"""
+
+    def __init__(self, fail_after: int = None):
+        self.config = SimpleNamespace(max_batch_size=2, generation_profile="greedy")
+        self.fail_after = fail_after
+        self.summarized = []
+
+
+    def get_length_sorted_batches(self, texts, batch_size):
+        return [list(range(i, min(i + batch_size, len(texts)))) for i in range(0, len(texts), batch_size)]
+
+
+    def predict_batch(self, texts, profile=None):
+        if self.fail_after is not None and len(self.summarized) + len(texts) > self.fail_after:
+            raise RuntimeError("interrupted")
+        self.summarized.extend(texts)
+        return [text.upper() for text in texts]
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    path = tmp_path / "dialogues.jsonl"
+    path.write_text("".join(json.dumps({"id": index, "dialogue": f"text {index}"}) + "\n" for index in range(7)))
+    return str(path)
+
+
+def make_pipeline(input_path, prediction_pipeline, **kwargs):
+    return BulkSummarizationPipeline(input_path, input_path + ".summaries.jsonl", batch_size=2, window_batches=1,
+                                     prediction_pipeline=prediction_pipeline, **kwargs)
+
+
+def read_output(pipeline):
+    with open(pipeline.output_path) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_resume_continues_after_the_last_checkpoint(input_path):
+    interrupted = make_pipeline(input_path, FakePredictionPipeline(fail_after=4))
+    with pytest.raises(Exception, match="interrupted"):
+        interrupted.run()
+    assert [line["id"] for line in read_output(interrupted)] == [0, 1, 2, 3]
+
+    resumed_predictions = FakePredictionPipeline()
+    resumed = make_pipeline(input_path, resumed_predictions)
+
+    assert resumed.run() == 3
+    assert resumed_predictions.summarized == ["text 4", "text 5", "text 6"]
+    assert read_output(resumed) == [
+        {"offset": index, "id": index, "summary": f"TEXT {index}"} for index in range(7)
+    ]
+
+
+def test_output_written_after_the_checkpoint_is_truncated(input_path):
+    pipeline = make_pipeline(input_path, FakePredictionPipeline(fail_after=2))
+    with pytest.raises(Exception):
+        pipeline.run()
+    with open(pipeline.output_path, "a") as file:
+        file.write('{"offset": 2, "id": 2, "summary": "partial')
+
+    make_pipeline(input_path, FakePredictionPipeline()).run()
+
+    assert [line["offset"] for line in read_output(pipeline)] == list(range(7))
+
+
+def test_completed_run_summarizes_nothing_again(input_path):
+    make_pipeline(input_path, FakePredictionPipeline()).run()
+    prediction_pipeline = FakePredictionPipeline()
+
+    assert make_pipeline(input_path, prediction_pipeline).run() == 0
+    assert prediction_pipeline.summarized == []
+
+
+def test_checkpoint_of_a_modified_input_is_refused(input_path):
+    pipeline = make_pipeline(input_path, FakePredictionPipeline(fail_after=2))
+    with pytest.raises(Exception):
+        pipeline.run()
+
+    with open(input_path, "a") as file:
+        file.write(json.dumps({"id": 7, "dialogue": "text 7"}) + "\n")
+
+    prediction_pipeline = FakePredictionPipeline()
+    with pytest.raises(Exception, match="was written for"):
+        make_pipeline(input_path, prediction_pipeline).run()
+    assert prediction_pipeline.summarized == []
+
+
+def test_checkpoint_of_another_profile_is_refused(input_path):
+    pipeline = make_pipeline(input_path, FakePredictionPipeline(fail_after=2))
+    with pytest.raises(Exception):
+        pipeline.run()
+
+    with pytest.raises(Exception, match="was written for"):
+        make_pipeline(input_path, FakePredictionPipeline(), profile="quality").run()
+
+
+def test_bulk_runs_keep_model_versions_apart_from_serving(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    configuration_manager = ConfigurationManager()
+    serving_config = configuration_manager.get_prediction_pipeline_config()
+    bulk_config = configuration_manager.get_bulk_prediction_pipeline_config()
+
+    assert bulk_config.model_versions_dir != serving_config.model_versions_dir
+    assert bulk_config.model_staging_dir != serving_config.model_staging_dir
+    assert bulk_config.current_version_file != serving_config.current_version_file
+    assert bulk_config.summary_cache_dir is None
+    assert bulk_config.model_bucket_name == serving_config.model_bucket_name
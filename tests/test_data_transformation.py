@@ -0,0 +1,109 @@
+"""Unit tests for the fingerprinted cache of the DataTransformation stage, with tokenization replaced by a stub"""
+
+import json
+import os
+import pytest
+from src.text_summarization.components.data_transformations import DataTransformation
+from src.text_summarization.entity import DataTransformationConfig
+
+
+@pytest.fixture
+def make_transformation(tmp_path):
+    """This fixture builds DataTransformation stages over the same CSVs whose transform only records calls"""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for split in ("train", "validation", "test"):
+        (data_dir / f"samsum-{split}.csv").write_text(f"id,dialogue,summary\n1,{split} dialogue,{split} summary\n")
+
+    transforms = []
+
+    def make(**settings):
+        config = DataTransformationConfig(**{
+            "root_dir": str(tmp_path / "run"),
+            "transformed_data_path": str(data_dir),
+            "tokenizer_name": "google/flan-t5-base",
+            "max_input_length": 1024,
+            "max_target_length": 128,
+            "prefix": "summarize: ",
+            "cache_dir": str(tmp_path / "cache"),
+            **settings
+        })
+        data_transformation = DataTransformation(config)
+
+        def transform(save_dir):
+            transforms.append(save_dir)
+            os.makedirs(os.path.join(save_dir, "train"))
+            with open(os.path.join(save_dir, "dataset_dict.json"), "w") as file:
+                json.dump({"splits": ["train"]}, file)
+            with open(os.path.join(save_dir, "train", "data.arrow"), "w") as file:
+                file.write("tokenized")
+
+        data_transformation.transform = transform
+        return data_transformation
+
+    make.data_dir = data_dir
+    make.transforms = transforms
+    return make
+
+
+def test_fingerprint_is_stable_for_the_same_inputs(make_transformation):
+    assert make_transformation().get_fingerprint() == make_transformation().get_fingerprint()
+
+
+@pytest.mark.parametrize("settings", [
+    {"tokenizer_name": "facebook/bart-base"},
+    {"max_input_length": 512},
+    {"max_target_length": 64},
+    {"prefix": ""}
+])
+def test_fingerprint_changes_with_tokenization_settings(make_transformation, settings):
+    assert make_transformation(**settings).get_fingerprint() != make_transformation().get_fingerprint()
+
+
+def test_fingerprint_changes_with_file_content(make_transformation):
+    fingerprint = make_transformation().get_fingerprint()
+    (make_transformation.data_dir / "samsum-test.csv").write_text("id,dialogue,summary\n1,edited,edited\n")
+
+    assert make_transformation().get_fingerprint() != fingerprint
+
+
+def test_miss_tokenizes_once_and_hit_reuses_the_cache(make_transformation):
+    first = make_transformation()
+    first.convert()
+    second = make_transformation()
+    second.convert()
+
+    fingerprint = first.get_fingerprint()
+    cache_path = os.path.join(first.config.cache_dir, fingerprint)
+    assert len(make_transformation.transforms) == 1
+    assert os.listdir(first.config.cache_dir) == [fingerprint]
+
+    run_file = os.path.join(first.config.root_dir, "train", "data.arrow")
+    with open(run_file) as file:
+        assert file.read() == "tokenized"
+    assert os.path.samefile(run_file, os.path.join(cache_path, "train", "data.arrow"))
+
+
+def test_changed_input_misses_the_cache(make_transformation):
+    make_transformation().convert()
+    (make_transformation.data_dir / "samsum-train.csv").write_text("id,dialogue,summary\n1,new,new\n")
+    make_transformation().convert()
+
+    assert len(make_transformation.transforms) == 2
+
+
+def test_failed_transform_leaves_no_cache_entry(make_transformation):
+    data_transformation = make_transformation()
+
+    def failing_transform(save_dir):
+        os.makedirs(save_dir)
+        raise RuntimeError("tokenizer unavailable")
+
+    data_transformation.transform = failing_transform
+    with pytest.raises(RuntimeError):
+        data_transformation.convert()
+
+    assert not os.path.exists(os.path.join(data_transformation.config.cache_dir,
+                                           data_transformation.get_fingerprint()))
+    make_transformation().convert()
+    assert len(make_transformation.transforms) == 1
@@ -0,0 +1,83 @@
+"""Unit tests for resolving named generation profiles into generate kwargs"""
+
+from types import SimpleNamespace
+import pytest
+from src.text_summarization.pipeline.model_registry import LoadedModel
+from src.text_summarization.pipeline.prediction_pipeline import PredictionPipeline
+from src.text_summarization.utils.common_utils import get_generation_kwargs
+
+
+FLAN_T5_TASK_PARAMS = {
+    "summarization": {"early_stopping": True, "length_penalty": 2.0, "max_length": 200, "min_length": 30,
+                      "no_repeat_ngram_size": 3, "num_beams": 4, "prefix": "summarize: "},
+    "translation_en_to_de": {"max_length": 300, "num_beams": 4, "prefix": "translate English to German: "}
+}
+
+
+def make_pipeline(generation_profile="quality"):
+    """This method builds a prediction pipeline with only the config that resolving kwargs reads"""
+    pipeline = object.__new__(PredictionPipeline)
+    pipeline.config = SimpleNamespace(generation_profile=generation_profile)
+    return pipeline
+
+
+def make_model(prefix=None, task_specific_params=None):
+    model = SimpleNamespace(config=SimpleNamespace(prefix=prefix, task_specific_params=task_specific_params))
+    return LoadedModel("v1", "pytorch", "models", "tokenizer", tokenizer=None, model=model)
+
+
+def test_profile_overrides_the_summarization_params_of_the_model():
+    gen_kwargs = make_pipeline().resolve_generation_kwargs(make_model(task_specific_params=FLAN_T5_TASK_PARAMS))
+
+    assert gen_kwargs == {"early_stopping": True, "length_penalty": 0.8, "max_length": 128, "min_length": 30,
+                          "no_repeat_ngram_size": 3, "num_beams": 8}
+
+
+def test_model_without_task_params_uses_the_profile_only():
+    assert make_pipeline().resolve_generation_kwargs(make_model(), "greedy") == {
+        "num_beams": 1, "do_sample": False, "max_length": 128
+    }
+
+
+@pytest.mark.parametrize("prefix, task_specific_params, expected", [
+    ("custom: ", FLAN_T5_TASK_PARAMS, "custom: "),
+    (None, FLAN_T5_TASK_PARAMS, "summarize: "),
+    (None, None, "")
+])
+def test_prefix_falls_back_to_the_summarization_params(prefix, task_specific_params, expected):
+    assert make_pipeline().get_prefix(make_model(prefix, task_specific_params)) == expected
+
+
+def test_named_profile_resolves_to_a_copy_of_its_kwargs():
+    gen_kwargs = get_generation_kwargs("fast")
+    gen_kwargs["num_beams"] = 16
+
+    assert get_generation_kwargs("fast") == {"num_beams": 2, "max_length": 128, "early_stopping": True}
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match="Unknown generation profile fastest"):
+        get_generation_kwargs("fastest")
+
+
+def test_request_profile_overrides_the_pipeline_profile():
+    loaded_model = make_model(task_specific_params=FLAN_T5_TASK_PARAMS)
+    gen_kwargs = make_pipeline().resolve_generation_kwargs(loaded_model, "greedy")
+
+    assert gen_kwargs["num_beams"] == 1 and gen_kwargs["do_sample"] is False
+    assert gen_kwargs["no_repeat_ngram_size"] == 3
+
+
+def test_predict_uses_the_request_profile_over_the_server_default(client, stub_pipeline):
+    assert client.post("/predict", params={"text": "first", "profile": "fast"}).json() == "FIRST"
+    assert client.post("/predict", params={"text": "second"}).json() == "SECOND"
+
+    assert stub_pipeline.profiles == ["fast", "greedy"]
+
+
+def test_predict_rejects_an_unknown_profile(client, stub_pipeline):
+    response = client.post("/predict", params={"text": "first", "profile": "fastest"})
+
+    assert response.status_code == 422
+    assert "fastest" in response.json()["detail"]
+    assert stub_pipeline.batches == []
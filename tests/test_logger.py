@@ -0,0 +1,92 @@
+"""Unit tests for the level parsing, filters and formatters of the logging setup"""
+
+import json
+import logging
+import queue
+import sys
+import pytest
+from src.text_summarization import logger
+
+
+def make_record(module: str, level: int = logging.INFO, name: str = "root", message: str = "message",
+                exc_info=None) -> logging.LogRecord:
+    """This method builds a record as if it was logged from module.py"""
+    return logging.LogRecord(name, level, f"/src/{module}.py", 10, message, None, exc_info)
+
+
+@pytest.mark.parametrize("value, level", [
+    ("INFO", logging.INFO), ("warning", logging.WARNING), (" debug ", logging.DEBUG), ("10", logging.DEBUG),
+    ("35", 35), ("VERBOSE", None), ("", None)
+])
+def test_parse_level_accepts_names_and_numbers(value, level):
+    assert logger.parse_level(value) == level
+
+
+def test_parse_levels_skips_unknown_entries():
+    invalid_entries = []
+    levels = logger.parse_levels("botocore=WARNING, urllib3=10,s3transfer=LOUD,=INFO,app", invalid_entries)
+
+    assert levels == {"botocore": logging.WARNING, "urllib3": logging.DEBUG}
+    assert invalid_entries == ["s3transfer=LOUD", "=INFO", "app"]
+
+
+def test_module_filter_matches_modules_and_parent_loggers():
+    module_filter = logger.ModuleLevelFilter(logging.INFO, {"prediction_pipeline": logging.DEBUG,
+                                                            "botocore": logging.WARNING})
+
+    assert module_filter.filter(make_record("prediction_pipeline", logging.DEBUG))
+    assert not module_filter.filter(make_record("app", logging.DEBUG))
+    assert module_filter.filter(make_record("app", logging.INFO))
+    assert not module_filter.filter(make_record("endpoint", logging.INFO, name="botocore.endpoint"))
+    assert module_filter.filter(make_record("endpoint", logging.ERROR, name="botocore.endpoint"))
+
+
+def test_sampling_filter_keeps_a_fraction_of_sampled_modules_only(monkeypatch):
+    sampling_filter = logger.SamplingFilter(["app"], sample_rate=0.25)
+
+    monkeypatch.setattr(logger.random, "random", lambda: 0.5)
+    assert not sampling_filter.filter(make_record("app", logging.INFO))
+    assert sampling_filter.filter(make_record("app", logging.WARNING))
+    assert sampling_filter.filter(make_record("model_registry", logging.INFO))
+
+    monkeypatch.setattr(logger.random, "random", lambda: 0.1)
+    record = make_record("app", logging.DEBUG)
+    assert sampling_filter.filter(record)
+    assert record.sample_rate == 0.25
+
+
+def test_full_sample_rate_keeps_every_record(monkeypatch):
+    monkeypatch.setattr(logger.random, "random", lambda: 0.999)
+
+    assert logger.SamplingFilter(["app"], sample_rate=1.0).filter(make_record("app", logging.DEBUG))
+
+
+def test_json_formatter_truncates_messages_and_includes_exceptions():
+    try:
+        raise ValueError("bad input")
+    except ValueError:
+        exc_info = sys.exc_info()
+    record = make_record("app", logging.ERROR, message="x" * 50, exc_info=exc_info)
+
+    payload = json.loads(logger.JsonFormatter(max_message_length=10).format(record))
+
+    assert payload["level"] == "ERROR"
+    assert payload["module"] == "app"
+    assert payload["message"] == "x" * 10 + "... [truncated 40 characters]"
+    assert "ValueError: bad input" in payload["exception"]
+
+
+def test_text_formatter_truncates_messages():
+    line = logger.TruncatingFormatter(max_message_length=5).format(make_record("app", message="abcdefgh"))
+
+    assert line.endswith("INFO - abcde... [truncated 3 characters]")
+    assert logger.truncate("short", 0) == "short"
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    queue_handler = logger.NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    queue_handler.emit(make_record("app"))
+    queue_handler.emit(make_record("app"))
+
+    assert queue_handler.queue.qsize() == 1
+    assert queue_handler.dropped == 1
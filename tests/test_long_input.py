@@ -0,0 +1,129 @@
+"""Unit tests for chunked map-reduce of long inputs, with a word tokenizer and a stub summarizer"""
+
+import math
+from types import SimpleNamespace
+import pytest
+from src.text_summarization.pipeline.model_registry import LoadedModel
+from src.text_summarization.pipeline.prediction_pipeline import PredictionPipeline
+
+
+class WordTokenizer:
+    """This class tokenizes on whitespace, one id per distinct word, and adds one special token per text"""
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.words = []
+
+
+    def __call__(self, text, add_special_tokens=True):
+        input_ids = []
+        for word in text.split():
+            if word not in self.vocabulary:
+                self.vocabulary[word] = len(self.words)
+                self.words.append(word)
+            input_ids.append(self.vocabulary[word])
+        return {"input_ids": input_ids}
+
+
+    def decode(self, input_ids, skip_special_tokens=True):
+        return " ".join(self.words[input_id] for input_id in input_ids)
+
+
+    def num_special_tokens_to_add(self):
+        return 1
+
+
+def make_pipeline(summarize, **config):
+    """This method builds a prediction pipeline whose generate step is replaced by summarize"""
+    pipeline = object.__new__(PredictionPipeline)
+    pipeline.config = SimpleNamespace(**{
+        "max_input_length": 21,
+        "long_input_enabled": True,
+        "long_input_chunk_tokens": 21,
+        "long_input_chunk_overlap": 5,
+        "long_input_max_chunks": 64,
+        "max_batch_size": 4,
+        **config
+    })
+    pipeline.generate_calls = []
+
+    def generate_summaries(loaded_model, texts, gen_kwargs):
+        pipeline.generate_calls.append(list(texts))
+        return [summarize(text) for text in texts]
+
+    pipeline.generate_summaries = generate_summaries
+    return pipeline
+
+
+@pytest.fixture
+def loaded_model():
+    model = SimpleNamespace(config=SimpleNamespace(prefix=""))
+    return LoadedModel("v1", "pytorch", "models", "tokenizer", tokenizer=WordTokenizer(), model=model)
+
+
+def make_text(words: int) -> str:
+    return " ".join(f"w{index}" for index in range(words))
+
+
+def test_text_that_fits_is_one_chunk(loaded_model):
+    pipeline = make_pipeline(lambda text: text)
+    text = make_text(20)
+
+    assert pipeline.split_into_chunks(loaded_model, text) == [text]
+
+
+def test_long_text_is_covered_by_overlapping_chunks_that_fit(loaded_model):
+    pipeline = make_pipeline(lambda text: text)
+    chunks = pipeline.split_into_chunks(loaded_model, make_text(100))
+    chunk_words = [chunk.split() for chunk in chunks]
+
+    assert len(chunks) > 1
+    assert all(len(words) <= 20 for words in chunk_words)
+    for previous, following in zip(chunk_words, chunk_words[1:]):
+        assert previous[-5:] == following[:5]
+    assert chunk_words[0][0] == "w0"
+    assert chunk_words[-1][-1] == "w99"
+
+
+def test_chunks_are_capped_at_the_maximum(loaded_model):
+    pipeline = make_pipeline(lambda text: text, long_input_max_chunks=3)
+
+    assert len(pipeline.split_into_chunks(loaded_model, make_text(1000))) == 3
+
+
+@pytest.mark.parametrize("summarize", [
+    lambda text: " ".join(text.split()[:3]),
+    lambda text: text,
+    lambda text: text + " " + text
+], ids=["shrinking", "echoing", "growing"])
+def test_reduce_terminates_with_texts_that_fit(loaded_model, summarize):
+    pipeline = make_pipeline(summarize)
+    texts = ["short text", make_text(500)]
+
+    reduced = pipeline.reduce_long_inputs(loaded_model, texts, {})
+
+    assert reduced[0] == "short text"
+    assert all(len(pipeline.split_into_chunks(loaded_model, text)) == 1 for text in reduced)
+    assert len(pipeline.generate_calls) < 50
+
+
+def test_shrinking_summaries_reduce_in_several_passes(loaded_model):
+    pipeline = make_pipeline(lambda text: " ".join(text.split()[:6]))
+    text = make_text(500)
+    first_pass_chunks = pipeline.split_into_chunks(loaded_model, text)
+
+    reduced = pipeline.reduce_long_inputs(loaded_model, [text], {})
+
+    assert len(reduced[0].split()) <= 20
+    # The first pass reads every chunk of the document, not just its first window
+    first_pass_calls = pipeline.generate_calls[:math.ceil(len(first_pass_chunks) / 4)]
+    assert sorted(chunk for call in first_pass_calls for chunk in call) == sorted(first_pass_chunks)
+    assert sum(len(call) for call in pipeline.generate_calls) > len(first_pass_chunks)
+
+
+def test_reduce_is_skipped_when_disabled(loaded_model):
+    pipeline = make_pipeline(lambda text: text, long_input_enabled=False)
+    texts = [make_text(500)]
+
+    assert pipeline.reduce_long_inputs(loaded_model, texts, {}) == texts
+    assert pipeline.generate_calls == []
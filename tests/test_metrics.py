@@ -0,0 +1,56 @@
+"""Unit tests for rendering /metrics in one process and aggregating the metric files of gunicorn workers"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_metrics_render_in_single_process_mode(client):
+    client.get("/healthz")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'summarization_requests_total{endpoint="/healthz",status="200"}' in response.text
+
+
+def run_with_multiproc_dir(multiproc_dir, code):
+    """This method runs code in a fresh interpreter, as a gunicorn worker would, writing to multiproc_dir"""
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(multiproc_dir),
+               PYTHONPATH=os.pathsep.join(sys.path))
+    return subprocess.run([sys.executable, "-c", "from src.text_summarization.pipeline import metrics\n" + code],
+                          cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True).stdout
+
+
+def test_metrics_of_all_workers_are_aggregated(tmp_path):
+    for _ in range(2):
+        run_with_multiproc_dir(tmp_path, 'metrics.CACHE_LOOKUPS.labels("hit").inc()')
+
+    output = run_with_multiproc_dir(tmp_path, "print(metrics.render_metrics()[0].decode())")
+
+    assert 'summarization_cache_lookups_total{result="hit"} 2.0' in output
+
+
+def load_gunicorn_config():
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", os.path.join(REPO_ROOT, "gunicorn.conf.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_gunicorn_clears_the_metric_files_on_start_only(tmp_path, monkeypatch):
+    multiproc_dir = tmp_path / "prometheus"
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(multiproc_dir))
+    gunicorn_config = load_gunicorn_config()
+    worker_file = multiproc_dir / "counter_1234.db"
+    worker_file.write_bytes(b"live worker")
+
+    # A configuration reload reads the module again while the workers keep running
+    load_gunicorn_config()
+    assert worker_file.exists()
+
+    gunicorn_config.on_starting(server=None)
+    assert os.listdir(multiproc_dir) == []
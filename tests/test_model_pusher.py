@@ -0,0 +1,112 @@
+"""Unit tests for publishing immutable model versions with a fake S3 client"""
+
+import os
+import threading
+from types import SimpleNamespace
+from src.text_summarization.components.model_pusher import ModelPusher
+from src.text_summarization.constants import S3TransferConstants
+
+
+class FakeS3:
+    """This class records the calls ModelPusher makes on S3Operations and keeps JSON objects in memory"""
+
+    def __init__(self):
+        self.transfer_const = S3TransferConstants()
+        self.json_objects = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def read_json(self, bucket_name, key):
+        return self.json_objects.get(key)
+
+    def write_json(self, bucket_name, key, content):
+        with self._lock:
+            self.json_objects[key] = content
+            self.calls.append(("write_json", key))
+
+    def upload_file(self, local_file_path, file_name, bucket_name, metadata=None):
+        with self._lock:
+            self.calls.append(("upload_file", file_name))
+
+    def copy_object(self, bucket_name, source_key, destination_key):
+        with self._lock:
+            self.calls.append(("copy_object", source_key, destination_key))
+
+
+def write_files(directory, files):
+    os.makedirs(directory, exist_ok=True)
+    for name, content in files.items():
+        with open(os.path.join(directory, name), "w") as file:
+            file.write(content)
+
+
+def make_pusher(tmp_path):
+    """This method builds a ModelPusher over a trained model and tokenizer in tmp_path"""
+    pusher = object.__new__(ModelPusher)
+    pusher.config = SimpleNamespace(
+        model_bucket_name = "models-bucket",
+        model_prefix = "models",
+        tokenizer_prefix = "tokenizer",
+        onnx_prefix = "onnx",
+        onnx_int8_prefix = "onnx-int8",
+        model_versions_prefix = "versions",
+        model_manifest_file = "manifest.json",
+        model_pointer_key = "current.json",
+        trained_model_path = str(tmp_path / "model"),
+        trained_tokenizer_path = str(tmp_path / "tokenizer"),
+        onnx_model_path = str(tmp_path / "onnx"),
+        onnx_int8_model_path = str(tmp_path / "onnx-int8")
+    )
+    pusher.s3 = FakeS3()
+    write_files(pusher.config.trained_model_path, {"config.json": "{}", "model.safetensors": "weights"})
+    write_files(pusher.config.trained_tokenizer_path, {"tokenizer.json": "{}"})
+    return pusher
+
+
+def test_hash_model_files_is_stable(tmp_path):
+    pusher = make_pusher(tmp_path)
+
+    first = pusher.hash_model_files(pusher.config.trained_model_path, "models")
+    second = pusher.hash_model_files(pusher.config.trained_model_path, "models")
+
+    assert first == second
+    assert sorted(first) == ["models/config.json", "models/model.safetensors"]
+    assert first["models/model.safetensors"]["size"] == len("weights")
+
+
+def test_pointer_is_written_after_the_files_and_the_manifest(tmp_path):
+    pusher = make_pusher(tmp_path)
+
+    version = pusher.push_model_version()
+
+    assert pusher.s3.calls[-2:] == [("write_json", f"versions/{version}/manifest.json"), ("write_json", "current.json")]
+    assert sorted(call[1] for call in pusher.s3.calls[:-2]) == [
+        f"versions/{version}/models/config.json",
+        f"versions/{version}/models/model.safetensors",
+        f"versions/{version}/tokenizer/tokenizer.json"
+    ]
+    assert pusher.s3.json_objects["current.json"]["version"] == version
+
+
+def test_unchanged_files_are_copied_server_side(tmp_path):
+    pusher = make_pusher(tmp_path)
+    previous_version = pusher.push_model_version()
+    write_files(pusher.config.trained_model_path, {"model.safetensors": "retrained weights"})
+    pusher.s3.calls.clear()
+
+    version = pusher.push_model_version()
+
+    assert version != previous_version
+    assert ("upload_file", f"versions/{version}/models/model.safetensors") in pusher.s3.calls
+    assert ("copy_object", f"versions/{previous_version}/tokenizer/tokenizer.json",
+            f"versions/{version}/tokenizer/tokenizer.json") in pusher.s3.calls
+    assert pusher.s3.json_objects["current.json"]["previous_version"] == previous_version
+
+
+def test_identical_model_is_not_pushed_again(tmp_path):
+    pusher = make_pusher(tmp_path)
+    version = pusher.push_model_version()
+    pusher.s3.calls.clear()
+
+    assert pusher.push_model_version() == version
+    assert pusher.s3.calls == []
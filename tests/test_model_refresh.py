@@ -0,0 +1,182 @@
+"""
+Unit tests for resolving and refreshing the serving model version, staging its download and keeping the versions
+on disk that a process on the node serves
+"""
+
+import os
+import subprocess
+import sys
+import threading
+from types import SimpleNamespace
+import pytest
+from src.text_summarization.pipeline.prediction_pipeline import PredictionPipeline
+
+
+def make_pipeline(tmp_path):
+    """This method builds a prediction pipeline with only the config that the version bookkeeping reads"""
+    pipeline = object.__new__(PredictionPipeline)
+    pipeline.config = SimpleNamespace(
+        model_versions_dir = str(tmp_path / "versions"),
+        model_staging_dir = str(tmp_path / "staging"),
+        model_bucket_name = "models-bucket",
+        model_pointer_key = "current.json",
+        model_versions_prefix = "versions",
+        model_prefix = "models",
+        tokenizer_prefix = "tokenizer",
+        current_version_file = str(tmp_path / "current_version"),
+        model_in_use_dir = str(tmp_path / "in_use")
+    )
+    for version in ("v1", "v2", "v3", "v4"):
+        os.makedirs(os.path.join(pipeline.config.model_versions_dir, version))
+    return pipeline
+
+
+def write_marker(pipeline, pid, *versions):
+    os.makedirs(pipeline.config.model_in_use_dir, exist_ok=True)
+    with open(os.path.join(pipeline.config.model_in_use_dir, str(pid)), "w") as file:
+        file.write("\n".join(versions))
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, "-c", ""])
+    process.wait()
+    return process.pid
+
+
+def test_versions_served_by_live_processes_are_kept(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    write_marker(pipeline, os.getppid(), "v1")
+    with open(pipeline.config.current_version_file, "w") as file:
+        file.write("v3")
+    pipeline.mark_versions_in_use("v2", "v3")
+
+    pipeline.remove_unused_versions()
+
+    assert sorted(os.listdir(pipeline.config.model_versions_dir)) == ["v1", "v2", "v3"]
+
+
+def test_markers_of_exited_processes_are_dropped(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    pid = exited_pid()
+    write_marker(pipeline, pid, "v1")
+    pipeline.mark_versions_in_use("v2")
+
+    assert pipeline.get_versions_in_use() == {"v2"}
+    assert not os.path.exists(os.path.join(pipeline.config.model_in_use_dir, str(pid)))
+
+    pipeline.remove_unused_versions()
+
+    assert os.listdir(pipeline.config.model_versions_dir) == ["v2"]
+
+
+class FakeS3:
+    def __init__(self, pointer=None, signature=None, error=None):
+        self.pointer = pointer
+        self.signature = signature
+        self.error = error
+        self.downloads = []
+
+    def read_json(self, bucket_name, key):
+        if self.error is not None:
+            raise self.error
+        return self.pointer
+
+    def get_model_signature(self, bucket_name, prefixes):
+        return self.signature
+
+    def download_model_version(self, bucket_name, version_prefix, prefixes, directory):
+        self.downloads.append((version_prefix, directory, sorted(os.listdir(directory))))
+        os.makedirs(os.path.join(directory, "models"), exist_ok=True)
+
+
+def test_stale_per_process_staging_dirs_are_removed(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    for name in ("v5.1234", "v5"):
+        os.makedirs(os.path.join(pipeline.config.model_staging_dir, name))
+
+    pipeline.remove_stale_staging_dirs()
+
+    assert os.listdir(pipeline.config.model_staging_dir) == ["v5"]
+
+
+def test_download_resumes_in_the_staging_dir_of_the_version(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    pipeline.s3 = FakeS3()
+    pipeline.get_model_prefixes = lambda: ["models"]
+    staging_dir = os.path.join(pipeline.config.model_staging_dir, "v5")
+    os.makedirs(os.path.join(staging_dir, "tokenizer"))
+
+    pipeline.download_model_version("v5", "versions/v5")
+
+    assert pipeline.s3.downloads == [("versions/v5", staging_dir, ["tokenizer"])]
+    assert sorted(os.listdir(os.path.join(pipeline.config.model_versions_dir, "v5"))) == ["models", "tokenizer"]
+    assert not os.path.exists(staging_dir)
+
+    pipeline.download_model_version("v5", "versions/v5")
+
+    assert len(pipeline.s3.downloads) == 1
+
+
+def make_refreshing_pipeline(tmp_path, s3, current_version=None, local_version=None):
+    """This method builds a pipeline whose download and activation only record the versions they were given"""
+    pipeline = make_pipeline(tmp_path)
+    pipeline.s3 = s3
+    pipeline._refresh_lock = threading.Lock()
+    pipeline.model_registry = SimpleNamespace(
+        current = SimpleNamespace(version=current_version) if current_version else None
+    )
+    if local_version is not None:
+        with open(pipeline.config.current_version_file, "w") as file:
+            file.write(local_version)
+    pipeline.downloaded = []
+    pipeline.activated = []
+    pipeline.download_model_version = lambda version, version_prefix: pipeline.downloaded.append(
+        (version, version_prefix))
+    pipeline.activate_model_version = lambda version, download_seconds=0.0: pipeline.activated.append(version)
+    return pipeline
+
+
+def test_pointer_resolves_to_the_versioned_prefix(tmp_path):
+    pipeline = make_refreshing_pipeline(tmp_path, FakeS3(pointer={"version": "v5"}), current_version="v1")
+
+    assert pipeline.refresh_model() is True
+    assert pipeline.downloaded == [("v5", "versions/v5")]
+    assert pipeline.activated == ["v5"]
+
+
+def test_missing_pointer_falls_back_to_the_flat_layout(tmp_path):
+    pipeline = make_refreshing_pipeline(tmp_path, FakeS3(signature="0123abcd"))
+
+    assert pipeline.refresh_model() is True
+    assert pipeline.downloaded == [("0123abcd", "")]
+
+
+def test_unchanged_version_is_not_downloaded_again(tmp_path):
+    pipeline = make_refreshing_pipeline(tmp_path, FakeS3(pointer={"version": "v1"}), current_version="v1")
+
+    assert pipeline.refresh_model() is False
+    assert pipeline.downloaded == [] and pipeline.activated == []
+
+
+def test_empty_bucket_loads_the_local_version(tmp_path):
+    pipeline = make_refreshing_pipeline(tmp_path, FakeS3(), local_version="v2")
+
+    assert pipeline.refresh_model() is True
+    assert pipeline.activated == ["v2"]
+
+
+def test_s3_error_falls_back_to_the_local_version(tmp_path):
+    pipeline = make_refreshing_pipeline(tmp_path, FakeS3(error=ConnectionError("S3 unreachable")), local_version="v2")
+
+    assert pipeline.refresh_model() is True
+    assert pipeline.downloaded == []
+    assert pipeline.activated == ["v2"]
+
+
+def test_s3_error_is_raised_while_a_model_is_serving(tmp_path):
+    pipeline = make_refreshing_pipeline(tmp_path, FakeS3(error=ConnectionError("S3 unreachable")),
+                                        current_version="v1", local_version="v1")
+
+    with pytest.raises(ConnectionError):
+        pipeline.refresh_model()
+    assert pipeline.activated == []
@@ -0,0 +1,79 @@
+"""Unit tests for the process-wide model registry, with loading replaced by a stub"""
+
+import threading
+import time
+import pytest
+from src.text_summarization.pipeline.model_registry import LoadedModel, ModelRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """This fixture returns a registry whose loads are counted instead of reading a model from disk"""
+    model_registry = ModelRegistry()
+    model_registry.loads = []
+
+    def fake_load(model_path, tokenizer_path, version, backend):
+        time.sleep(0.05)
+        model_registry.loads.append((model_path, version, backend))
+        return LoadedModel(version, backend, model_path, tokenizer_path, tokenizer=object(), model=object())
+
+    monkeypatch.setattr(model_registry, "_load", fake_load)
+    return model_registry
+
+
+def test_get_loads_a_version_once(registry):
+    first = registry.get("models", "tokenizer", "v1")
+    second = registry.get("models", "tokenizer", "v1")
+
+    assert first is second
+    assert registry.loads == [("models", "v1", "pytorch")]
+
+
+def test_concurrent_gets_share_one_load(registry):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("models", "tokenizer", "v1")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(registry.loads) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_versions_and_backends_are_loaded_separately(registry):
+    registry.get("models", "tokenizer", "v1")
+    registry.get("models", "tokenizer", "v2")
+    registry.get("models", "tokenizer", "v2", backend="pytorch-int8")
+
+    assert len(registry.loads) == 3
+
+
+def test_activate_evicts_other_versions(registry):
+    old_model = registry.get("models", "tokenizer", "v1")
+    new_model = registry.get("models", "tokenizer", "v2")
+    registry.activate(new_model)
+
+    assert registry.current is new_model
+    assert registry.get("models", "tokenizer", "v2") is new_model
+    assert registry.get("models", "tokenizer", "v1") is not old_model
+    assert len(registry.loads) == 3
+
+
+def test_unknown_backend_is_rejected(registry):
+    with pytest.raises(Exception, match="Unknown inference backend"):
+        registry.get("models", "tokenizer", "v1", backend="tensorrt")
+    assert registry.loads == []
+
+
+def test_model_version_changes_when_files_change(tmp_path):
+    model_dir = tmp_path / "models"
+    model_dir.mkdir()
+    (model_dir / "config.json").write_text("{}")
+    version = ModelRegistry.get_model_version(str(model_dir))
+
+    (model_dir / "model.safetensors").write_bytes(b"weights")
+
+    assert ModelRegistry.get_model_version(str(model_dir)) != version
+    assert ModelRegistry.get_model_version(str(model_dir)) == ModelRegistry.get_model_version(str(model_dir))
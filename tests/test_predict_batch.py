@@ -0,0 +1,52 @@
+"""Unit tests for POST /predict/batch, run against the stub prediction pipeline"""
+
+import json
+import pytest
+
+
+def read_lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_json_array_is_summarized_in_input_order(client, stub_pipeline):
+    texts = ["a much longer document", "short", "mid length", "x"]
+    response = client.post("/predict/batch", json=texts)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert read_lines(response) == [{"index": index, "summary": text.upper()} for index, text in enumerate(texts)]
+    assert sorted(text for batch in stub_pipeline.batches for text in batch) == sorted(texts)
+
+
+def test_ndjson_body_and_text_fields_are_accepted(client):
+    body = "\n".join([json.dumps({"text": "first"}), "", json.dumps({"dialogue": "second"}), json.dumps("third")])
+    response = client.post("/predict/batch", data=body, headers={"content-type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert [line["summary"] for line in read_lines(response)] == ["FIRST", "SECOND", "THIRD"]
+
+
+def test_object_with_texts_array_is_accepted(client):
+    response = client.post("/predict/batch", json={"texts": ["one", "two"]})
+
+    assert [line["summary"] for line in read_lines(response)] == ["ONE", "TWO"]
+
+
+@pytest.mark.parametrize("body, status_code", [
+    ("not json", 400),
+    (json.dumps({"texts": "not a list"}), 422),
+    (json.dumps([{"summary": "no text field"}]), 422),
+    (json.dumps([1, 2]), 422),
+    (json.dumps(["a", "b", "c", "d", "e"]), 413)
+])
+def test_invalid_bodies_are_rejected(client, stub_pipeline, body, status_code):
+    response = client.post("/predict/batch", data=body, headers={"content-type": "application/json"})
+
+    assert response.status_code == status_code
+    assert stub_pipeline.batches == []
+
+
+def test_unknown_profile_is_rejected(client):
+    response = client.post("/predict/batch", params={"profile": "fastest"}, json=["text"])
+
+    assert response.status_code == 422
@@ -0,0 +1,57 @@
+"""Unit tests for POST /predict/stream, run against the stub prediction pipeline"""
+
+import asyncio
+import gc
+import json
+import threading
+import app
+
+
+def test_summary_is_streamed_as_server_sent_events(client, stub_pipeline):
+    response = client.post("/predict/stream", params={"text": "hello streaming world"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = response.text.split("\n\n")
+    assert events[:3] == [f"data: {json.dumps({'token': word})}" for word in ("HELLO ", "STREAMING ", "WORLD ")]
+    assert events[3:] == [f"event: done\ndata: {json.dumps({'summary': 'HELLO STREAMING WORLD'})}", ""]
+    assert stub_pipeline.profiles == ["greedy"]
+    assert stub_pipeline.cancel_events[0].is_set()
+
+
+def test_beam_search_profile_is_rejected_with_422(client, stub_pipeline):
+    response = client.post("/predict/stream", params={"text": "hello", "profile": "quality"})
+
+    assert response.status_code == 422
+    assert "beam search" in response.json()["detail"]
+    assert stub_pipeline.cancel_events == []
+
+
+def test_disconnect_cancels_generation():
+    async def consume_first_chunk():
+        generation = asyncio.get_running_loop().create_future()
+        chunks = asyncio.Queue()
+        chunks.put_nowait("HELLO ")
+        cancel_event = threading.Event()
+        events = app.stream_summary_events(generation, chunks, cancel_event)
+
+        first_event = await events.__anext__()
+        # The server closes the generator when the client goes away
+        await events.aclose()
+        return first_event, cancel_event
+
+    first_event, cancel_event = asyncio.run(consume_first_chunk())
+
+    assert first_event == f"data: {json.dumps({'token': 'HELLO '})}\n\n"
+    assert cancel_event.is_set()
+
+
+def test_stream_closed_before_its_first_chunk_cancels_generation(client, stub_pipeline):
+    async def close_unstarted_stream():
+        response = await app.predict_stream_route("hello")
+        await response.body_iterator.aclose()
+
+    client.portal.call(close_unstarted_stream)
+    gc.collect()
+
+    assert stub_pipeline.cancel_events[0].is_set()
@@ -0,0 +1,38 @@
+"""Unit tests for the liveness and readiness probes and for gating requests until the model is warm"""
+
+import pytest
+
+
+@pytest.fixture
+def loading_pipeline(stub_pipeline):
+    stub_pipeline.ready = False
+    return stub_pipeline
+
+
+def test_readyz_returns_503_until_the_model_is_warm(client, loading_pipeline):
+    assert client.get("/healthz").json() == {"status": "ok"}
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json() == {"status": "loading"}
+
+    loading_pipeline.ready = True
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "model_version": "v1",
+                               "load_timeline": {"version": "v1", "total_seconds": 1.5}}
+
+
+@pytest.mark.parametrize("path, kwargs", [
+    ("/predict", {"params": {"text": "hello"}}),
+    ("/predict/stream", {"params": {"text": "hello"}}),
+    ("/predict/batch", {"json": ["hello"]})
+])
+def test_predict_routes_return_503_until_the_model_is_warm(client, loading_pipeline, path, kwargs):
+    response = client.post(path, **kwargs)
+
+    assert response.status_code == 503
+    assert loading_pipeline.batches == [] and loading_pipeline.cancel_events == []
+
+    loading_pipeline.ready = True
+    assert client.post(path, **kwargs).status_code == 200
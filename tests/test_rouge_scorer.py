@@ -0,0 +1,84 @@
+"""Unit tests for the native ROUGE scorer, checked against rouge_score on fixed pairs"""
+
+import random
+import pytest
+from rouge_score import rouge_scorer
+from src.text_summarization.components.rouge_scorer import RougeAccumulator, RougeScorer, lcs_length
+
+
+PAIRS = [
+    ("Amanda will bring Jerry cookies tomorrow.", "Amanda baked cookies and will bring Jerry some tomorrow."),
+    ("Olivia and Oliver are voting for liberals in this election.", "Oliver and Olivia vote liberal."),
+    ("Kim is in a bad mood.\nTim recommends the Pomodoro technique.", "Kim procrastinated.\nTim suggests Pomodoro."),
+    ("the the the cat", "the cat the the the"),
+    ("Meeting at 10:30 on 2024-05-01, room B12!", "Meeting at 10 30 in room b12"),
+    ("Hannah needs Betty's number.", ""),
+    ("", "Larry called Betty last time."),
+    ("Café naïve résumé", "cafe naive resume"),
+    ("running runners ran quickly", "the runner runs quick"),
+    ("a\n\nb c\nd", "b\na c d"),
+]
+
+
+def lcs_table_length(reference, prediction):
+    """This method returns the LCS length from the plain dynamic programming table"""
+    previous = [0] * (len(prediction) + 1)
+    for reference_token in reference:
+        current = [0]
+        for j, prediction_token in enumerate(prediction, start=1):
+            current.append(previous[j - 1] + 1 if reference_token == prediction_token
+                           else max(previous[j], current[j - 1]))
+        previous = current
+    return previous[-1]
+
+
+@pytest.mark.parametrize("use_stemmer", [False, True])
+@pytest.mark.parametrize("reference, prediction", PAIRS)
+def test_scores_match_rouge_score(reference, prediction, use_stemmer):
+    rouge_types = list(RougeScorer.ROUGE_TYPES) + ["rouge3"]
+    expected = rouge_scorer.RougeScorer(rouge_types, use_stemmer=use_stemmer).score(reference, prediction)
+    actual = RougeScorer(rouge_types, use_stemmer=use_stemmer).score(reference, prediction)
+
+    for rouge_type in rouge_types:
+        assert actual[rouge_type].precision == pytest.approx(expected[rouge_type].precision)
+        assert actual[rouge_type].recall == pytest.approx(expected[rouge_type].recall)
+        assert actual[rouge_type].fmeasure == pytest.approx(expected[rouge_type].fmeasure)
+
+
+def test_bit_parallel_lcs_matches_the_dynamic_programming_table():
+    generator = random.Random(0)
+    for _ in range(200):
+        reference = [generator.choice("abcde") for _ in range(generator.randint(0, 80))]
+        prediction = [generator.choice("abcde") for _ in range(generator.randint(0, 80))]
+        assert lcs_length(reference, prediction) == lcs_table_length(reference, prediction)
+
+
+def test_compute_returns_the_mean_of_the_pair_scores():
+    references, predictions = zip(*PAIRS)
+    expected_scorer = rouge_scorer.RougeScorer(list(RougeScorer.ROUGE_TYPES))
+    expected = [expected_scorer.score(reference, prediction) for reference, prediction in PAIRS]
+
+    scores = RougeScorer().compute(list(predictions), list(references))
+
+    for rouge_type, score in scores.items():
+        assert score.fmeasure == pytest.approx(sum(pair[rouge_type].fmeasure for pair in expected) / len(PAIRS))
+
+
+def test_merged_accumulators_equal_one_pass():
+    references, predictions = zip(*PAIRS)
+    scorer = RougeScorer()
+    merged = scorer.accumulate(predictions[::2], references[::2]).merge(
+        scorer.accumulate(predictions[1::2], references[1::2])
+    )
+
+    one_pass = scorer.accumulate(predictions, references).compute()
+    for rouge_type, score in merged.compute().items():
+        assert tuple(vars(score).values()) == pytest.approx(tuple(vars(one_pass[rouge_type]).values()))
+    assert RougeAccumulator(scorer.rouge_types).compute()["rouge1"].fmeasure == 0.0
+
+
+def test_invalid_input_is_rejected():
+    with pytest.raises(ValueError):
+        RougeScorer(["rougeX"])
+    with pytest.raises(ValueError):
+        RougeScorer().compute(["one prediction"], [])
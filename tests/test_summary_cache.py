@@ -0,0 +1,127 @@
+"""Unit tests for the summary cache: byte-bounded LRU, version invalidation and the best-effort disk tier"""
+
+import os
+from src.text_summarization.pipeline.summary_cache import SummaryCache
+
+
+def test_key_ignores_whitespace_but_not_parameters_or_version():
+    cache = SummaryCache(max_memory_bytes=1024)
+    key = cache.make_key("Hello   there\n friend", {"num_beams": 4}, "v1")
+
+    assert key == cache.make_key(" Hello there friend ", {"num_beams": 4}, "v1")
+    assert key != cache.make_key("Hello there friend", {"num_beams": 2}, "v1")
+    assert key != cache.make_key("Hello there friend", {"num_beams": 4}, "v2")
+
+
+def test_memory_stays_within_the_byte_bound_and_evicts_least_recently_used():
+    keys = [f"{index:064x}" for index in range(4)]
+    cache = SummaryCache(max_memory_bytes=0)
+    cache.max_memory_bytes = 3 * cache._entry_size(keys[0], "summary")
+    for key in keys[:3]:
+        cache.put(key, "summary")
+    cache.get(keys[0])
+    cache.put(keys[3], "summary")
+
+    stats = cache.get_stats()
+    assert stats["memory_bytes"] <= cache.max_memory_bytes
+    assert stats["evictions"] == 1
+    assert cache.get(keys[1]) is None
+    assert [cache.get(key) for key in (keys[0], keys[2], keys[3])] == ["summary"] * 3
+
+
+def test_entry_larger_than_the_bound_is_not_kept_in_memory():
+    cache = SummaryCache(max_memory_bytes=200)
+    cache.put("k" * 64, "x" * 500)
+
+    assert cache.get("k" * 64) is None
+    assert cache.get_stats()["memory_bytes"] == 0
+
+
+def test_new_model_version_invalidates_every_entry(tmp_path):
+    cache = SummaryCache(max_memory_bytes=1024, disk_dir=str(tmp_path / "cache"))
+    cache.set_model_version("v1")
+    key = cache.make_key("text", {}, "v1")
+    cache.put(key, "summary")
+    cache.set_model_version("v1")
+    assert cache.get(key) == "summary"
+
+    cache.set_model_version("v2")
+
+    assert cache.get(key) is None
+    assert cache.get_stats()["invalidations"] == 1
+
+
+def test_disk_tier_survives_restarts_of_the_same_version_only(tmp_path):
+    disk_dir = str(tmp_path / "cache")
+    cache = SummaryCache(max_memory_bytes=1024, disk_dir=disk_dir)
+    cache.set_model_version("v1")
+    key = cache.make_key("text", {}, "v1")
+    cache.put(key, "summary")
+
+    restarted = SummaryCache(max_memory_bytes=1024, disk_dir=disk_dir)
+    restarted.set_model_version("v1")
+    assert restarted.get(key) == "summary"
+    assert restarted.get_stats()["disk_hits"] == 1
+
+    upgraded = SummaryCache(max_memory_bytes=1024, disk_dir=disk_dir)
+    upgraded.set_model_version("v2")
+    assert upgraded.get(key) is None
+
+
+def test_activating_a_version_keeps_the_disk_entries_of_other_workers(tmp_path):
+    disk_dir = str(tmp_path / "cache")
+    old_worker = SummaryCache(max_memory_bytes=1024, disk_dir=disk_dir)
+    old_worker.set_model_version("v1")
+    key = old_worker.make_key("text", {}, "v1")
+    old_worker.put(key, "summary")
+
+    new_worker = SummaryCache(max_memory_bytes=1024, disk_dir=disk_dir)
+    new_worker.set_model_version("v1")
+    new_worker.set_model_version("v2")
+    new_worker.put(new_worker.make_key("text", {}, "v2"), "new summary")
+
+    restarted_old_worker = SummaryCache(max_memory_bytes=1024, disk_dir=disk_dir)
+    restarted_old_worker.set_model_version("v1")
+    assert restarted_old_worker.get(key) == "summary"
+    assert new_worker.get(new_worker.make_key("text", {}, "v2")) == "new summary"
+
+
+def test_disk_tier_evicts_the_oldest_entries_beyond_its_bound(tmp_path):
+    cache = SummaryCache(max_memory_bytes=0, disk_dir=str(tmp_path / "cache"), max_disk_bytes=1000)
+    cache.set_model_version("v1")
+    keys = [f"{index:064x}" for index in range(12)]
+    for index, key in enumerate(keys):
+        cache.put(key, "x" * 100)
+        os.utime(cache._disk_path(key), (index, index))
+
+    stats = cache.get_stats()
+    assert stats["disk_bytes"] <= 1000
+    assert stats["disk_evictions"] > 0
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[-1]) == "x" * 100
+
+
+def test_disk_errors_are_misses_not_failures(tmp_path):
+    blocking_file = tmp_path / "not-a-directory"
+    blocking_file.write_text("")
+    cache = SummaryCache(max_memory_bytes=1024, disk_dir=str(blocking_file / "cache"))
+
+    cache.set_model_version("v1")
+    cache.put("k" * 64, "summary")
+    cache.invalidate()
+
+    assert cache.get("k" * 64) is None
+    assert cache.get_stats()["disk_errors"] == 1
+
+
+def test_unreadable_disk_entry_is_a_miss(tmp_path):
+    cache = SummaryCache(max_memory_bytes=1024, disk_dir=str(tmp_path / "cache"))
+    cache.put("k" * 64, "summary")
+    cache.invalidate()
+    # A directory in place of the entry file makes the read fail after the existence check passed
+    os.makedirs(cache._disk_path("k" * 64))
+
+    assert cache.get("k" * 64) is None
+    stats = cache.get_stats()
+    assert stats["disk_errors"] == 1
+    assert stats["misses"] == 1
@@ -3,6 +3,7 @@ from src.text_summarization.pipeline.model_training_pipeline import (DataIngesti
                                                                      DataTransformationPipeline, 
                                                                      ModelTrainingPipeline, 
                                                                      ModelEvaluationPipeline,
+                                                                     ModelExportPipeline,
                                                                      ModelPusherPipeline
                                                                      )
 from src.text_summarization.logger import logging
@@ -70,6 +71,19 @@ except Exception as e:
 
 
 
+STAGE_NAME = "Model Export stage"
+try:
+    logging.info(f"*******************")
+    logging.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+    model_exporter = ModelExportPipeline()
+    model_exporter.main()
+    logging.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+except Exception as e:
+    logging.exception(e)
+    raise e
+
+
+
 STAGE_NAME = "Model Pusher stage"
 try:
     logging.info(f"*******************")